@@ -1,14 +1,20 @@
 from django.contrib import admin
-from .models import User, Skill, TechCategory, CommunityRole, Notification, Bookmark, ContactUs
+from .models import User, Skill, TechCategory, CommunityRole, Notification, NotificationArchive, Bookmark, ContactUs, GlobalCounter, DailyActivityRollup, RevokedToken
 from django.contrib.auth.models import Group
 
 @admin.register(User)
 class UserAdmin(admin.ModelAdmin):
     list_display = ('id', 'username', 'email', 'first_name', 'last_name', 'is_verified', 'is_deleted', 'created_at')
     search_fields = ('username', 'email')
-    list_filter = ('is_verified', 'is_deleted', 'created_at')
+    list_filter = ('is_verified', 'is_deleted', 'digest_frequency', 'created_at')
     ordering = ('-created_at',)
-    readonly_fields = ('date_joined',)
+    readonly_fields = ('date_joined', 'token_generation')
+
+    def save_model(self, request, obj, form, change):
+        # Deactivating an account signs it out everywhere
+        if change and ({'is_active', 'is_deleted'} & set(form.changed_data)) and (not obj.is_active or obj.is_deleted):
+            obj.token_generation += 1
+        super().save_model(request, obj, form, change)
 
 @admin.register(Skill)
 class SkillAdmin(admin.ModelAdmin):
@@ -27,7 +33,13 @@ class CommunityRoleAdmin(admin.ModelAdmin):
 
 @admin.register(Notification)
 class NotificationAdmin(admin.ModelAdmin):
-    list_display = ('id', 'user', 'message', 'created_at', 'is_read')
+    list_display = ('id', 'user', 'message', 'actor_count', 'created_at', 'is_read', 'emailed_at')
+
+@admin.register(NotificationArchive)
+class NotificationArchiveAdmin(admin.ModelAdmin):
+    list_display = ('id', 'original_id', 'user', 'notification_type', 'created_at', 'archived_at')
+    list_filter = ('notification_type',)
+    raw_id_fields = ('user',)
 
 @admin.register(Bookmark)
 class BookmarkAdmin(admin.ModelAdmin):
@@ -52,5 +64,22 @@ class ContactUsAdmin(admin.ModelAdmin):
     mark_as_resolved.short_description = "Mark selected submissions as resolved"
 
     actions = [mark_as_resolved]
-        
-  
\ No newline at end of file
+
+
+@admin.register(GlobalCounter)
+class GlobalCounterAdmin(admin.ModelAdmin):
+    list_display = ('name', 'value', 'updated_at', 'reconciled_at')
+    readonly_fields = ('updated_at', 'reconciled_at')
+
+
+@admin.register(DailyActivityRollup)
+class DailyActivityRollupAdmin(admin.ModelAdmin):
+    list_display = ('date', 'signups', 'events_created', 'blogs_published', 'discussions', 'registrations')
+    ordering = ('-date',)
+
+
+@admin.register(RevokedToken)
+class RevokedTokenAdmin(admin.ModelAdmin):
+    list_display = ('jti', 'user', 'revoked_at', 'expires_at')
+    raw_id_fields = ('user',)
+    readonly_fields = ('revoked_at',)
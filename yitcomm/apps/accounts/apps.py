@@ -4,3 +4,11 @@ from django.apps import AppConfig
 class AccountsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.accounts'
+
+    def ready(self):
+        from .category_tree import connect_category_signals
+        from .operational_reports.counters import connect_counter_signals
+        from .reaction_counts import connect_reaction_count_signals
+        connect_category_signals()
+        connect_counter_signals()
+        connect_reaction_count_signals()
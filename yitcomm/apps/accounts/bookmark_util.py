@@ -1,11 +1,65 @@
 from django.contrib.contenttypes.models import ContentType
+from django.contrib.contenttypes.prefetch import GenericPrefetch
 from .models import Bookmark
 
-def get_bookmark_status(user, obj):
-    """Check if an object is bookmarked by a user and return bookmark data if exists."""
-    if not user.is_authenticated:
+
+class BookmarkIndex:
+    """A user's bookmarks for a page of objects, loaded with a single query."""
+
+    def __init__(self, user, objects):
+        self.user = user
+        self.object_ids = {}
+        self.bookmarks = {}
+
+        objects = [obj for obj in objects if obj is not None]
+        if not objects or not (user and user.is_authenticated):
+            return
+
+        for obj in objects:
+            content_type = ContentType.objects.get_for_model(obj)
+            self.object_ids.setdefault(content_type.id, set()).add(obj.id)
+
+        for content_type_id, ids in self.object_ids.items():
+            for bookmark in Bookmark.objects.filter(
+                user=user,
+                content_type_id=content_type_id,
+                object_id__in=ids
+            ):
+                self.bookmarks[(bookmark.content_type_id, bookmark.object_id)] = bookmark
+
+    def covers(self, user, obj):
+        content_type = ContentType.objects.get_for_model(obj)
+        return user == self.user and obj.id in self.object_ids.get(content_type.id, ())
+
+    def get(self, obj):
+        content_type = ContentType.objects.get_for_model(obj)
+        return self.bookmarks.get((content_type.id, obj.id))
+
+
+def _bookmark_data(bookmark):
+    return {
+        'id': bookmark.id,
+        'notes': bookmark.notes,
+        'folder': bookmark.folder,
+        'created_at': bookmark.created_at
+    }
+
+
+def get_bookmark_status(user, obj, index=None):
+    """
+    Check if an object is bookmarked by a user and return bookmark data if exists.
+    Reads from `index` (see BookmarkIndex) when it covers the object, so list
+    serializers only hit the database once per page.
+    """
+    if user is None or not user.is_authenticated:
         return {'is_bookmarked': False, 'bookmark': None}
-    
+
+    if index is not None and index.covers(user, obj):
+        bookmark = index.get(obj)
+        if bookmark is None:
+            return {'is_bookmarked': False, 'bookmark': None}
+        return {'is_bookmarked': True, 'bookmark': _bookmark_data(bookmark)}
+
     content_type = ContentType.objects.get_for_model(obj)
     try:
         bookmark = Bookmark.objects.get(
@@ -13,14 +67,43 @@ def get_bookmark_status(user, obj):
             content_type=content_type,
             object_id=obj.id
         )
-        return {
-            'is_bookmarked': True,
-            'bookmark': {
-                'id': bookmark.id,
-                'notes': bookmark.notes,
-                'folder': bookmark.folder,
-                'created_at': bookmark.created_at
-            }
-        }
+        return {'is_bookmarked': True, 'bookmark': _bookmark_data(bookmark)}
     except Bookmark.DoesNotExist:
-        return {'is_bookmarked': False, 'bookmark': None}
\ No newline at end of file
+        return {'is_bookmarked': False, 'bookmark': None}
+
+
+def bookmark_targets():
+    """
+    Bookmarkable models keyed by content type model name, with the queryset used
+    to bulk-load them and the summary serializer used in bookmark listings.
+    Imported lazily because the target apps import this module.
+    """
+    from apps.blogs.models import Blog
+    from apps.blogs.serializers import BlogSummarySerializer
+    from apps.events.models import Event
+    from apps.events.serializers import EventSummarySerializer
+    from apps.forums.models import Forum, Discussion
+    from apps.forums.serializers import ForumSummarySerializer, DiscussionSummarySerializer
+    from apps.projects.models import Project
+    from apps.projects.serializers import ProjectSummarySerializer
+
+    return {
+        'blog': (Blog.objects.select_related('author'), BlogSummarySerializer),
+        'forum': (Forum.objects.select_related('category'), ForumSummarySerializer),
+        'discussion': (Discussion.objects.select_related('author', 'forum'), DiscussionSummarySerializer),
+        'event': (Event.objects.all(), EventSummarySerializer),
+        'project': (Project.objects.select_related('author'), ProjectSummarySerializer),
+    }
+
+
+def with_content_objects(queryset):
+    """
+    Prefetch bookmarked objects grouped by content type: one query per target
+    type on the page, whatever the page size.
+    """
+    return queryset.select_related('content_type').prefetch_related(
+        GenericPrefetch(
+            'content_object',
+            [target_queryset for target_queryset, _ in bookmark_targets().values()]
+        )
+    )
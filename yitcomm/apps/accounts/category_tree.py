@@ -0,0 +1,143 @@
+import threading
+import time
+
+from django.conf import settings
+from django.db.models import Count, Max
+from django.db.models.signals import post_delete, post_save
+
+from .models import TechCategory
+
+# How often (seconds) a process checks the database for changes made by other processes
+CHECK_INTERVAL = getattr(settings, 'CATEGORY_TREE_CHECK_INTERVAL', 5)
+
+
+class CategoryNode:
+    __slots__ = ('id', 'name', 'description', 'parent_id', 'path', 'children', 'data')
+
+    def __init__(self, category):
+        self.id = category.id
+        self.name = category.name
+        self.description = category.description
+        self.parent_id = category.parent_id
+        self.path = ''
+        self.children = []
+        self.data = None
+
+
+class CategoryTree:
+    """
+    Every TechCategory in memory, with a materialized path per node
+    ("1/4/9/", root first) for ancestor and subtree lookups.
+    """
+
+    def __init__(self, categories):
+        self.nodes = {category.id: CategoryNode(category) for category in categories}
+        for node in self.nodes.values():
+            parent = self.nodes.get(node.parent_id)
+            if parent is not None:
+                parent.children.append(node.id)
+        for node in self.nodes.values():
+            node.path = ''.join(f'{ancestor}/' for ancestor in self._lineage(node))
+            parent = self.nodes.get(node.parent_id)
+            node.data = {
+                'id': node.id,
+                'name': node.name,
+                'description': node.description,
+                'parent': node.parent_id,
+                'parent_name': parent.name if parent else None,
+            }
+
+    def _lineage(self, node):
+        """Ids from the root down to `node`; stops at cycles or dangling parents."""
+        lineage = [node.id]
+        seen = {node.id}
+        parent = self.nodes.get(node.parent_id)
+        while parent is not None and parent.id not in seen:
+            lineage.append(parent.id)
+            seen.add(parent.id)
+            parent = self.nodes.get(parent.parent_id)
+        return lineage[::-1]
+
+    def __contains__(self, category_id):
+        return category_id in self.nodes
+
+    def get(self, category_id):
+        return self.nodes.get(category_id)
+
+    def parent_name(self, category_id):
+        node = self.nodes.get(category_id)
+        parent = self.nodes.get(node.parent_id) if node else None
+        return parent.name if parent else None
+
+    def ancestor_ids(self, category_id):
+        """Ancestors of a category, nearest parent first."""
+        node = self.nodes.get(category_id)
+        if node is None:
+            return []
+        return [int(part) for part in node.path.split('/')[:-2]][::-1]
+
+    def descendant_ids(self, category_id, include_self=True):
+        """A category's whole subtree, for "this category and its subcategories" filters."""
+        node = self.nodes.get(category_id)
+        if node is None:
+            return [category_id] if include_self else []
+        ids = [
+            other.id for other in self.nodes.values()
+            if other.path.startswith(node.path) and (include_self or other.id != category_id)
+        ]
+        return ids
+
+    def roots(self):
+        return [node for node in self.nodes.values() if node.parent_id not in self.nodes]
+
+    def serialize(self, category_id):
+        """Pre-serialized TechCategorySerializer representation, or None if unknown."""
+        node = self.nodes.get(category_id)
+        return dict(node.data) if node else None
+
+
+_tree = None
+_tree_generation = None
+_checked_at = 0
+_lock = threading.Lock()
+
+
+def get_category_tree():
+    """The process-wide category tree, loaded once and reloaded after TechCategory changes."""
+    global _tree, _tree_generation, _checked_at
+
+    now = time.monotonic()
+    if _tree is not None and now - _checked_at < CHECK_INTERVAL:
+        return _tree
+
+    generation = _generation()
+    with _lock:
+        _checked_at = now
+        if _tree is None or generation != _tree_generation:
+            categories = TechCategory.objects.only('id', 'name', 'description', 'parent_id')
+            _tree = CategoryTree(categories)
+            _tree_generation = generation
+        return _tree
+
+
+def _generation():
+    """
+    A cheap fingerprint of the category table, read from the database so every
+    worker sees changes made by any other one: saves bump updated_at, deletes
+    change the count.
+    """
+    return tuple(TechCategory.objects.aggregate(
+        count=Count('id'), last_id=Max('id'), updated=Max('updated_at')
+    ).values())
+
+
+def invalidate_category_tree(**kwargs):
+    """Drop this process's tree; other processes notice the change within CHECK_INTERVAL."""
+    global _tree
+    with _lock:
+        _tree = None
+
+
+def connect_category_signals():
+    post_save.connect(invalidate_category_tree, sender=TechCategory, dispatch_uid='category_tree_save')
+    post_delete.connect(invalidate_category_tree, sender=TechCategory, dispatch_uid='category_tree_delete')
@@ -0,0 +1,127 @@
+from django.db import models
+from django.db.models import Q
+
+# Each level of a path is the comment id in fixed-width base 36, so that
+# ordering by path walks a thread depth-first with siblings oldest first
+STEP = 7
+PATH_LENGTH = 255
+MAX_DEPTH = PATH_LENGTH // STEP
+DIGITS = '0123456789abcdefghijklmnopqrstuvwxyz'
+
+
+def path_segment(pk):
+    digits = []
+    while pk:
+        pk, digit = divmod(pk, 36)
+        digits.append(DIGITS[digit])
+    return ''.join(reversed(digits)).rjust(STEP, '0')
+
+
+def path_index(name):
+    # varchar_pattern_ops lets Postgres serve LIKE 'prefix%' from the index under any collation
+    return models.Index(fields=['path'], opclasses=['varchar_pattern_ops'], name=name)
+
+
+class ThreadedComment(models.Model):
+    """
+    Comment with a materialized path ("<root><child>...<self>", STEP chars per
+    level) and depth, set on insert. A subtree is then a single indexed prefix
+    scan instead of one query per level. Subclasses define `parent`.
+    """
+    path = models.CharField(max_length=PATH_LENGTH, blank=True, default='', editable=False)
+    depth = models.PositiveSmallIntegerField(default=0, editable=False)
+
+    class Meta:
+        abstract = True
+
+    def save(self, *args, **kwargs):
+        creating = self._state.adding
+        if creating and self.parent_id and self.parent.depth >= MAX_DEPTH - 1:
+            # No room for another level: the reply joins its parent's siblings' replies
+            self.parent_id = self.parent.parent_id
+        super().save(*args, **kwargs)
+        if creating and not self.path:
+            parent = self.parent if self.parent_id else None
+            self.path = (parent.path if parent else '') + path_segment(self.pk)
+            self.depth = parent.depth + 1 if parent else 0
+            type(self).objects.filter(pk=self.pk).update(path=self.path, depth=self.depth)
+
+    def subtree(self, max_depth=None):
+        """Descendants (not self) down to max_depth levels below, in thread order."""
+        return type(self).objects.filter(subtree_filter([self], max_depth)).order_by('path')
+
+
+def subtree_filter(roots, max_depth=None):
+    """Q matching the descendants of any of `roots`, at most max_depth levels below each."""
+    condition = Q(pk__in=[])
+    for root in roots:
+        branch = Q(path__startswith=root.path, depth__gt=root.depth)
+        if max_depth is not None:
+            branch &= Q(depth__lte=root.depth + max_depth)
+        condition |= branch
+    return condition
+
+
+def attach_replies(roots, descendants):
+    """
+    Nest path-ordered descendants under their parents as `thread_replies`,
+    so serializers can render the whole tree without touching the database.
+    """
+    nodes = {}
+    for comment in [*roots, *descendants]:
+        comment.thread_replies = []
+        nodes[comment.pk] = comment
+    for comment in descendants:
+        parent = nodes.get(comment.parent_id)
+        if parent is not None:
+            parent.thread_replies.append(comment)
+    return roots
+
+
+def walk_threads(comments):
+    """Yield the comments and every reply attached under them by attach_replies."""
+    stack = list(comments)
+    while stack:
+        comment = stack.pop()
+        yield comment
+        stack.extend(getattr(comment, 'thread_replies', ()))
+
+
+def load_threads(roots, queryset, max_depth=None):
+    """Attach the subtrees of all roots using one query built on `queryset`."""
+    roots = [root for root in roots if not hasattr(root, 'thread_replies')]
+    if not roots:
+        return []
+    descendants = list(queryset.filter(subtree_filter(roots, max_depth)).order_by('path'))
+    return attach_replies(roots, descendants)
+
+
+def rebuild_paths(model, batch_size=1000):
+    """
+    Recompute path and depth for every row of a comment model, e.g. after a bulk
+    import or in a backfill migration. Chains deeper than MAX_DEPTH are flattened.
+    """
+    parents = dict(model.objects.values_list('id', 'parent_id'))
+    computed = {}  # id -> (path, depth, parent_id)
+    for pk in sorted(parents):
+        chain = []
+        node = pk
+        while node is not None and node not in computed:
+            chain.append(node)
+            node = parents[node]
+        for node in reversed(chain):
+            parent_id = parents[node]
+            if parent_id is None:
+                computed[node] = (path_segment(node), 0, None)
+                continue
+            parent_path, parent_depth, grandparent_id = computed[parent_id]
+            if parent_depth >= MAX_DEPTH - 1:
+                parent_id, parent_path, parent_depth = grandparent_id, parent_path[:-STEP], parent_depth - 1
+            computed[node] = (parent_path + path_segment(node), parent_depth + 1, parent_id)
+
+    rows = [
+        model(id=pk, path=path, depth=depth, parent_id=parent_id)
+        for pk, (path, depth, parent_id) in computed.items()
+    ]
+    model.objects.bulk_update(rows, ['path', 'depth', 'parent'], batch_size=batch_size)
+    return len(rows)
@@ -0,0 +1,118 @@
+import operator
+from collections import defaultdict
+from datetime import timedelta
+from functools import reduce
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Exists, F, Max, OuterRef, Q, Window
+from django.db.models.functions import RowNumber
+from django.utils import timezone
+
+from ..newsletters.mailer import outbox_email, queue_emails
+from ..newsletters.rendering import render_email
+from .models import Notification, User
+
+DIGEST_PERIODS = {
+    'daily': timedelta(days=1),
+    'weekly': timedelta(weeks=1),
+}
+# Notifications listed in one digest; the rest are summarized as "and N more"
+MAX_ITEMS = getattr(settings, 'NOTIFICATION_DIGEST_MAX_ITEMS', 20)
+USER_BATCH_SIZE = 500
+
+
+def pending_notifications():
+    return Notification.objects.filter(emailed_at__isnull=True, is_read=False)
+
+
+def due_users(frequency, now):
+    """Users on this digest schedule whose last digest is a full period old and who have something to read."""
+    return User.objects.filter(
+        Q(last_digest_at__isnull=True) | Q(last_digest_at__lte=now - DIGEST_PERIODS[frequency]),
+        Exists(pending_notifications().filter(user=OuterRef('pk'))),
+        digest_frequency=frequency,
+        is_active=True,
+        is_deleted=False,
+        email__gt='',
+    )
+
+
+def digest_email(user, notifications, total, frequency):
+    html_content, text_content = render_email('notification_digest', {
+        'user': user,
+        'notifications': notifications,
+        'total': total,
+        'remaining': total - len(notifications),
+        'period': frequency,
+    })
+    return outbox_email(
+        recipient=user.email,
+        subject=f"Your {frequency} digest: {total} new notification{'s' if total != 1 else ''}",
+        html_content=html_content,
+        text_content=text_content,
+    )
+
+
+def _queue_batch(users, frequency, now):
+    """One digest per user in the batch: per-user totals and the newest MAX_ITEMS rows, two queries."""
+    user_ids = [user.id for user in users]
+    with transaction.atomic():
+        pending = pending_notifications().filter(user_id__in=user_ids)
+        totals = {
+            row['user_id']: row
+            for row in pending.order_by().values('user_id').annotate(
+                total=Count('id'), last_id=Max('id'), last_created_at=Max('created_at')
+            )
+        }
+        if not totals:
+            return 0, 0
+        rows = (
+            pending.annotate(position=Window(
+                RowNumber(), partition_by=F('user_id'), order_by=[F('created_at').desc(), F('id').desc()]
+            ))
+            .filter(position__lte=MAX_ITEMS)
+            .order_by('user_id', 'position')
+            .values('id', 'user_id', 'title', 'message', 'created_at')
+        )
+        by_user = defaultdict(list)
+        for row in rows:
+            by_user[row['user_id']].append(row)
+
+        emails = [
+            digest_email(user, by_user[user.id], totals[user.id]['total'], frequency)
+            for user in users
+            if user.id in totals
+        ]
+        queue_emails(emails)
+
+        # Bounded per user by what was read: a notification created meanwhile has a higher id and one
+        # merged into meanwhile a later created_at, so both wait for the next digest
+        pending_notifications().filter(reduce(operator.or_, [
+            Q(user_id=user_id, id__lte=row['last_id'], created_at__lte=row['last_created_at'])
+            for user_id, row in totals.items()
+        ])).update(emailed_at=now)
+        User.objects.filter(id__in=list(totals)).update(last_digest_at=now)
+    return len(emails), sum(row['total'] for row in totals.values())
+
+
+def queue_digests(frequency, batch_size=USER_BATCH_SIZE):
+    """Queue digests for every due user on a schedule; returns (digests, notifications)."""
+    now = timezone.now()
+    users = due_users(frequency, now).order_by('id').only('id', 'username', 'first_name', 'email')
+    digests = notifications = 0
+    last_id = 0
+    while True:
+        batch = list(users.filter(id__gt=last_id)[:batch_size])
+        if not batch:
+            break
+        batch_digests, batch_notifications = _queue_batch(batch, frequency, now)
+        digests += batch_digests
+        notifications += batch_notifications
+        last_id = batch[-1].id
+    return digests, notifications
+
+
+def queue_due_digests(batch_size=USER_BATCH_SIZE):
+    totals = [queue_digests(frequency, batch_size) for frequency in DIGEST_PERIODS]
+    return sum(digests for digests, _ in totals), sum(notifications for _, notifications in totals)
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from apps.accounts import write_buffer
+
+
+class Command(BaseCommand):
+    help = "Write everything buffered in the shared cache (STORE = 'cache') to the database: view counts, read markers, ..."
+
+    def handle(self, *args, **options):
+        for buffer in write_buffer.buffers:
+            if buffer.config['STORE'] != 'cache':
+                self.stdout.write(f"{buffer.name}: local store; each worker flushes its own buffer.")
+                continue
+            written = buffer.flush()
+            self.stdout.write(self.style.SUCCESS(f"{buffer.name}: flushed {written} rows"))
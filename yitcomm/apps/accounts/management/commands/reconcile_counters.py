@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.accounts.operational_reports.counters import COUNTED_MODELS, reconcile
+
+
+class Command(BaseCommand):
+    help = "Recount the dashboard counters exactly and correct any drift (run periodically, e.g. nightly)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('names', nargs='*', help=f"Counters to reconcile (default: all of {', '.join(COUNTED_MODELS)})")
+
+    def handle(self, *args, **options):
+        unknown = set(options['names']) - set(COUNTED_MODELS)
+        if unknown:
+            raise CommandError(f"Unknown counters: {', '.join(sorted(unknown))}")
+
+        drift = reconcile(options['names'] or None)
+        for name, (old, new) in drift.items():
+            self.stdout.write(f"{name}: {old} -> {new}")
+        self.stdout.write(self.style.SUCCESS(f"Reconciled counters ({len(drift)} drifted)"))
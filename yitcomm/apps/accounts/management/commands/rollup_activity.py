@@ -0,0 +1,35 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.accounts.operational_reports.rollups import backfill, rollup_new_days
+
+
+class Command(BaseCommand):
+    help = (
+        "Update the daily activity rollups for the days since the last run "
+        "(schedule it, e.g. hourly). Use --backfill to rebuild historical days."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--backfill', action='store_true',
+                            help='Recompute every day from the earliest activity (or --since).')
+        parser.add_argument('--since', help='First day to backfill (YYYY-MM-DD).')
+        parser.add_argument('--until', help='Last day to backfill (YYYY-MM-DD, default today).')
+
+    def handle(self, *args, **options):
+        if options['backfill']:
+            days = backfill(self._parse(options['since']), self._parse(options['until']))
+        elif options['since'] or options['until']:
+            raise CommandError('--since/--until require --backfill')
+        else:
+            days = rollup_new_days()
+        self.stdout.write(self.style.SUCCESS(f"Rolled up {days} days"))
+
+    def _parse(self, value):
+        if not value:
+            return None
+        try:
+            return date.fromisoformat(value)
+        except ValueError:
+            raise CommandError(f"Invalid date: {value}")
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from apps.accounts.digests import DIGEST_PERIODS, USER_BATCH_SIZE, queue_digests
+
+
+class Command(BaseCommand):
+    help = (
+        "Queue one email per user summarizing their unread, not yet emailed notifications. "
+        "Safe to run often: each user gets at most one digest per configured period."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--frequency', choices=list(DIGEST_PERIODS), default=None,
+                            help='Only this schedule (default: all).')
+        parser.add_argument('--batch-size', type=int, default=USER_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        frequencies = [options['frequency']] if options['frequency'] else list(DIGEST_PERIODS)
+        for frequency in frequencies:
+            digests, notifications = queue_digests(frequency, options['batch_size'])
+            self.stdout.write(self.style.SUCCESS(
+                f"Queued {digests} {frequency} digests covering {notifications} notifications"
+            ))
@@ -8,6 +8,8 @@ from rest_framework_simplejwt.authentication import JWTAuthentication
 from django.conf import settings
 from django.utils.translation import gettext_lazy as _
 
+from .revocation import is_token_current, revocation_list
+
 User = get_user_model()
 
 
@@ -50,6 +52,10 @@ class CustomJWTAuthentication(JWTAuthentication):
     Custom JWT authentication to add additional user checks
     """
     def get_user(self, validated_token):
+        # Logged-out tokens are rejected from memory, before any query
+        if revocation_list.is_revoked(validated_token.get(settings.SIMPLE_JWT.get('JTI_CLAIM', 'jti'))):
+            raise AuthenticationFailed('Token has been revoked.')
+
         try:
             user_id = validated_token['user_id']
             
@@ -59,6 +65,10 @@ class CustomJWTAuthentication(JWTAuthentication):
                 # Check if user is deleted
                 if user.is_deleted:
                     raise AuthenticationFailed('User account has been deactivated.')
+
+                # Tokens issued before a password change or deactivation
+                if not is_token_current(validated_token, user):
+                    raise AuthenticationFailed('Token has been revoked.')
                     
                 return user
             except User.DoesNotExist:
@@ -70,11 +80,16 @@ class CustomJWTAuthentication(JWTAuthentication):
 
 def get_client_ip(request):
     """
-    Get client IP address from request
+    Get client IP address from request. X-Forwarded-For is client-controlled, so
+    only the entries appended by our own TRUSTED_PROXY_COUNT proxies are believed:
+    the address the outermost of them saw. With no trusted proxies, REMOTE_ADDR.
     """
+    remote_addr = request.META.get('REMOTE_ADDR')
+    trusted_proxies = getattr(settings, 'TRUSTED_PROXY_COUNT', 0)
     x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
-    if x_forwarded_for:
-        ip = x_forwarded_for.split(',')[0]
-    else:
-        ip = request.META.get('REMOTE_ADDR')
-    return ip
\ No newline at end of file
+    if not trusted_proxies or not x_forwarded_for:
+        return remote_addr
+    forwarded = [address.strip() for address in x_forwarded_for.split(',') if address.strip()]
+    if len(forwarded) < trusted_proxies:
+        return forwarded[0] if forwarded else remote_addr
+    return forwarded[-trusted_proxies]
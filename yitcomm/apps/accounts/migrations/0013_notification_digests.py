@@ -0,0 +1,47 @@
+# Generated by Django 5.0.6 on 2026-10-19 00:34
+
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def skip_existing_notifications(apps, schema_editor):
+    # Digests start from now: the backlog of unread notifications is not mailed out
+    apps.get_model('accounts', 'Notification').objects.filter(
+        emailed_at__isnull=True, is_read=False
+    ).update(emailed_at=timezone.now())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0012_token_revocation'),
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('contenttypes', '0002_remove_content_type_name'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notification',
+            name='emailed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.RunPython(skip_existing_notifications, migrations.RunPython.noop),
+        migrations.AddField(
+            model_name='user',
+            name='digest_frequency',
+            field=models.CharField(choices=[('daily', 'Daily'), ('weekly', 'Weekly'), ('never', 'Never')], default='daily', max_length=10),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='last_digest_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(condition=models.Q(('emailed_at__isnull', True), ('is_read', False)), fields=['user'], name='notification_digest_pending'),
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['digest_frequency', 'last_digest_at'], name='accounts_us_digest__1810e5_idx'),
+        ),
+    ]
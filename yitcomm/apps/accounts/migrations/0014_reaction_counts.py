@@ -0,0 +1,40 @@
+# Generated by Django 5.0.6 on 2026-10-19 00:45
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+from apps.accounts.reaction_counts import rebuild
+
+
+def backfill_reaction_counts(apps, schema_editor):
+    ReactionCount = apps.get_model('accounts', 'ReactionCount')
+    for label in ('forums.Reaction', 'blogs.Reaction'):
+        rebuild(apps.get_model(label), ReactionCount)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0013_notification_digests'),
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('forums', '0005_forum_activity_feed'),
+        ('blogs', '0002_comment_paths'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReactionCount',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('object_id', models.PositiveIntegerField()),
+                ('reaction', models.CharField(max_length=10)),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('content_type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='contenttypes.contenttype')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='reactioncount',
+            constraint=models.UniqueConstraint(fields=('content_type', 'object_id', 'reaction'), name='unique_reaction_count'),
+        ),
+        migrations.RunPython(backfill_reaction_counts, migrations.RunPython.noop),
+    ]
@@ -1,6 +1,8 @@
 # core/models.py
 from django.db import models
 from django.contrib.auth.models import AbstractUser, Group, Permission
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.db.models.functions import Upper
 from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 from django.contrib.contenttypes.fields import GenericForeignKey
@@ -8,6 +10,12 @@ from django.contrib.contenttypes.models import ContentType
 
 class User(AbstractUser):
     """Extended User model with additional fields for Youth in Tech Tanzania platform."""
+    DIGEST_FREQUENCIES = (
+        ('daily', 'Daily'),
+        ('weekly', 'Weekly'),
+        ('never', 'Never'),
+    )
+
     bio = models.TextField(blank=True)
     profile_image = models.TextField(blank=True, null=True)
     github_url = models.URLField(blank=True)
@@ -26,6 +34,11 @@ class User(AbstractUser):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     last_activity = models.DateTimeField(default=timezone.now)
+    # Embedded in issued JWTs; bumping it invalidates every token issued before
+    token_generation = models.PositiveIntegerField(default=0)
+    # Pending notifications are emailed as one digest per period instead of one email per event
+    digest_frequency = models.CharField(max_length=10, choices=DIGEST_FREQUENCIES, default='daily')
+    last_digest_at = models.DateTimeField(null=True, blank=True)
     groups = models.ManyToManyField(
         Group,
         related_name="custom_user_groups",
@@ -47,6 +60,14 @@ class User(AbstractUser):
             models.Index(fields=['username']),
             models.Index(fields=['email']),
             models.Index(fields=['is_verified']),
+            models.Index(fields=['-created_at', '-id']),
+            models.Index(fields=['digest_frequency', 'last_digest_at']),
+            # Trigram indexes for case-insensitive member search (icontains)
+            GinIndex(OpClass(Upper('username'), name='gin_trgm_ops'), name='user_username_trgm'),
+            GinIndex(OpClass(Upper('first_name'), name='gin_trgm_ops'), name='user_first_name_trgm'),
+            GinIndex(OpClass(Upper('last_name'), name='gin_trgm_ops'), name='user_last_name_trgm'),
+            GinIndex(OpClass(Upper('email'), name='gin_trgm_ops'), name='user_email_trgm'),
+            GinIndex(OpClass(Upper('location'), name='gin_trgm_ops'), name='user_location_trgm'),
         ]
         ordering = ['-created_at']
 
@@ -58,6 +79,11 @@ class User(AbstractUser):
 class Skill(models.Model):
     """Technical skills that users can add to their profiles."""
     name = models.CharField(max_length=50, unique=True)
+
+    class Meta:
+        indexes = [
+            GinIndex(OpClass(Upper('name'), name='gin_trgm_ops'), name='skill_name_trgm'),
+        ]
     
     def __str__(self):
         return self.name
@@ -101,15 +127,26 @@ class Notification(models.Model):
     message = models.TextField()
     created_at = models.DateTimeField(auto_now_add=True)
     is_read = models.BooleanField(default=False)
+
+    # Coalescing: one row stands in for every actor within the merge window
+    actor_count = models.PositiveIntegerField(default=1)
+    recent_actors = models.JSONField(default=list, blank=True)
     
     # Generic foreign key to the content that triggered the notification
     content_type = models.ForeignKey('contenttypes.ContentType', on_delete=models.CASCADE, null=True, blank=True)
     object_id = models.PositiveIntegerField(null=True, blank=True)
 
+    # Set once the notification has gone out in an email digest
+    emailed_at = models.DateTimeField(null=True, blank=True)
+
     class Meta:
         verbose_name_plural = "NOtifications"
         indexes = [
-            models.Index(fields=['user']),
+            # Serves the "my latest / unread notifications" queries
+            models.Index(fields=['user', 'is_read', '-created_at']),
+            # Notifications still waiting for a digest
+            models.Index(fields=['user'], condition=models.Q(emailed_at__isnull=True, is_read=False),
+                         name='notification_digest_pending'),
             models.Index(fields=['notification_type']),
             models.Index(fields=['created_at']),
         ]
@@ -119,6 +156,45 @@ class Notification(models.Model):
         return f"{self.notification_type} for {self.user.username}: {self.title}"
 
 
+class NotificationArchive(models.Model):
+    """Notifications moved out of the hot table once they pass the retention period."""
+    original_id = models.BigIntegerField()
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='archived_notifications')
+    notification_type = models.CharField(max_length=20)
+    title = models.CharField(max_length=200)
+    message = models.TextField()
+    created_at = models.DateTimeField()
+    is_read = models.BooleanField(default=False)
+    actor_count = models.PositiveIntegerField(default=1)
+    recent_actors = models.JSONField(default=list, blank=True)
+    content_type = models.ForeignKey('contenttypes.ContentType', on_delete=models.CASCADE, null=True, blank=True)
+    object_id = models.PositiveIntegerField(null=True, blank=True)
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    ARCHIVED_FIELDS = (
+        'user_id', 'notification_type', 'title', 'message', 'created_at', 'is_read',
+        'actor_count', 'recent_actors', 'content_type_id', 'object_id',
+    )
+
+    class Meta:
+        verbose_name_plural = "Notification Archive"
+        indexes = [
+            models.Index(fields=['user', '-created_at']),
+            models.Index(fields=['archived_at']),
+        ]
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"Archived {self.notification_type} #{self.original_id}"
+
+    @classmethod
+    def from_notification(cls, notification):
+        return cls(
+            original_id=notification.id,
+            **{field: getattr(notification, field) for field in cls.ARCHIVED_FIELDS}
+        )
+
+
 class UserFollowing(models.Model):
     """Follow relationships between users."""
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='following')
@@ -208,4 +284,67 @@ class ContactUs(models.Model):
         ordering = ['-submitted_at']
 
     def __str__(self):
-        return f"{self.name} - {self.subject}"
\ No newline at end of file
+        return f"{self.name} - {self.subject}"
+
+
+class GlobalCounter(models.Model):
+    """Running totals for the admin dashboard, maintained by signals and reconciled periodically."""
+    name = models.CharField(max_length=50, unique=True)
+    value = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+    reconciled_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.name}: {self.value}"
+
+
+class ReactionCount(models.Model):
+    """
+    Number of reactions of one kind on one object (forum discussions and
+    comments, blogs, blog comments), maintained by apps.accounts.reaction_counts.
+    """
+    content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE, related_name='+')
+    object_id = models.PositiveIntegerField()
+    reaction = models.CharField(max_length=10)
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['content_type', 'object_id', 'reaction'], name='unique_reaction_count'),
+        ]
+
+    def __str__(self):
+        return f"{self.reaction} x{self.count} on {self.content_type_id}:{self.object_id}"
+
+
+class DailyActivityRollup(models.Model):
+    """Per-day activity totals, filled incrementally by `manage.py rollup_activity`."""
+    date = models.DateField(unique=True)
+    signups = models.PositiveIntegerField(default=0)
+    events_created = models.PositiveIntegerField(default=0)
+    blogs_published = models.PositiveIntegerField(default=0)
+    discussions = models.PositiveIntegerField(default=0)
+    registrations = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    METRICS = ('signups', 'events_created', 'blogs_published', 'discussions', 'registrations')
+
+    class Meta:
+        ordering = ['date']
+
+    def __str__(self):
+        return f"Activity on {self.date}"
+
+
+class RevokedToken(models.Model):
+    """JWT ids revoked before expiry (logout); loaded into memory by apps.accounts.revocation."""
+    jti = models.CharField(max_length=64, unique=True)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, null=True, blank=True, related_name='revoked_tokens')
+    expires_at = models.DateTimeField(db_index=True)
+    revoked_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        ordering = ['-revoked_at']
+
+    def __str__(self):
+        return f"Revoked token {self.jti}"
@@ -0,0 +1,101 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.utils import timezone
+
+from .models import Notification
+
+# Notifications about the same target for the same user are merged while unread
+# and last merged into within this window; each merge moves created_at to now
+COALESCE_WINDOW = getattr(settings, 'NOTIFICATION_COALESCE_WINDOW', timedelta(hours=6))
+MAX_RECENT_ACTORS = getattr(settings, 'NOTIFICATION_MAX_RECENT_ACTORS', 3)
+BATCH_SIZE = 1000
+
+
+def format_actors(recent_actors, actor_count):
+    """Render the actor part of a merged message, e.g. 'alice and 12 others'."""
+    names = [actor['username'] for actor in recent_actors]
+    if not names:
+        return 'Someone'
+    if actor_count <= 1:
+        return names[0]
+    if actor_count == 2 and len(names) >= 2:
+        return f"{names[0]} and {names[1]}"
+    others = actor_count - 1
+    return f"{names[0]} and {others} other{'s' if others > 1 else ''}"
+
+
+def _merge_actor(recent_actors, actor):
+    """Put the actor at the front of the list; return (actors, is_new_actor)."""
+    entry = {'id': actor.id, 'username': actor.username}
+    remaining = [a for a in recent_actors if a.get('id') != actor.id]
+    is_new = len(remaining) == len(recent_actors)
+    return [entry] + remaining[:MAX_RECENT_ACTORS - 1], is_new
+
+
+def notify_users(user_ids, notification_type, target, actor, title, action):
+    """
+    Notify many users about `actor` doing `action` on `target`.
+
+    Unread notifications of the same type about the same target touched inside
+    the coalescing window (and not yet emailed in a digest) are updated in place
+    instead of adding a new row, so a busy discussion produces one row per user
+    rather than one per reaction. A merge bumps created_at, which moves the row
+    back to the top of the user's list and keeps the window sliding.
+    """
+    user_ids = list(user_ids)
+    if not user_ids:
+        return
+
+    content_type = ContentType.objects.get_for_model(target)
+    now = timezone.now()
+    cutoff = now - COALESCE_WINDOW
+
+    for start in range(0, len(user_ids), BATCH_SIZE):
+        batch = user_ids[start:start + BATCH_SIZE]
+
+        existing = {}
+        pending = Notification.objects.filter(
+            user_id__in=batch,
+            notification_type=notification_type,
+            content_type=content_type,
+            object_id=target.pk,
+            is_read=False,
+            emailed_at__isnull=True,
+            created_at__gte=cutoff,
+        ).order_by('user_id', '-created_at')
+        for notification in pending:
+            existing.setdefault(notification.user_id, notification)
+
+        to_update = []
+        for notification in existing.values():
+            notification.recent_actors, is_new = _merge_actor(notification.recent_actors, actor)
+            if is_new:
+                notification.actor_count += 1
+            notification.title = title
+            notification.created_at = now
+            notification.message = f"{format_actors(notification.recent_actors, notification.actor_count)} {action}"
+            to_update.append(notification)
+
+        if to_update:
+            Notification.objects.bulk_update(
+                to_update, ['actor_count', 'recent_actors', 'title', 'message', 'created_at']
+            )
+
+        recent_actors = [{'id': actor.id, 'username': actor.username}]
+        to_create = [
+            Notification(
+                user_id=user_id,
+                notification_type=notification_type,
+                title=title,
+                message=f"{actor.username} {action}",
+                content_type=content_type,
+                object_id=target.pk,
+                recent_actors=recent_actors,
+            )
+            for user_id in batch
+            if user_id not in existing
+        ]
+        if to_create:
+            Notification.objects.bulk_create(to_create)
@@ -0,0 +1,113 @@
+from django.apps import apps
+from django.conf import settings
+from django.db import IntegrityError, connection, transaction
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save
+from django.utils import timezone
+
+from ..models import GlobalCounter
+
+# Counter name -> model whose rows it counts
+COUNTED_MODELS = {
+    'users': 'accounts.User',
+    'events': 'events.Event',
+    'forums': 'forums.Forum',
+    'blogs': 'blogs.Blog',
+    'projects': 'projects.Project',
+    'discussions': 'forums.Discussion',
+    'comments': 'forums.Comment',
+    'reactions': 'forums.Reaction',
+}
+
+APPROXIMATE_BY_DEFAULT = getattr(settings, 'DASHBOARD_APPROXIMATE_COUNTS', False)
+
+
+def _model(name):
+    return apps.get_model(COUNTED_MODELS[name])
+
+
+def _seed(name):
+    """Create a missing counter from an exact count and return its value."""
+    value = _model(name).objects.count()
+    try:
+        with transaction.atomic():
+            GlobalCounter.objects.create(name=name, value=value, reconciled_at=timezone.now())
+    except IntegrityError:
+        # Another process seeded it first
+        return GlobalCounter.objects.get(name=name).value
+    return value
+
+
+def increment(name, delta=1):
+    updated = GlobalCounter.objects.filter(name=name).update(value=F('value') + delta)
+    if not updated:
+        # The first write after deployment seeds the counter, which already includes this row
+        _seed(name)
+
+
+def _approximate_counts(names):
+    """Planner row estimates from pg_class; tables never analyzed are left out."""
+    if connection.vendor != 'postgresql':
+        return {}
+    tables = {_model(name)._meta.db_table: name for name in names}
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT relname, reltuples::bigint FROM pg_class "
+            "WHERE relkind = 'r' AND relname = ANY(%s)",
+            [list(tables)]
+        )
+        rows = cursor.fetchall()
+    return {tables[relname]: max(estimate, 0) for relname, estimate in rows if estimate >= 0}
+
+
+def read_counters(names, approximate=None):
+    """Return {name: total} for the given counters without scanning the counted tables."""
+    if approximate is None:
+        approximate = APPROXIMATE_BY_DEFAULT
+
+    totals = _approximate_counts(names) if approximate else {}
+    missing = [name for name in names if name not in totals]
+    if missing:
+        totals.update(
+            GlobalCounter.objects.filter(name__in=missing).values_list('name', 'value')
+        )
+    for name in names:
+        if name not in totals:
+            totals[name] = _seed(name)
+    return totals
+
+
+def reconcile(names=None):
+    """Recount every counter exactly and return {name: (old_value, new_value)} for drifted ones."""
+    drift = {}
+    for name in names or COUNTED_MODELS:
+        exact = _model(name).objects.count()
+        with transaction.atomic():
+            counter, created = GlobalCounter.objects.select_for_update().get_or_create(
+                name=name, defaults={'value': exact}
+            )
+            if not created and counter.value != exact:
+                drift[name] = (counter.value, exact)
+            counter.value = exact
+            counter.reconciled_at = timezone.now()
+            counter.save(update_fields=['value', 'reconciled_at', 'updated_at'])
+    return drift
+
+
+def _counter_handlers(name):
+    def on_save(sender, instance, created, raw=False, **kwargs):
+        if created and not raw:
+            increment(name)
+
+    def on_delete(sender, instance, **kwargs):
+        increment(name, -1)
+
+    return on_save, on_delete
+
+
+def connect_counter_signals():
+    for name in COUNTED_MODELS:
+        model = _model(name)
+        on_save, on_delete = _counter_handlers(name)
+        post_save.connect(on_save, sender=model, weak=False, dispatch_uid=f'global_counter_save_{name}')
+        post_delete.connect(on_delete, sender=model, weak=False, dispatch_uid=f'global_counter_delete_{name}')
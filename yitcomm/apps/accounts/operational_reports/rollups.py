@@ -0,0 +1,83 @@
+from datetime import timedelta
+
+from django.apps import apps
+from django.db.models import Count, Min
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from ..models import DailyActivityRollup
+
+# Rollup column -> (model, timestamp field, extra filters)
+ROLLUP_SOURCES = {
+    'signups': ('accounts.User', 'created_at', {}),
+    'events_created': ('events.Event', 'created_at', {}),
+    'blogs_published': ('blogs.Blog', 'published_at', {'is_published': True}),
+    'discussions': ('forums.Discussion', 'created_at', {}),
+    'registrations': ('events.EventRegistration', 'registration_date', {}),
+}
+
+
+def _daily_counts(metric, start, end):
+    """{date: count} for one metric over [start, end], in a single grouped query."""
+    model_label, field, filters = ROLLUP_SOURCES[metric]
+    rows = (
+        apps.get_model(model_label).objects
+        .filter(**{f'{field}__date__gte': start, f'{field}__date__lte': end}, **filters)
+        .annotate(day=TruncDate(field))
+        .values('day')
+        .annotate(total=Count('id'))
+        .order_by()
+    )
+    return {row['day']: row['total'] for row in rows}
+
+
+def rollup_days(start, end):
+    """(Re)compute the rollup rows for every day in [start, end]; returns the number of days written."""
+    if start > end:
+        return 0
+
+    counts = {metric: _daily_counts(metric, start, end) for metric in ROLLUP_SOURCES}
+    rows = []
+    day = start
+    while day <= end:
+        rows.append(DailyActivityRollup(
+            date=day,
+            **{metric: counts[metric].get(day, 0) for metric in ROLLUP_SOURCES}
+        ))
+        day += timedelta(days=1)
+
+    DailyActivityRollup.objects.bulk_create(
+        rows,
+        batch_size=500,
+        update_conflicts=True,
+        unique_fields=['date'],
+        update_fields=list(ROLLUP_SOURCES) + ['updated_at'],
+    )
+    return len(rows)
+
+
+def earliest_activity_date():
+    dates = []
+    for model_label, field, filters in ROLLUP_SOURCES.values():
+        first = apps.get_model(model_label).objects.filter(**filters).aggregate(first=Min(field))['first']
+        if first:
+            dates.append(timezone.localdate(first))
+    return min(dates) if dates else None
+
+
+def rollup_new_days(today=None):
+    """
+    Process only the days since the last run. The latest stored day is recomputed
+    because it may have been rolled up while still in progress.
+    """
+    today = today or timezone.localdate()
+    latest = DailyActivityRollup.objects.order_by('-date').values_list('date', flat=True).first()
+    start = latest or earliest_activity_date() or today
+    return rollup_days(start, today)
+
+
+def backfill(since=None, until=None):
+    start = since or earliest_activity_date()
+    if start is None:
+        return 0
+    return rollup_days(start, until or timezone.localdate())
@@ -1,33 +1,33 @@
-from django.db.models.functions.datetime import TruncMonth
-
-from ..models import User
-from ...blogs.models import Blog
-from ...events.models import Event, EventTicket
-from ...forums.models import Forum, Discussion, Comment, Reaction
-from ...projects.models import Project
-from datetime import datetime, timedelta
+from django.db.models.functions.datetime import TruncMonth, TruncWeek, TruncYear
+from django.utils import timezone
+
+from ..models import DailyActivityRollup
+from datetime import timedelta
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
-from django.db.models import Sum, Count
+from django.db.models import Sum
+
+from .counters import read_counters
 
 
+def wants_approximate(request):
+    """`?approximate=true` serves planner estimates instead of the exact counters."""
+    value = request.query_params.get('approximate')
+    if value is None:
+        return None
+    return value.lower() in ('1', 'true', 'yes')
+
 
 class DashboardStatsView(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
-        current_year = datetime.now().year
         try:
-            total_users = User.objects.all().count()
-
-            total_events = Event.objects.all().count()
-
-            total_forums = Forum.objects.all().count()
-
-            total_blogs = Blog.objects.all().count()
-
-            total_projects = Project.objects.all().count()
+            totals = read_counters(
+                ['users', 'events', 'forums', 'blogs', 'projects'],
+                approximate=wants_approximate(request)
+            )
 
             # Total Revenue
             # total_revenue = EventTicket.objects.filter( date_received__year=current_year).aggregate(
@@ -36,11 +36,11 @@ class DashboardStatsView(APIView):
 
 
             data = {
-                "total_users": total_users,
-                "total_events": total_events,
-                "total_blogs": total_blogs,
-                "total_projects": total_projects,
-                "forums":total_forums
+                "total_users": totals['users'],
+                "total_events": totals['events'],
+                "total_blogs": totals['blogs'],
+                "total_projects": totals['projects'],
+                "forums": totals['forums']
             }
             return Response(data, status=200)
 
@@ -50,35 +50,53 @@ class DashboardStatsView(APIView):
 
 
 class UserRegistrationStatsView(APIView):
+    """
+    Activity totals per period, summed from the pre-aggregated daily rollups.
+    `?period=Daily|Weekly|Monthly|Yearly` and `?metric=` (defaults to signups).
+    """
     permission_classes = [IsAuthenticated]
 
+    PERIODS = {
+        # period -> (trunc function, label format, how far back to look)
+        'Daily': (None, '%Y-%m-%d', lambda today: today - timedelta(days=29)),
+        'Weekly': (TruncWeek, 'Week of %d %b', lambda today: today - timedelta(weeks=11, days=today.weekday())),
+        'Monthly': (TruncMonth, '%B', lambda today: today.replace(month=1, day=1)),
+        'Yearly': (TruncYear, '%Y', lambda today: None),
+    }
+
     def get(self, request, *args, **kwargs):
         period = request.query_params.get("period", "Monthly")
+        metric = request.query_params.get("metric", "signups")
 
-        if period == "Monthly":
-            data = self.get_monthly_user_stats()
-        else:
-            data = []  # you can extend later for Weekly, Yearly, etc.
+        if period not in self.PERIODS or metric not in DailyActivityRollup.METRICS:
+            return Response([])
 
-        return Response(data)
+        return Response(self.get_period_stats(period, metric))
 
-    def get_monthly_user_stats(self):
-        current_year = datetime.now().year
+    def get_period_stats(self, period, metric):
+        trunc, label_format, since = self.PERIODS[period]
+        rollups = DailyActivityRollup.objects.all()
+        start = since(timezone.localdate())
+        if start:
+            rollups = rollups.filter(date__gte=start)
 
-        registrations = (
-            User.objects.filter(created_at__year=current_year)
-            .annotate(month=TruncMonth("created_at"))
-            .values("month")
-            .annotate(total=Count("id"))
-            .order_by("month")
-        )
+        if trunc is None:
+            buckets = rollups.values_list('date', metric).order_by('date')
+        else:
+            buckets = (
+                rollups.annotate(bucket=trunc('date'))
+                .values('bucket')
+                .annotate(total=Sum(metric))
+                .values_list('bucket', 'total')
+                .order_by('bucket')
+            )
 
         return [
             {
-                "name": reg["month"].strftime("%B"),  # "January", "February", etc.
-                "total": reg["total"] or 0,
+                "name": bucket.strftime(label_format),
+                "total": total or 0,
             }
-            for reg in registrations
+            for bucket, total in buckets
         ]
 
 
@@ -91,14 +109,15 @@ class ForumsRegistrationStatsView(APIView):
     """
 
     def get(self, request):
-        discussions_count = Discussion.objects.count()
-        comments_count = Comment.objects.count()
-        reactions_count = Reaction.objects.count()
+        totals = read_counters(
+            ['discussions', 'comments', 'reactions'],
+            approximate=wants_approximate(request)
+        )
 
         data = [
-            ["Discussions", discussions_count],
-            ["Comments", comments_count],
-            ["Reactions", reactions_count],
+            ["Discussions", totals['discussions']],
+            ["Comments", totals['comments']],
+            ["Reactions", totals['reactions']],
         ]
 
         return Response(data)
@@ -0,0 +1,176 @@
+from collections import defaultdict
+
+from django.apps import apps
+from django.contrib.contenttypes.models import ContentType
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F
+from django.db.models.functions import Greatest
+from django.db.models.signals import post_delete, post_init, post_save
+
+from .models import ReactionCount
+
+# Reaction model -> the field holding the reaction kind
+REACTION_MODELS = {
+    'forums.Reaction': 'reaction',
+    'blogs.Reaction': 'reaction_type',
+}
+
+
+def _field(reaction_model):
+    return REACTION_MODELS[reaction_model._meta.label]
+
+
+def adjust(content_type_id, object_id, reaction, delta):
+    filters = {'content_type_id': content_type_id, 'object_id': object_id, 'reaction': reaction}
+    if ReactionCount.objects.filter(**filters).update(count=Greatest(F('count') + delta, 0)) or delta <= 0:
+        return
+    try:
+        with transaction.atomic():
+            ReactionCount.objects.create(count=delta, **filters)
+    except IntegrityError:
+        # Another request created the row first
+        ReactionCount.objects.filter(**filters).update(count=F('count') + delta)
+
+
+class ReactionIndex:
+    """
+    Reaction totals and the user's own reactions for a set of objects, loaded
+    two queries per content type. Serializers share one index through their
+    context and extend() it as nested rows (e.g. comment replies) come in.
+    """
+
+    def __init__(self, user, reaction_model):
+        self.user = user if user and user.is_authenticated else None
+        self.reaction_model = reaction_model
+        self.field = _field(reaction_model)
+        self.loaded = set()
+        self.counts = defaultdict(dict)
+        self.mine = {}
+
+    @staticmethod
+    def _key(obj):
+        return ContentType.objects.get_for_model(obj).id, obj.pk
+
+    def extend(self, objects):
+        pending = defaultdict(set)
+        for obj in objects:
+            key = self._key(obj)
+            if key not in self.loaded:
+                pending[key[0]].add(key[1])
+                self.loaded.add(key)
+
+        for content_type_id, ids in pending.items():
+            for object_id, reaction, count in ReactionCount.objects.filter(
+                content_type_id=content_type_id, object_id__in=ids, count__gt=0
+            ).values_list('object_id', 'reaction', 'count'):
+                self.counts[(content_type_id, object_id)][reaction] = count
+
+            if self.user is not None:
+                for object_id, reaction in self.reaction_model.objects.filter(
+                    content_type_id=content_type_id, object_id__in=ids, user=self.user
+                ).values_list('object_id', self.field):
+                    self.mine[(content_type_id, object_id)] = reaction
+        return self
+
+    def summary(self, obj, choices=None):
+        """{reaction: count}; with `choices`, every kind is listed, zeros included."""
+        counts = dict(self.counts.get(self._key(obj), {}))
+        for value, _ in choices or ():
+            counts.setdefault(value, 0)
+        return counts
+
+    def total(self, obj):
+        return sum(self.counts.get(self._key(obj), {}).values())
+
+    def user_reaction(self, obj):
+        return self.mine.get(self._key(obj))
+
+
+def reaction_index(context, objects, reaction_model):
+    """The serializer context's ReactionIndex for this reaction model, extended to cover `objects`."""
+    key = f'reaction_index:{reaction_model._meta.label}'
+    index = context.get(key)
+    if index is None:
+        request = context.get('request')
+        index = context[key] = ReactionIndex(request.user if request else None, reaction_model)
+    return index.extend(objects)
+
+
+class ReactionSummaryMixin:
+    """
+    get_reaction_summary / get_reactions_count / get_user_reaction for serializers,
+    read from the context's ReactionIndex. List serializers prime it for the whole
+    page in prime_page; a single object loads its own.
+    """
+    reaction_model = None
+    # Set to the model's choices to list every reaction kind, zeros included
+    reaction_choices = None
+
+    def reactions_for(self, objects):
+        return reaction_index(self.context, objects, self.reaction_model)
+
+    def get_reaction_summary(self, obj):
+        return self.reactions_for([obj]).summary(obj, self.reaction_choices)
+
+    def get_reactions_count(self, obj):
+        return self.reactions_for([obj]).total(obj)
+
+    def get_user_reaction(self, obj):
+        return self.reactions_for([obj]).user_reaction(obj)
+
+
+def rebuild(reaction_model, count_model=ReactionCount):
+    """Recount the totals for one reaction model from scratch (backfill, or repairing drift)."""
+    field = REACTION_MODELS[reaction_model._meta.label]
+    content_type_ids = reaction_model.objects.values_list('content_type_id', flat=True).distinct()
+    with transaction.atomic():
+        count_model.objects.filter(content_type_id__in=list(content_type_ids)).delete()
+        rows = (
+            reaction_model.objects.order_by()
+            .values_list('content_type_id', 'object_id', field)
+            .annotate(total=Count('id'))
+        )
+        count_model.objects.bulk_create(
+            [
+                count_model(content_type_id=ct, object_id=object_id, reaction=reaction, count=total)
+                for ct, object_id, reaction, total in rows.iterator()
+            ],
+            batch_size=1000,
+        )
+
+
+def _counted(instance, field):
+    return instance.content_type_id, instance.object_id, getattr(instance, field)
+
+
+def _handlers(field):
+    def remember(sender, instance, **kwargs):
+        # What the row counted for when loaded, so a changed reaction moves its count
+        instance._counted_reaction = _counted(instance, field) if instance.pk else None
+
+    def on_save(sender, instance, created, raw=False, **kwargs):
+        if raw:
+            return
+        current = _counted(instance, field)
+        previous = None if created else getattr(instance, '_counted_reaction', None)
+        if current == previous:
+            return
+        if previous is not None:
+            adjust(*previous, -1)
+        adjust(*current, 1)
+        instance._counted_reaction = current
+
+    def on_delete(sender, instance, **kwargs):
+        adjust(*(getattr(instance, '_counted_reaction', None) or _counted(instance, field)), -1)
+
+    return remember, on_save, on_delete
+
+
+def connect_reaction_count_signals():
+    for label, field in REACTION_MODELS.items():
+        model = apps.get_model(label)
+        remember, on_save, on_delete = _handlers(field)
+        uid = f'reaction_count_{label}'
+        post_init.connect(remember, sender=model, weak=False, dispatch_uid=f'{uid}_init')
+        post_save.connect(on_save, sender=model, weak=False, dispatch_uid=f'{uid}_save')
+        post_delete.connect(on_delete, sender=model, weak=False, dispatch_uid=f'{uid}_delete')
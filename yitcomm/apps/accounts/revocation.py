@@ -0,0 +1,140 @@
+import hashlib
+import math
+import threading
+import time
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.utils import timezone
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from .models import RevokedToken
+
+# How often (seconds) a process pulls tokens revoked by other processes
+SYNC_INTERVAL = getattr(settings, 'TOKEN_REVOCATION_SYNC_INTERVAL', 30)
+# How far back (seconds) before the newest revoked_at seen each sync looks again: revoked_at is
+# stamped before commit, so a slow transaction can land behind the watermark
+SYNC_OVERLAP = getattr(settings, 'TOKEN_REVOCATION_SYNC_OVERLAP', SYNC_INTERVAL + 30)
+# How often (seconds) the in-memory set is rebuilt from scratch, dropping expired tokens
+REBUILD_INTERVAL = getattr(settings, 'TOKEN_REVOCATION_REBUILD_INTERVAL', 60 * 60)
+BLOOM_FALSE_POSITIVE_RATE = 0.01
+GENERATION_CLAIM = 'gen'
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter; answers "definitely not present" without touching the exact set."""
+
+    def __init__(self, capacity, false_positive_rate=BLOOM_FALSE_POSITIVE_RATE):
+        capacity = max(capacity, 1024)
+        self.size = math.ceil(-capacity * math.log(false_positive_rate) / math.log(2) ** 2)
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.capacity = capacity
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, key):
+        # Double hashing: two 64-bit halves of one digest give all k positions
+        digest = hashlib.blake2b(key, digest_size=16).digest()
+        first = int.from_bytes(digest[:8], 'little')
+        second = int.from_bytes(digest[8:], 'little') | 1
+        return ((first + i * second) % self.size for i in range(self.hash_count))
+
+    def add(self, key):
+        for position in self._positions(key):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, key):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+
+def _jti_key(jti):
+    """simplejwt jtis are uuid4 hex strings; store them as 16 raw bytes instead of 32-char str objects."""
+    try:
+        return bytes.fromhex(jti)
+    except (TypeError, ValueError):
+        return str(jti).encode()
+
+
+class RevocationList:
+    """
+    Process-local copy of the RevokedToken table.
+
+    Lookups are pure memory: the Bloom filter rejects almost every live token
+    and the exact set confirms the rest. Every SYNC_INTERVAL seconds the first
+    request to check a token pulls rows revoked since the last sync, so a
+    logout in one worker reaches the others within that interval; the worker
+    that handled the logout sees it immediately.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._jtis = set()
+        self._bloom = BloomFilter(0)
+        self._watermark = None
+        self._synced_at = 0
+        self._rebuilt_at = 0
+
+    def _add(self, key):
+        if len(self._jtis) >= self._bloom.capacity:
+            # Grow before the false-positive rate degrades
+            self._bloom = BloomFilter(len(self._jtis) * 2)
+            for existing in self._jtis:
+                self._bloom.add(existing)
+        self._jtis.add(key)
+        self._bloom.add(key)
+
+    def sync(self, force=False):
+        now = time.monotonic()
+        if not force and now - self._synced_at < SYNC_INTERVAL:
+            return
+        with self._lock:
+            if not force and now - self._synced_at < SYNC_INTERVAL:
+                return
+            rebuild = force or now - self._rebuilt_at >= REBUILD_INTERVAL
+            rows = RevokedToken.objects.filter(expires_at__gt=timezone.now())
+            if not rebuild and self._watermark is not None:
+                # Rows already loaded come back too; adding them again is a no-op
+                rows = rows.filter(revoked_at__gte=self._watermark - timedelta(seconds=SYNC_OVERLAP))
+            rows = list(rows.values_list('jti', 'revoked_at'))
+
+            if rebuild:
+                self._jtis = set()
+                self._bloom = BloomFilter(len(rows) * 2)
+                self._rebuilt_at = now
+            for jti, revoked_at in rows:
+                self._add(_jti_key(jti))
+                if self._watermark is None or revoked_at > self._watermark:
+                    self._watermark = revoked_at
+            self._synced_at = now
+
+    def is_revoked(self, jti):
+        self.sync()
+        key = _jti_key(jti)
+        if key not in self._bloom:
+            return False
+        return key in self._jtis
+
+    def revoke(self, token, user=None):
+        """Persist a validated token's jti and apply it to this process straight away."""
+        jti = token[settings.SIMPLE_JWT.get('JTI_CLAIM', 'jti')]
+        expires_at = datetime.fromtimestamp(token['exp'], tz=dt_timezone.utc)
+        RevokedToken.objects.get_or_create(jti=jti, defaults={'user': user, 'expires_at': expires_at})
+        with self._lock:
+            self._add(_jti_key(jti))
+
+    def __len__(self):
+        return len(self._jtis)
+
+
+revocation_list = RevocationList()
+
+
+def tokens_for_user(user):
+    """Issue a refresh/access pair stamped with the user's current token generation."""
+    refresh = RefreshToken.for_user(user)
+    refresh[GENERATION_CLAIM] = user.token_generation
+    return refresh
+
+
+def is_token_current(validated_token, user):
+    """False if the token predates the user's last password change or deactivation."""
+    return validated_token.get(GENERATION_CLAIM, 0) == user.token_generation
@@ -1,10 +1,29 @@
 from rest_framework import serializers
 from django.contrib.auth.models import Group, Permission
+from django.db import models
 from .models import User, Skill, TechCategory, CommunityRole, Notification, Bookmark
+from .category_tree import get_category_tree
 from django.contrib.contenttypes.fields import GenericForeignKey
 from django.contrib.contenttypes.models import ContentType
 
-from ..newsletters.signals import send_email_via_smtp
+from ..newsletters.mailer import queue_email
+from ..newsletters.rendering import render_email
+
+
+class PrefetchListSerializer(serializers.ListSerializer):
+    """
+    List serializer that hands the whole page to `child.prime_page(instances)`
+    before rendering rows, so per-row lookups can be loaded in bulk and stored
+    in the shared serializer context.
+    """
+
+    def to_representation(self, data):
+        iterable = data.all() if isinstance(data, models.manager.BaseManager) else data
+        instances = list(iterable)
+        prime_page = getattr(self.child, 'prime_page', None)
+        if prime_page is not None and instances:
+            prime_page(instances)
+        return super().to_representation(instances)
 
 
 class PermissionSerializer(serializers.ModelSerializer):
@@ -41,12 +60,25 @@ class SkillSerializer(serializers.ModelSerializer):
 
 
 class TechCategorySerializer(serializers.ModelSerializer):
-    parent_name = serializers.StringRelatedField(source='parent', read_only=True)
+    parent_name = serializers.SerializerMethodField()
     
     class Meta:
         model = TechCategory
         fields = ('id', 'name', 'description', 'parent', 'parent_name')
 
+    def to_representation(self, instance):
+        # Categories are embedded everywhere; serve them from the in-memory tree
+        data = get_category_tree().serialize(instance.pk)
+        if data is not None:
+            return data
+        return super().to_representation(instance)
+
+    def get_parent_name(self, obj):
+        if not obj.parent_id:
+            return None
+        parent = get_category_tree().get(obj.parent_id)
+        return parent.name if parent else str(obj.parent)
+
 
 class UserSerializer(serializers.ModelSerializer):
     skills = SkillSerializer(many=True, read_only=True)
@@ -91,6 +123,16 @@ class UserSerializer(serializers.ModelSerializer):
         return user
 
 
+class UserListSerializer(serializers.ModelSerializer):
+    """Lightweight row for member listings and search; groups come from one prefetch."""
+    groups = serializers.SlugRelatedField(many=True, slug_field='name', read_only=True)
+
+    class Meta:
+        model = User
+        fields = ('id', 'username', 'first_name', 'last_name', 'profile_image',
+                  'location', 'is_verified', 'is_active', 'groups', 'created_at')
+
+
 class UserProfileSerializer(serializers.ModelSerializer):
     groups = GroupSerializer(many=True, read_only=True)
     """Simplified user serializer for profile information."""
@@ -118,22 +160,23 @@ class BookmarkSerializer(serializers.ModelSerializer):
         read_only_fields = ['user', 'created_at', 'content_object', 'is_bookmarked']
 
     def get_content_object(self, obj):
-        # Serialize the bookmarked object based on its type
-        from apps.blogs.serializers import BlogSerializer
-        from apps.forums.serializers import ForumSerializer
-        
-        model = obj.content_type.model
-        if model == 'blog':
-            return BlogSerializer(obj.content_object).data
-        elif model == 'forum':
-            return ForumSerializer(obj.content_object).data
-        # Add other model serializers as needed
-        return None
+        # Serialize the bookmarked object with the slim summary for its type;
+        # content_object is prefetched in bulk by bookmark_util.with_content_objects
+        from .bookmark_util import bookmark_targets
+
+        target = bookmark_targets().get(obj.content_type.model)
+        content_object = obj.content_object
+        if target is None or content_object is None:
+            return None
+        _, serializer_class = target
+        return serializer_class(content_object, context=self.context).data
 
     def get_is_bookmarked(self, obj):
         # Useful when checking if an item is bookmarked
         request = self.context.get('request')
         if request and request.user.is_authenticated:
+            if obj.user_id == request.user.id:
+                return True
             return Bookmark.objects.filter(
                 user=request.user,
                 content_type=obj.content_type,
@@ -171,7 +214,7 @@ class UserProfileUpdateSerializer(serializers.ModelSerializer):
             'username', 'email', 'first_name', 'last_name', 'bio',
             'profile_image', 'github_url', 'linkedin_url', 'twitter_url',
             'website', 'phone_number', 'date_of_birth', 'location',
-            'skills', 'interests'
+            'skills', 'interests', 'digest_frequency'
         ]
         extra_kwargs = {
             'username': {'required': False},
@@ -244,52 +287,9 @@ class ContactUsSerializer(serializers.ModelSerializer):
         Send confirmation email to the person who submitted the contact form
         """
         subject = f"Thank you for contacting us: {contact.subject}"
+        html_content, text_content = render_email('contact_confirmation', {'contact': contact})
 
-        html_content = f"""
-        <html>
-          <head></head>
-          <body style="font-family: Arial, sans-serif; line-height: 1.6;">
-            <div style="max-width: 600px; margin: 0 auto; padding: 20px; border: 1px solid #ddd; border-radius: 5px;">
-              <h2 style="color: #4a6baf;">Thank You for Contacting Us!</h2>
-              <p>Dear {contact.name},</p>
-              <p>We have received your message and will get back to you as soon as possible.</p>
-
-              <div style="background: #f9f9f9; padding: 15px; border-radius: 5px; margin: 20px 0;">
-                <p><strong>Your Message Details:</strong></p>
-                <p><strong>Subject:</strong> {contact.subject}</p>
-                <p><strong>Message:</strong> {contact.message}</p>
-              </div>
-
-              <p>We typically respond within 24-48 hours.</p>
-
-              <p style="margin-top: 30px; font-size: 0.9em; color: #666;">
-                This is an automated response. Please do not reply to this email.
-              </p>
-            </div>
-          </body>
-        </html>
-        """
-
-        text_content = f"""
-        Thank You for Contacting Us!
-
-        Dear {contact.name},
-
-        We have received your message and will get back to you as soon as possible.
-
-        Your Message Details:
-        Subject: {contact.subject}
-        Message: {contact.message}
-
-        We typically respond within 24-48 hours.
-
-        This is an automated response. Please do not reply to this email.
-        """
-
-
-
-        print(f"====================SENDING CONTACT US CONFIRMATION TO: {contact.email}")
-        send_email_via_smtp(
+        queue_email(
             recipient=contact.email,
             subject=subject,
             html_content=html_content,
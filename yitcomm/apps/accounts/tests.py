@@ -1,3 +1,358 @@
-from django.test import TestCase
+import time
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import AnonymousUser
+from django.db import DatabaseError
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from apps.forums.models import Discussion, DiscussionReadMarker, Forum
+from . import digests
+from .middleware import get_client_ip
+from .models import Notification, RevokedToken, TechCategory, User
+from .notifications import COALESCE_WINDOW, notify_users
+from .revocation import RevocationList
+from .throttling import CacheBucketStore, LocalMemoryBucketStore, LoginThrottle, TokenBucket
+from .write_buffer import CacheBufferStore, CounterBuffer, LocalMemoryBufferStore, WatermarkBuffer, buffers
+
+
+def make_forum(user, title='Forum'):
+    category, _ = TechCategory.objects.get_or_create(name='Testing')
+    return Forum.objects.create(title=title, description='About testing', category=category, created_by=user)
+
+
+class CounterBufferTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(username='reader', email='reader@example.com')
+        self.forum = make_forum(self.user)
+        self.buffer = CounterBuffer('views', {'DEDUP_SECONDS': 0}, store=LocalMemoryBufferStore())
+        self.addCleanup(buffers.remove, self.buffer)
+
+    def request(self, user=None, ip='10.0.0.1'):
+        request = RequestFactory().get('/', REMOTE_ADDR=ip)
+        request.user = user or AnonymousUser()
+        return request
+
+    def test_flush_writes_accumulated_deltas(self):
+        other = make_forum(self.user, 'Other')
+        for _ in range(3):
+            self.buffer.record(self.forum)
+        self.buffer.record(other)
+
+        self.assertEqual(self.buffer.flush(), 2)
+        self.forum.refresh_from_db()
+        other.refresh_from_db()
+        self.assertEqual((self.forum.views, other.views), (3, 1))
+        # Drained: a second flush writes nothing
+        self.assertEqual(self.buffer.flush(), 0)
+
+    def test_failed_flush_restores_deltas(self):
+        self.buffer.record(self.forum)
+        self.buffer.record(self.forum)
+        with mock.patch.object(self.buffer, '_write', side_effect=DatabaseError):
+            with self.assertRaises(DatabaseError):
+                self.buffer.flush()
+        self.forum.refresh_from_db()
+        self.assertEqual(self.forum.views, 0)
+
+        self.buffer.flush()
+        self.forum.refresh_from_db()
+        self.assertEqual(self.forum.views, 2)
+
+    def test_viewer_counts_once_per_window(self):
+        buffer = CounterBuffer('views', {'DEDUP_SECONDS': 60}, store=LocalMemoryBufferStore())
+        self.addCleanup(buffers.remove, buffer)
+
+        self.assertTrue(buffer.record(self.forum, self.request(self.user)))
+        self.assertFalse(buffer.record(self.forum, self.request(self.user)))
+        self.assertTrue(buffer.record(self.forum, self.request(ip='10.0.0.2')))
+        self.assertFalse(buffer.record(self.forum, self.request(ip='10.0.0.2')))
+
+        buffer.flush()
+        self.forum.refresh_from_db()
+        self.assertEqual(self.forum.views, 2)
+
+
+class CacheBufferStoreTests(SimpleTestCase):
+    def setUp(self):
+        self.store = CacheBufferStore('default', prefix='test_buffer')
+        self.addCleanup(self.store.cache.clear)
+
+    def test_slot_taken_but_not_yet_written_is_not_skipped(self):
+        # A writer has claimed slot 1 but not stored its key yet; a second one completes
+        self.store._incr('test_buffer:delta:a', 1)
+        self.store.cache.add('test_buffer:dirty:a', 1)
+        self.store._incr('test_buffer:index:size')
+        self.store.add('b', 2)
+        self.assertEqual(self.store.drain(), {})
+
+        self.store.cache.set('test_buffer:index:1', 'a')
+        self.assertEqual(self.store.drain(), {'a': 1, 'b': 2})
+        self.assertEqual(self.store.drain(), {})
+
+    def test_slot_left_empty_is_skipped_after_the_gap_timeout(self):
+        self.store._incr('test_buffer:index:size')
+        self.store.add('b', 2)
+        self.assertEqual(self.store.drain(), {})
+        with mock.patch('time.time', return_value=time.time() + CacheBufferStore.GAP_TIMEOUT):
+            self.assertEqual(self.store.drain(), {'b': 2})
+
+
+class WatermarkBufferTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(username='reader', email='reader@example.com')
+        self.discussion = Discussion.objects.create(
+            forum=make_forum(self.user), title='Thread', content='Body', author=self.user
+        )
+        self.buffer = WatermarkBuffer(
+            'test_read_markers', 'forums.DiscussionReadMarker', ('user', 'discussion'), 'read_at',
+            store=LocalMemoryBufferStore(),
+        )
+        self.addCleanup(buffers.remove, self.buffer)
+
+    def test_keeps_newest_mark_and_upserts(self):
+        now = timezone.now()
+        self.buffer.mark((self.user.pk, self.discussion.pk), now)
+        self.buffer.mark((self.user.pk, self.discussion.pk), now - timedelta(minutes=5))
+        self.assertEqual(self.buffer.flush(), 1)
+
+        later = now + timedelta(minutes=1)
+        self.buffer.mark((self.user.pk, self.discussion.pk), later)
+        self.buffer.flush()
+        marker = DiscussionReadMarker.objects.get()
+        self.assertEqual(marker.read_at, later)
+
+    def test_earlier_mark_never_moves_the_watermark_back(self):
+        later = timezone.now()
+        self.buffer.mark((self.user.pk, self.discussion.pk), later)
+        self.buffer.flush()
+        # e.g. the user reopens page 1 of a thread they had read to the end
+        self.buffer.mark((self.user.pk, self.discussion.pk), later - timedelta(hours=1))
+        self.buffer.flush()
+        self.assertEqual(DiscussionReadMarker.objects.get().read_at, later)
+
+    def test_drops_marks_for_missing_rows(self):
+        now = timezone.now()
+        self.buffer.mark((self.user.pk, self.discussion.pk), now)
+        self.buffer.mark((self.user.pk, self.discussion.pk + 1000), now)
+        self.assertEqual(self.buffer.flush(), 1)
+        self.assertEqual(self.buffer.store.drain_values(), {})
+
+    def test_failed_flush_restores_marks(self):
+        now = timezone.now()
+        self.buffer.mark((self.user.pk, self.discussion.pk), now)
+        with mock.patch.object(DiscussionReadMarker.objects, 'bulk_create', side_effect=DatabaseError):
+            with self.assertRaises(DatabaseError):
+                self.buffer.flush()
+        self.assertEqual(self.buffer.flush(), 1)
+        self.assertTrue(DiscussionReadMarker.objects.filter(user=self.user, discussion=self.discussion).exists())
+
+
+class NotificationCoalescingTests(TestCase):
+    def setUp(self):
+        self.recipient = User.objects.create(username='recipient', email='recipient@example.com')
+        self.alice = User.objects.create(username='alice', email='alice@example.com')
+        self.bob = User.objects.create(username='bob', email='bob@example.com')
+
+    def test_merges_and_slides_the_window(self):
+        notify_users([self.recipient.pk], 'forum', self.alice, self.alice, 'Forum', 'posted')
+        almost_expired = timezone.now() - COALESCE_WINDOW + timedelta(minutes=1)
+        Notification.objects.update(created_at=almost_expired)
+
+        notify_users([self.recipient.pk], 'forum', self.alice, self.bob, 'Forum', 'posted')
+        notification = Notification.objects.get()
+        self.assertEqual((notification.actor_count, notification.message), (2, 'bob and alice posted'))
+        self.assertGreater(notification.created_at, almost_expired)
+
+    def test_expired_notification_is_not_merged(self):
+        notify_users([self.recipient.pk], 'forum', self.alice, self.alice, 'Forum', 'posted')
+        Notification.objects.update(created_at=timezone.now() - COALESCE_WINDOW - timedelta(minutes=1))
+        notify_users([self.recipient.pk], 'forum', self.alice, self.bob, 'Forum', 'posted')
+        self.assertEqual(Notification.objects.count(), 2)
+
+
+class DigestTests(TestCase):
+    def setUp(self):
+        self.alice = User.objects.create(username='alice', email='alice@example.com', digest_frequency='daily')
+        self.bob = User.objects.create(username='bob', email='bob@example.com', digest_frequency='daily')
+        self.forum = make_forum(self.alice)
+
+    def notify(self, user, actor):
+        notify_users([user.pk], 'forum', self.forum, actor, 'Forum', 'posted')
+        return Notification.objects.filter(user=user).latest('id')
+
+    def test_only_notifications_read_into_the_digest_are_stamped(self):
+        self.notify(self.alice, self.bob)
+        self.notify(self.bob, self.alice)
+        Notification.objects.filter(user=self.bob).update(id=100)
+
+        def queue_emails(emails):
+            # Committed between reading the batch and stamping it: a row whose id was allocated
+            # before bob's, and a merge into bob's row
+            Notification.objects.create(id=50, user=self.alice, notification_type='forum', title='New', message='Late')
+            self.notify(self.bob, self.alice)
+            return real_queue_emails(emails)
+
+        real_queue_emails = digests.queue_emails
+        with mock.patch.object(digests, 'queue_emails', side_effect=queue_emails):
+            self.assertEqual(digests.queue_digests('daily'), (2, 2))
+
+        self.assertEqual(set(digests.pending_notifications().values_list('id', flat=True)), {50, 100})
+
+
+@override_settings(PASSWORD_HASHERS=[
+    'django.contrib.auth.hashers.PBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.MD5PasswordHasher',
+])
+class TokenGenerationTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(
+            username='member', email='member@example.com', password=make_password('secret-1', hasher='md5')
+        )
+        self.client = APIClient()
+
+    def login(self, password='secret-1'):
+        response = self.client.post(reverse('login'), {'username': 'member', 'password': password})
+        self.assertEqual(response.status_code, 200)
+        return response.data['access']
+
+    def get_bookmarks(self, access):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {access}')
+        return self.client.get(reverse('bookmark-list'))
+
+    def test_hash_upgrade_on_login_keeps_the_tokens_valid(self):
+        access = self.login()
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.password.startswith('pbkdf2_sha256$'))
+        self.assertEqual(self.get_bookmarks(access).status_code, 200)
+
+    def test_password_change_revokes_older_tokens(self):
+        old_access = self.login()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {old_access}')
+        response = self.client.post(
+            reverse('user-change-password'),
+            {'current_password': 'secret-1', 'new_password': 'Secret-2-longer', 'confirm_password': 'Secret-2-longer'},
+        )
+        self.assertEqual(response.status_code, 200, response.data)
+
+        self.assertEqual(self.get_bookmarks(old_access).status_code, 401)
+        self.assertEqual(self.get_bookmarks(response.data['access']).status_code, 200)
+
+
+class RevocationListTests(TestCase):
+    def revoke(self, jti, revoked_at):
+        RevokedToken.objects.create(jti=jti, expires_at=timezone.now() + timedelta(hours=1))
+        RevokedToken.objects.filter(jti=jti).update(revoked_at=revoked_at)
+
+    def test_sync_picks_up_rows_committed_behind_the_watermark(self):
+        revocations = RevocationList()
+        now = timezone.now()
+        self.revoke('aa' * 16, now)
+        revocations.sync(force=True)
+
+        # Stamped before the row above but committed after the sync
+        self.revoke('bb' * 16, now - timedelta(seconds=5))
+        revocations._synced_at = 0
+        revocations.sync()
+        self.assertTrue(revocations.is_revoked('bb' * 16))
+        self.assertEqual(len(revocations), 2)
+
+
+class TokenBucketTests(SimpleTestCase):
+    def test_allows_burst_then_refills(self):
+        bucket = TokenBucket(capacity=2, rate=1)
+        allowed, _, state = bucket.consume(None, now=100)
+        self.assertTrue(allowed)
+        allowed, _, state = bucket.consume(state, now=100)
+        self.assertTrue(allowed)
+        allowed, retry_after, state = bucket.consume(state, now=100)
+        self.assertFalse(allowed)
+        self.assertAlmostEqual(retry_after, 1)
+
+        allowed, _, state = bucket.consume(state, now=101)
+        self.assertTrue(allowed)
+
+    def test_refill_is_capped_at_capacity(self):
+        bucket = TokenBucket(capacity=2, rate=1)
+        _, _, state = bucket.consume(None, now=0)
+        _, _, state = bucket.consume(state, now=1000)
+        self.assertEqual(state, (1, 1000))
+
+
+class LoginThrottleTests(SimpleTestCase):
+    def throttle(self, **config):
+        return LoginThrottle({'FAILURE_THRESHOLD': 3, **config}, store=LocalMemoryBucketStore())
+
+    def test_failures_lock_out_only_the_attacking_ip(self):
+        throttle = self.throttle()
+        for _ in range(3):
+            self.assertIsNone(throttle.check('10.0.0.1', 'victim'))
+            throttle.record_failure('10.0.0.1', 'victim')
+
+        self.assertIsNotNone(throttle.check('10.0.0.1', 'Victim'))
+        self.assertIsNone(throttle.check('10.0.0.2', 'victim'))
+        self.assertEqual(throttle.rejections['lockout'], 1)
+
+    def test_success_clears_failures(self):
+        throttle = self.throttle()
+        for _ in range(3):
+            throttle.record_failure('10.0.0.1', 'victim')
+        throttle.record_success('10.0.0.1', 'victim')
+        self.assertIsNone(throttle.check('10.0.0.1', 'victim'))
+
+    def test_username_bucket_is_per_ip(self):
+        throttle = self.throttle(USERNAME_CAPACITY=2, USERNAME_REFILL_PER_MINUTE=0.001)
+        self.assertIsNone(throttle.check('10.0.0.1', 'victim'))
+        self.assertIsNone(throttle.check('10.0.0.1', 'victim'))
+        self.assertIsNotNone(throttle.check('10.0.0.1', 'victim'))
+        self.assertIsNone(throttle.check('10.0.0.2', 'victim'))
+        self.assertEqual(throttle.rejections['username'], 1)
+
+    def test_ip_bucket(self):
+        throttle = self.throttle(IP_CAPACITY=2, IP_REFILL_PER_MINUTE=0.001)
+        self.assertIsNone(throttle.check('10.0.0.1', 'a'))
+        self.assertIsNone(throttle.check('10.0.0.1', 'b'))
+        self.assertIsNotNone(throttle.check('10.0.0.1', 'c'))
+        self.assertEqual(throttle.rejections['ip'], 1)
+
+    def test_cache_store_shares_buckets_and_rejection_counts(self):
+        store = CacheBucketStore('default')
+        self.addCleanup(store.cache.clear)
+        config = {'IP_CAPACITY': 1, 'IP_REFILL_PER_MINUTE': 0.001}
+        first, second = LoginThrottle(config, store=store), LoginThrottle(config, store=store)
+        self.assertIsNone(first.check('10.0.0.1', 'a'))
+        self.assertIsNotNone(second.check('10.0.0.1', 'b'))
+        self.assertIsNotNone(first.check('10.0.0.1', 'c'))
+        self.assertEqual(second.rejections['ip'], 2)
+
+    def test_cache_store_throttles_while_the_bucket_is_locked(self):
+        store = CacheBucketStore('default')
+        store.LOCK_ATTEMPTS = 1
+        self.addCleanup(store.cache.clear)
+        store.cache.add('login:ip:10.0.0.1:lock', 1)
+        self.assertIsNotNone(LoginThrottle(store=store).check('10.0.0.1', 'a'))
+
+    def test_store_evicts_least_recently_used(self):
+        store = LocalMemoryBucketStore()
+        store.MAX_ENTRIES = 2
+        store.set('a', 1, 60, now=0)
+        store.set('b', 2, 60, now=0)
+        store.get('a', now=1)
+        store.set('c', 3, 60, now=2)
+        self.assertEqual((store.get('a', now=3), store.get('b', now=3), store.get('c', now=3)), (1, None, 3))
+
+
+class ClientIpTests(SimpleTestCase):
+    def request(self, forwarded):
+        return RequestFactory().get('/', REMOTE_ADDR='10.0.0.9', HTTP_X_FORWARDED_FOR=forwarded)
+
+    def test_ignores_forwarded_for_without_trusted_proxies(self):
+        self.assertEqual(get_client_ip(self.request('1.2.3.4')), '10.0.0.9')
+
+    @override_settings(TRUSTED_PROXY_COUNT=1)
+    def test_takes_the_address_seen_by_the_trusted_proxy(self):
+        self.assertEqual(get_client_ip(self.request('1.2.3.4, 5.6.7.8')), '5.6.7.8')
@@ -0,0 +1,252 @@
+import logging
+import threading
+import time
+from collections import Counter, OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LOGIN_THROTTLE = {
+    # 'local' keeps buckets in process memory; 'cache' shares them through CACHE_ALIAS
+    'STORE': 'local',
+    'CACHE_ALIAS': 'default',
+    # Bursts allowed per client IP, per (IP, username) pair and per username across
+    # all IPs, and their refill rates in attempts per minute. The username-wide
+    # bucket only stops distributed guessing, so it is loose enough that a third
+    # party cannot cheaply drain it to keep the owner out
+    'IP_CAPACITY': 20,
+    'IP_REFILL_PER_MINUTE': 10,
+    'USERNAME_CAPACITY': 5,
+    'USERNAME_REFILL_PER_MINUTE': 2,
+    'USERNAME_GLOBAL_CAPACITY': 100,
+    'USERNAME_GLOBAL_REFILL_PER_MINUTE': 30,
+    # After this many consecutive failures from one IP, that IP is locked out of the
+    # username for BACKOFF_BASE_SECONDS * 2 ** (failures - FAILURE_THRESHOLD),
+    # capped at BACKOFF_MAX_SECONDS; the owner logging in from elsewhere is unaffected
+    'FAILURE_THRESHOLD': 5,
+    'BACKOFF_BASE_SECONDS': 2,
+    'BACKOFF_MAX_SECONDS': 15 * 60,
+    'FAILURE_WINDOW_SECONDS': 60 * 60,
+}
+
+
+class TokenBucket:
+    """Classic token bucket: `capacity` tokens, refilled continuously at `rate` tokens per second."""
+
+    def __init__(self, capacity, rate):
+        self.capacity = capacity
+        self.rate = rate
+
+    def consume(self, state, now):
+        """Take one token from `state` ((tokens, updated_at) or None); return (allowed, retry_after, new_state)."""
+        tokens, updated_at = state if state else (self.capacity, now)
+        tokens = min(self.capacity, tokens + (now - updated_at) * self.rate)
+        if tokens >= 1:
+            return True, 0, (tokens - 1, now)
+        return False, (1 - tokens) / self.rate, (tokens, now)
+
+    @property
+    def ttl(self):
+        """Seconds after which an idle bucket is full again and can be forgotten."""
+        return int(self.capacity / self.rate) + 1
+
+
+class LocalMemoryBucketStore:
+    """
+    Per-process store; cheap and lock-protected, but each worker throttles on its own.
+    Bounded: past MAX_ENTRIES the least recently used entry is evicted.
+    """
+
+    MAX_ENTRIES = 100_000
+
+    def __init__(self):
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _get(self, key, now):
+        entry = self._data.get(key)
+        if entry is None or entry[1] < now:
+            return None
+        self._data.move_to_end(key)
+        return entry[0]
+
+    def _set(self, key, value, ttl, now):
+        self._data[key] = (value, now + ttl)
+        self._data.move_to_end(key)
+        while len(self._data) > self.MAX_ENTRIES:
+            self._data.popitem(last=False)
+
+    def consume(self, key, bucket, now):
+        with self._lock:
+            allowed, retry_after, state = bucket.consume(self._get(key, now), now)
+            self._set(key, state, bucket.ttl, now)
+        return allowed, retry_after
+
+    def incr(self, key, ttl, now):
+        """Add one to a counter that expires `ttl` seconds after it was created; return the new value."""
+        with self._lock:
+            entry = self._data.get(key)
+            value, expires_at = (entry[0] + 1, entry[1]) if entry and entry[1] >= now else (1, now + ttl)
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            return value
+
+    def get(self, key, now):
+        with self._lock:
+            return self._get(key, now)
+
+    def set(self, key, value, ttl, now):
+        with self._lock:
+            self._set(key, value, ttl, now)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+
+class CacheBucketStore:
+    """
+    Store shared by all workers through a Django cache (e.g. Redis or Memcached).
+    A bucket is read and written back under a short lock taken with cache.add, so
+    concurrent attempts cannot both spend the same token.
+    """
+
+    LOCK_TIMEOUT = 1
+    LOCK_ATTEMPTS = 10
+    LOCK_WAIT = 0.01
+
+    def __init__(self, alias):
+        self.cache = caches[alias]
+
+    def _acquire(self, lock):
+        for attempt in range(self.LOCK_ATTEMPTS):
+            if attempt:
+                time.sleep(self.LOCK_WAIT)
+            if self.cache.add(lock, 1, self.LOCK_TIMEOUT):
+                return True
+        return False
+
+    def consume(self, key, bucket, now):
+        lock = f'{key}:lock'
+        if not self._acquire(lock):
+            # Contended for the whole wait, i.e. a burst on this very key: treat it as throttled
+            return False, self.LOCK_TIMEOUT
+        try:
+            allowed, retry_after, state = bucket.consume(self.cache.get(key), now)
+            self.cache.set(key, state, bucket.ttl)
+        finally:
+            self.cache.delete(lock)
+        return allowed, retry_after
+
+    def incr(self, key, ttl, now):
+        try:
+            return self.cache.incr(key)
+        except ValueError:
+            if self.cache.add(key, 1, ttl):
+                return 1
+            return self.cache.incr(key)
+
+    def get(self, key, now):
+        return self.cache.get(key)
+
+    def set(self, key, value, ttl, now):
+        self.cache.set(key, value, ttl)
+
+    def delete(self, key):
+        self.cache.delete(key)
+
+
+class LoginThrottle:
+    """
+    Per-IP, per-(IP, username) and per-username throttling for the login endpoint,
+    checked before the password is hashed so rejected attempts cost no PBKDF2 work.
+    Rejections are counted per reason in the store, so with the cache store the
+    totals cover every worker; each count restarts REJECTION_COUNT_SECONDS after
+    it began.
+    """
+
+    REJECTION_REASONS = ('lockout', 'ip', 'username', 'username_global')
+    REJECTION_COUNT_SECONDS = 24 * 60 * 60
+
+    def __init__(self, config=None, store=None):
+        self.config = {**DEFAULT_LOGIN_THROTTLE, **(config or {})}
+        self.store = store or self._build_store()
+        self.ip_bucket = TokenBucket(self.config['IP_CAPACITY'], self.config['IP_REFILL_PER_MINUTE'] / 60)
+        self.username_bucket = TokenBucket(
+            self.config['USERNAME_CAPACITY'], self.config['USERNAME_REFILL_PER_MINUTE'] / 60
+        )
+        self.username_global_bucket = TokenBucket(
+            self.config['USERNAME_GLOBAL_CAPACITY'], self.config['USERNAME_GLOBAL_REFILL_PER_MINUTE'] / 60
+        )
+
+    def _build_store(self):
+        if self.config['STORE'] == 'cache':
+            return CacheBucketStore(self.config['CACHE_ALIAS'])
+        return LocalMemoryBucketStore()
+
+    @property
+    def rejections(self):
+        now = time.time()
+        return Counter({
+            reason: self.store.get(f'login:rejections:{reason}', now) or 0 for reason in self.REJECTION_REASONS
+        })
+
+    @staticmethod
+    def _username(username):
+        return (username or '').strip().lower()
+
+    def check(self, ip, username):
+        """Return None if the attempt may proceed, otherwise the seconds to wait."""
+        now = time.time()
+        username = self._username(username)
+
+        locked_until = self.store.get(f'login:lock:{ip}:{username}', now) if username else None
+        if locked_until and locked_until > now:
+            return self._reject('lockout', ip, username, locked_until - now)
+
+        allowed, retry_after = self.store.consume(f'login:ip:{ip}', self.ip_bucket, now)
+        if not allowed:
+            return self._reject('ip', ip, username, retry_after)
+
+        if username:
+            allowed, retry_after = self.store.consume(f'login:user:{ip}:{username}', self.username_bucket, now)
+            if not allowed:
+                return self._reject('username', ip, username, retry_after)
+            allowed, retry_after = self.store.consume(f'login:user:{username}', self.username_global_bucket, now)
+            if not allowed:
+                return self._reject('username_global', ip, username, retry_after)
+        return None
+
+    def record_failure(self, ip, username):
+        username = self._username(username)
+        if not username:
+            return
+        now = time.time()
+        key = f'login:failures:{ip}:{username}'
+        failures = (self.store.get(key, now) or 0) + 1
+        self.store.set(key, failures, self.config['FAILURE_WINDOW_SECONDS'], now)
+
+        excess = failures - self.config['FAILURE_THRESHOLD']
+        if excess >= 0:
+            delay = min(self.config['BACKOFF_BASE_SECONDS'] * 2 ** excess, self.config['BACKOFF_MAX_SECONDS'])
+            self.store.set(f'login:lock:{ip}:{username}', now + delay, int(delay) + 1, now)
+            logger.warning(f"Login locked for {delay}s after {failures} failures: username={username} ip={ip}")
+
+    def record_success(self, ip, username):
+        username = self._username(username)
+        if username:
+            self.store.delete(f'login:failures:{ip}:{username}')
+            self.store.delete(f'login:lock:{ip}:{username}')
+
+    def _reject(self, reason, ip, username, retry_after):
+        count = self.store.incr(f'login:rejections:{reason}', self.REJECTION_COUNT_SECONDS, time.time())
+        logger.warning(
+            f"Login attempt rejected ({reason}, {count} so far): "
+            f"username={username} ip={ip} retry_after={retry_after:.1f}s"
+        )
+        return max(retry_after, 0)
+
+
+login_throttle = LoginThrottle(getattr(settings, 'LOGIN_THROTTLE', None))
@@ -8,6 +8,7 @@ from .views import (
     UserViewSet,
     RegisterView,
     LoginView,
+    LogoutView,
     SkillViewSet,
     TechCategoryViewSet,
     CommunityRoleViewSet,
@@ -32,6 +33,7 @@ router.register(r'notifications', NotificationViewSet)
 auth_urls = [
     path('register/', RegisterView.as_view(), name='register'),
     path('login/', LoginView.as_view(), name='login'),
+    path('logout/', LogoutView.as_view(), name='logout'),
 ]
 
 urlpatterns = [
@@ -1,4 +1,6 @@
-from rest_framework import viewsets, status, permissions, generics
+import math
+
+from rest_framework import viewsets, status, permissions, generics, filters
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.views import APIView
@@ -7,16 +9,24 @@ from django.contrib.auth.models import Group, Permission
 from django.shortcuts import get_object_or_404
 from django.core.mail import send_mail
 from django.conf import settings
+from rest_framework_simplejwt.exceptions import TokenError
 from rest_framework_simplejwt.tokens import RefreshToken
 from social_django.utils import psa
 from .models import User, Skill, TechCategory, CommunityRole, Notification, ContactUs
 from .models import Bookmark
+from .bookmark_util import with_content_objects
+from .category_tree import get_category_tree
+from .middleware import get_client_ip
+from .pagination import UserCursorPagination
+from .revocation import revocation_list, tokens_for_user
+from .throttling import login_throttle
 from django.contrib.contenttypes.fields import GenericForeignKey
 from django.contrib.contenttypes.models import ContentType
 from .serializers import BookmarkSerializer, BookmarkCreateSerializer, NotificationSerializer, \
     UserProfileUpdateSerializer, PasswordChangeSerializer, SocialLinksSerializer, ContactUsSerializer
 from .serializers import (
     UserSerializer, 
+    UserListSerializer,
     UserProfileSerializer, 
     SkillSerializer,
     TechCategorySerializer, 
@@ -32,7 +42,7 @@ class SocialLoginSuccess(APIView):
 
     def get(self, request):
         user = request.user
-        refresh = RefreshToken.for_user(user)
+        refresh = tokens_for_user(user)
         return Response({
             'access_token': str(refresh.access_token),
             'refresh_token': str(refresh),
@@ -48,11 +58,21 @@ class UserViewSet(viewsets.ModelViewSet):
     queryset = User.objects.filter(is_deleted=False)
     serializer_class = UserSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = UserCursorPagination
+    filter_backends = [filters.SearchFilter]
+    # Each field has a trigram index, see User.Meta.indexes
+    search_fields = ['username', 'first_name', 'last_name', 'email', 'location', 'skills__name']
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action == 'list':
+            return queryset.prefetch_related('groups')
+        return queryset.prefetch_related('groups', 'skills', 'interests')
 
     def get_serializer_class(self):
-        # Use a simplified serializer for list views
+        # Use a lightweight row serializer for list views
         if self.action == 'list':
-            return UserProfileSerializer
+            return UserListSerializer
         return UserSerializer
 
     def get_object(self):
@@ -85,14 +105,21 @@ class UserViewSet(viewsets.ModelViewSet):
                     status=status.HTTP_400_BAD_REQUEST
                 )
 
-            # Set new password
+            # Set new password; it also revokes every token issued with the old one
             user.set_password(serializer.validated_data['new_password'])
+            user.token_generation += 1
             user.save()
 
             # Update session to prevent logout
             update_session_auth_hash(request, user)
 
-            return Response({'status': 'Password changed successfully'})
+            # Every existing JWT (including this one) is now invalid; hand back a fresh pair
+            refresh = tokens_for_user(user)
+            return Response({
+                'status': 'Password changed successfully',
+                'refresh': str(refresh),
+                'access': str(refresh.access_token),
+            })
 
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
@@ -160,6 +187,7 @@ class UserViewSet(viewsets.ModelViewSet):
     def perform_destroy(self, instance):
         # Soft delete
         instance.is_deleted = True
+        instance.token_generation += 1
         instance.save()
 
 
@@ -207,11 +235,24 @@ class LoginView(APIView):
     def post(self, request, *args, **kwargs):
         username = request.data.get('username')
         password = request.data.get('password')
+        client_ip = get_client_ip(request)
+
+        # Throttle before authenticate() so rejected attempts never pay for a password hash
+        retry_after = login_throttle.check(client_ip, username)
+        if retry_after is not None:
+            return Response(
+                {'error': 'Too many login attempts. Please try again later.'},
+                status=status.HTTP_429_TOO_MANY_REQUESTS,
+                headers={'Retry-After': str(math.ceil(retry_after))}
+            )
         
         user = authenticate(username=username, password=password)
         
         if user is None:
+            login_throttle.record_failure(client_ip, username)
             return Response({'error': 'Invalid username or password'}, status=status.HTTP_400_BAD_REQUEST)
+
+        login_throttle.record_success(client_ip, username)
         
         # Validate user is not deleted
         if user.is_deleted:
@@ -221,7 +262,7 @@ class LoginView(APIView):
             return Response({'error': 'User account has been deactivated'}, status=status.HTTP_400_BAD_REQUEST)
 
         # Generate JWT tokens
-        refresh = RefreshToken.for_user(user)
+        refresh = tokens_for_user(user)
         
         return Response({
             'refresh': str(refresh),
@@ -230,6 +271,27 @@ class LoginView(APIView):
         }, status=status.HTTP_200_OK)
 
 
+class LogoutView(APIView):
+    """
+    Revoke the access token used for this request and, if given, its refresh token
+    """
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request, *args, **kwargs):
+        refresh = request.data.get('refresh')
+        if refresh:
+            try:
+                refresh = RefreshToken(refresh)
+            except TokenError:
+                return Response({'error': 'Invalid refresh token'}, status=status.HTTP_400_BAD_REQUEST)
+            if refresh.get('user_id') != request.user.id:
+                return Response({'error': 'Invalid refresh token'}, status=status.HTTP_400_BAD_REQUEST)
+            revocation_list.revoke(refresh, request.user)
+
+        revocation_list.revoke(request.auth, request.user)
+        return Response({'status': 'Logged out'}, status=status.HTTP_200_OK)
+
+
 class SocialAuthView(APIView):
     """
     API endpoint for social authentication
@@ -255,7 +317,7 @@ class SocialAuthView(APIView):
                                     status=status.HTTP_400_BAD_REQUEST)
                 
                 # Generate JWT tokens
-                refresh = RefreshToken.for_user(user)
+                refresh = tokens_for_user(user)
                 
                 return Response({
                     'refresh': str(refresh),
@@ -289,9 +351,20 @@ class TechCategoryViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['get'])
     def root_categories(self, request):
         """Return only root categories (those without parents)"""
-        root_categories = TechCategory.objects.filter(parent__isnull=True)
-        serializer = self.get_serializer(root_categories, many=True)
-        return Response(serializer.data)
+        tree = get_category_tree()
+        return Response([tree.serialize(node.id) for node in tree.roots()])
+
+    @action(detail=True, methods=['get'])
+    def subcategories(self, request, pk=None):
+        """Return every category below this one"""
+        tree = get_category_tree()
+        category_id = int(pk) if str(pk).isdigit() else None
+        if category_id not in tree:
+            return Response({'error': 'Category not found'}, status=status.HTTP_404_NOT_FOUND)
+        return Response([
+            tree.serialize(descendant_id)
+            for descendant_id in tree.descendant_ids(category_id, include_self=False)
+        ])
 
 
 class CommunityRoleViewSet(viewsets.ModelViewSet):
@@ -379,7 +452,7 @@ class BookmarkListView(generics.ListCreateAPIView):
         return BookmarkSerializer
 
     def get_queryset(self):
-        return Bookmark.objects.filter(user=self.request.user)
+        return with_content_objects(Bookmark.objects.filter(user=self.request.user))
 
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
@@ -389,7 +462,7 @@ class BookmarkDetailView(generics.RetrieveUpdateDestroyAPIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def get_queryset(self):
-        return Bookmark.objects.filter(user=self.request.user)
+        return with_content_objects(Bookmark.objects.filter(user=self.request.user))
 
 class CheckBookmarkView(generics.GenericAPIView):
     permission_classes = [permissions.IsAuthenticated]
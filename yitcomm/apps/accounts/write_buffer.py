@@ -0,0 +1,396 @@
+import atexit
+import logging
+import operator
+import threading
+import time
+from collections import Counter, defaultdict
+from functools import reduce
+
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import caches
+from django.db import close_old_connections, transaction
+from django.db.models import Case, F, IntegerField, Q, Value, When
+from django.dispatch import Signal
+
+from .middleware import get_client_ip
+
+logger = logging.getLogger(__name__)
+
+# Sent after a flush writes one model's counters: sender=model, field, deltas={pk: delta}
+counters_flushed = Signal()
+
+DEFAULT_WRITE_BUFFER = {
+    # 'local' buffers in process memory and flushes from a background thread;
+    # 'cache' buffers in CACHE_ALIAS and is flushed by `manage.py flush_write_buffers`
+    'STORE': 'local',
+    'CACHE_ALIAS': 'default',
+    # How often the local store's flusher writes buffered changes
+    'FLUSH_INTERVAL': 10,
+    # Rows per UPDATE/INSERT statement
+    'BATCH_SIZE': 500,
+}
+
+DEFAULT_VIEW_COUNTER = {
+    **DEFAULT_WRITE_BUFFER,
+    # A viewer (user, or IP when anonymous) counts once per object per window; 0 counts every hit
+    'DEDUP_SECONDS': 30 * 60,
+}
+
+# Every buffer created, so management commands can flush them all
+buffers = []
+
+
+class LocalMemoryBufferStore:
+    """Per-process buffer; lost on a crash, so at most FLUSH_INTERVAL seconds of counts are at risk."""
+
+    MAX_SEEN = 100_000
+
+    def __init__(self):
+        self._deltas = Counter()
+        self._values = {}
+        self._seen = {}
+        self._lock = threading.Lock()
+
+    def add(self, key, delta):
+        with self._lock:
+            self._deltas[key] += delta
+
+    def put_max(self, key, value):
+        with self._lock:
+            current = self._values.get(key)
+            if current is None or value > current:
+                self._values[key] = value
+
+    def first_visit(self, key, ttl, now):
+        with self._lock:
+            if self._seen.get(key, 0) >= now:
+                return False
+            if len(self._seen) >= self.MAX_SEEN:
+                self._seen = {k: expires for k, expires in self._seen.items() if expires >= now}
+            self._seen[key] = now + ttl
+            return True
+
+    def drain(self):
+        with self._lock:
+            deltas, self._deltas = self._deltas, Counter()
+        return deltas
+
+    def restore(self, deltas):
+        with self._lock:
+            self._deltas.update(deltas)
+
+    def drain_values(self):
+        with self._lock:
+            values, self._values = self._values, {}
+        return values
+
+    def restore_values(self, values):
+        for key, value in values.items():
+            self.put_max(key, value)
+
+
+class CacheBufferStore:
+    """
+    Buffer shared by all workers through a Django cache (e.g. Redis or Memcached).
+    Counters are cache integers changed with atomic incr/decr. A key is appended
+    to an index (numbered slots) the first time it turns dirty, so the flusher can
+    find it without scanning the cache. Each buffer uses its own key prefix.
+    """
+
+    TIMEOUT = 7 * 24 * 60 * 60
+    # Seconds an index slot may stay empty before the flusher skips it
+    GAP_TIMEOUT = 60
+
+    def __init__(self, alias, prefix='write_buffer'):
+        self.cache = caches[alias]
+        self.prefix = prefix
+
+    def _incr(self, key, delta=1):
+        try:
+            return self.cache.incr(key, delta)
+        except ValueError:
+            if self.cache.add(key, delta, self.TIMEOUT):
+                return delta
+            return self.cache.incr(key, delta)
+
+    def _mark_dirty(self, key):
+        if self.cache.add(f'{self.prefix}:dirty:{key}', 1, self.TIMEOUT):
+            slot = self._incr(f'{self.prefix}:index:size')
+            self.cache.set(f'{self.prefix}:index:{slot}', key, self.TIMEOUT)
+
+    def add(self, key, delta):
+        self._incr(f'{self.prefix}:delta:{key}', delta)
+        self._mark_dirty(key)
+
+    def put_max(self, key, value):
+        # Not atomic across workers; good enough for values that only grow with time
+        current = self.cache.get(f'{self.prefix}:value:{key}')
+        if current is None or value > current:
+            self.cache.set(f'{self.prefix}:value:{key}', value, self.TIMEOUT)
+        self._mark_dirty(key)
+
+    def first_visit(self, key, ttl, now):
+        return self.cache.add(f'{self.prefix}:seen:{key}', 1, ttl)
+
+    def _gap_expired(self, slot):
+        """True once a slot has been seen empty for GAP_TIMEOUT seconds."""
+        gap = f'{self.prefix}:index:gap:{slot}'
+        self.cache.add(gap, time.time(), self.TIMEOUT)
+        first_seen = self.cache.get(gap)
+        if first_seen is not None and time.time() - first_seen < self.GAP_TIMEOUT:
+            return False
+        self.cache.delete(gap)
+        return True
+
+    def _dirty_keys(self):
+        flushed = self.cache.get(f'{self.prefix}:index:flushed') or 0
+        end = self.cache.get(f'{self.prefix}:index:size') or 0
+        slots = [f'{self.prefix}:index:{slot}' for slot in range(flushed + 1, end + 1)]
+        if not slots:
+            return []
+        found = self.cache.get_many(slots)
+        keys = set()
+        done = []
+        for slot, slot_key in enumerate(slots, start=flushed + 1):
+            # A writer between incrementing the size and storing its key leaves the slot empty;
+            # stop there so the next flush reads it, unless it stays empty (writer died, evicted)
+            if slot_key in found:
+                keys.add(found[slot_key])
+            elif not self._gap_expired(slot):
+                break
+            done.append(slot_key)
+        if not done:
+            return []
+        self.cache.set(f'{self.prefix}:index:flushed', flushed + len(done), self.TIMEOUT)
+        self.cache.delete_many(done)
+        for key in keys:
+            # Clear the dirty mark first: a write racing with this flush re-registers the key
+            self.cache.delete(f'{self.prefix}:dirty:{key}')
+        return keys
+
+    def drain(self):
+        deltas = Counter()
+        for key in self._dirty_keys():
+            delta = self.cache.get(f'{self.prefix}:delta:{key}') or 0
+            if delta:
+                self.cache.decr(f'{self.prefix}:delta:{key}', delta)
+                deltas[key] = delta
+        return deltas
+
+    def restore(self, deltas):
+        for key, delta in deltas.items():
+            self.add(key, delta)
+
+    def drain_values(self):
+        keys = list(self._dirty_keys())
+        values = self.cache.get_many([f'{self.prefix}:value:{key}' for key in keys])
+        return {key: values[f'{self.prefix}:value:{key}'] for key in keys if f'{self.prefix}:value:{key}' in values}
+
+    def restore_values(self, values):
+        for key, value in values.items():
+            self.put_max(key, value)
+
+
+class BufferedWriter:
+    """
+    Base for buffers that take writes off the request path: builds the store
+    and, for the local store, runs a background thread calling flush().
+    """
+
+    def __init__(self, name, config=None, store=None, defaults=DEFAULT_WRITE_BUFFER):
+        self.name = name
+        self.config = {**defaults, **(config or {})}
+        self.store = store or self._build_store()
+        self._flusher = None
+        self._flusher_lock = threading.Lock()
+        buffers.append(self)
+
+    def _build_store(self):
+        if self.config['STORE'] == 'cache':
+            return CacheBufferStore(self.config['CACHE_ALIAS'], prefix=f'write_buffer:{self.name}')
+        return LocalMemoryBufferStore()
+
+    def flush(self):
+        raise NotImplementedError
+
+    def _buffered(self):
+        if isinstance(self.store, LocalMemoryBufferStore):
+            self._ensure_flusher()
+
+    def _ensure_flusher(self):
+        if self._flusher is not None:
+            return
+        with self._flusher_lock:
+            if self._flusher is None:
+                self._flusher = threading.Thread(target=self._run_flusher, name=f'{self.name}-flush', daemon=True)
+                self._flusher.start()
+                atexit.register(self._flush_logged)
+
+    def _run_flusher(self):
+        while True:
+            time.sleep(self.config['FLUSH_INTERVAL'])
+            self._flush_logged()
+
+    def _flush_logged(self):
+        try:
+            self.flush()
+        except Exception:
+            logger.exception("Flushing buffered %s failed", self.name)
+        finally:
+            close_old_connections()
+
+
+class CounterBuffer(BufferedWriter):
+    """
+    Buffered `field = field + delta` counters for hot rows (page views). Reads
+    record into the store, and flush() writes the accumulated deltas with one
+    CASE UPDATE per model and batch. Request threads never write to the database.
+    """
+
+    def __init__(self, field, config=None, store=None):
+        self.field = field
+        super().__init__(field, config, store, defaults=DEFAULT_VIEW_COUNTER)
+
+    def _build_store(self):
+        if self.config['STORE'] == 'cache':
+            # Counters keep the unprefixed keys they were first deployed with
+            return CacheBufferStore(self.config['CACHE_ALIAS'])
+        return LocalMemoryBufferStore()
+
+    @staticmethod
+    def _viewer(request):
+        if request is None:
+            return None
+        if request.user.is_authenticated:
+            return f'u{request.user.pk}'
+        return f'ip{get_client_ip(request)}'
+
+    def record(self, instance, request=None):
+        """Count a view of `instance`; returns False when deduplicated."""
+        key = f'{instance._meta.label}:{instance.pk}'
+        viewer = self._viewer(request)
+        dedup = self.config['DEDUP_SECONDS']
+        if dedup and viewer and not self.store.first_visit(f'{self.field}:{key}:{viewer}', dedup, time.time()):
+            return False
+        self.store.add(key, 1)
+        self._buffered()
+        return True
+
+    def flush(self):
+        """Write every buffered delta; returns the number of rows updated."""
+        deltas = self.store.drain()
+        if not deltas:
+            return 0
+        by_model = defaultdict(dict)
+        for key, delta in deltas.items():
+            label, pk = key.rsplit(':', 1)
+            by_model[label][int(pk)] = delta
+
+        updated = 0
+        pending = list(by_model)
+        try:
+            while pending:
+                updated += self._write(apps.get_model(pending[0]), by_model[pending[0]])
+                pending.pop(0)
+        except Exception:
+            # Keep the unwritten counts for the next flush rather than dropping them
+            self.store.restore(Counter({
+                f'{label}:{pk}': delta for label in pending for pk, delta in by_model[label].items()
+            }))
+            raise
+        return updated
+
+    def _write(self, model, deltas):
+        items = sorted(deltas.items())
+        size = self.config['BATCH_SIZE']
+        updated = 0
+        with transaction.atomic():
+            for start in range(0, len(items), size):
+                batch = items[start:start + size]
+                increment = Case(
+                    *[When(pk=pk, then=Value(delta)) for pk, delta in batch],
+                    default=Value(0),
+                    output_field=IntegerField(),
+                )
+                updated += model.objects.filter(pk__in=[pk for pk, _ in batch]).update(
+                    **{self.field: F(self.field) + increment}
+                )
+        # The counts are written; a failing receiver must not get them restored and written twice
+        for receiver, error in counters_flushed.send_robust(sender=model, field=self.field, deltas=deltas):
+            if isinstance(error, Exception):
+                logger.error("%s failed after flushing %s counters", receiver, self.field, exc_info=error)
+        return updated
+
+
+class WatermarkBuffer(BufferedWriter):
+    """
+    Buffered upserts of a "high-water mark" (e.g. a last-read time) keyed by a
+    unique set of foreign keys. Only the newest value per row is kept, and flush()
+    writes them per batch with an INSERT of the missing rows and a CASE UPDATE of
+    the rows whose stored value is older, so a mark never moves back, whatever
+    order the marks or the flushes of several workers arrive in.
+    """
+
+    def __init__(self, name, model_label, key_fields, field, config=None, store=None):
+        self.model_label = model_label
+        self.key_fields = tuple(key_fields)
+        self.field = field
+        super().__init__(name, config, store)
+
+    def mark(self, key_values, value):
+        self.store.put_max(':'.join(str(part) for part in key_values), value)
+        self._buffered()
+
+    def flush(self):
+        """Write every buffered mark; returns the number of rows upserted."""
+        values = self.store.drain_values()
+        if not values:
+            return 0
+        model = apps.get_model(self.model_label)
+        fields = [model._meta.get_field(field) for field in self.key_fields]
+        keys = {key: tuple(map(int, key.split(':'))) for key in values}
+        # A mark on a row deleted since (or never there) would fail the whole batch on
+        # every retry; drop it instead of restoring it
+        for position, field in enumerate(fields):
+            wanted = {parts[position] for parts in keys.values()}
+            existing = set(field.related_model.objects.filter(pk__in=wanted).values_list('pk', flat=True))
+            keys = {key: parts for key, parts in keys.items() if parts[position] in existing}
+        values = {key: values[key] for key in keys}
+        rows = [
+            model(**dict(zip([field.attname for field in fields], parts)), **{self.field: values[key]})
+            for key, parts in keys.items()
+        ]
+        if not rows:
+            return 0
+        try:
+            self._write(model, rows)
+        except Exception:
+            self.store.restore_values(values)
+            raise
+        return len(rows)
+
+    def _write(self, model, rows):
+        attnames = [model._meta.get_field(field).attname for field in self.key_fields]
+        size = self.config['BATCH_SIZE']
+        with transaction.atomic():
+            for start in range(0, len(rows), size):
+                batch = rows[start:start + size]
+                model.objects.bulk_create(batch, ignore_conflicts=True)
+                # Rows that already existed move forward only; the condition is checked per row at write time
+                keys = [{attname: getattr(row, attname) for attname in attnames} for row in batch]
+                marks = [getattr(row, self.field) for row in batch]
+                model.objects.filter(reduce(operator.or_, [
+                    Q(**key, **{f'{self.field}__lt': mark}) for key, mark in zip(keys, marks)
+                ])).update(**{self.field: Case(
+                    *[When(**key, then=Value(mark)) for key, mark in zip(keys, marks)],
+                    default=F(self.field),
+                    output_field=model._meta.get_field(self.field),
+                )})
+
+
+view_counts = CounterBuffer('views', getattr(settings, 'VIEW_COUNTER', None))
+
+
+def record_view(instance, request=None):
+    return view_counts.record(instance, request)
@@ -0,0 +1,37 @@
+# Generated by Django 5.0.6 on 2026-10-19 00:39
+
+from django.conf import settings
+from django.db import migrations, models
+
+from apps.accounts.comment_paths import rebuild_paths
+
+
+def backfill_comment_paths(apps, schema_editor):
+    rebuild_paths(apps.get_model('blogs', 'Comment'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blogs', '0001_initial'),
+        ('contenttypes', '0002_remove_content_type_name'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='depth',
+            field=models.PositiveSmallIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='path',
+            field=models.CharField(blank=True, default='', editable=False, max_length=255),
+        ),
+        migrations.RunPython(backfill_comment_paths, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['path'], name='blogs_comment_path_idx', opclasses=['varchar_pattern_ops']),
+        ),
+    ]
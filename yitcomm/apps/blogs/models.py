@@ -1,7 +1,8 @@
 from django.utils import timezone
 from django.db import models
-from django.contrib.contenttypes.fields import GenericForeignKey
+from django.contrib.contenttypes.fields import GenericForeignKey, GenericRelation
 from django.contrib.contenttypes.models import ContentType
+from apps.accounts.comment_paths import ThreadedComment, path_index
 from apps.accounts.models import TechCategory, User
 from django.utils.text import slugify
 
@@ -78,7 +79,7 @@ class Reaction(models.Model):
         ]
 
 
-class Comment(models.Model):
+class Comment(ThreadedComment):
     content = models.TextField()
     author = models.ForeignKey(User, on_delete=models.CASCADE, related_name='blog_comments')
     parent = models.ForeignKey('self', on_delete=models.CASCADE, null=True, blank=True, related_name='replies')
@@ -87,11 +88,13 @@ class Comment(models.Model):
     content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE, related_name='blog_reactions')
     object_id = models.PositiveIntegerField()
     content_object = GenericForeignKey('content_type', 'object_id')
+    reactions = GenericRelation(Reaction)
 
     class Meta:
         ordering = ['-created_at']
         indexes = [
             models.Index(fields=['content_type', 'object_id']),
+            path_index('blogs_comment_path_idx'),
         ]
 
     def __str__(self):
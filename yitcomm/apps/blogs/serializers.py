@@ -1,11 +1,12 @@
 from rest_framework import serializers
 
-from apps.accounts.serializers import TechCategorySerializer, UserProfileSerializer
+from apps.accounts.serializers import PrefetchListSerializer, TechCategorySerializer, UserProfileSerializer
 from apps.accounts.models import TechCategory
-from apps.accounts.bookmark_util import get_bookmark_status
+from apps.accounts.bookmark_util import BookmarkIndex, get_bookmark_status
+from apps.accounts.comment_paths import load_threads, walk_threads
+from apps.accounts.reaction_counts import ReactionSummaryMixin
 from .models import Blog, Reaction, Comment
 from django.contrib.contenttypes.models import ContentType
-from django.db import models
 
 class ReactionSerializer(serializers.ModelSerializer):
     user = UserProfileSerializer(read_only=True)
@@ -15,93 +16,87 @@ class ReactionSerializer(serializers.ModelSerializer):
         fields = ('id', 'user', 'reaction_type', 'created_at')
         read_only_fields = ('user', 'created_at')
 
-class CommentSerializer(serializers.ModelSerializer):
+# Replies rendered under each comment, oldest first
+REPLIES_PER_COMMENT = 5
+
+
+def thread_queryset():
+    """Comments with everything CommentSerializer embeds, for roots and their loaded subtrees."""
+    return Comment.objects.select_related('author').prefetch_related(
+        'author__groups__permissions'
+    )
+
+
+class CommentSerializer(ReactionSummaryMixin, serializers.ModelSerializer):
     author = UserProfileSerializer(read_only=True)
-    reactions = ReactionSerializer(many=True, read_only=True)
+    reaction_summary = serializers.SerializerMethodField()
     user_reaction = serializers.SerializerMethodField()
     replies = serializers.SerializerMethodField()
+
+    reaction_model = Reaction
+    reaction_choices = Reaction.REACTION_TYPES
     
     class Meta:
         model = Comment
         fields = ('id', 'content', 'author', 'parent', 'created_at', 
-                 'updated_at', 'reactions', 'user_reaction', 'replies')
+                 'updated_at', 'reaction_summary', 'user_reaction', 'replies')
         read_only_fields = ('created_at', 'updated_at', 'deleted', 'draft')
+        list_serializer_class = PrefetchListSerializer
+
+    def prime_page(self, comments):
+        """
+        Load every reply under the page's comments with one path query, then the
+        reaction counts and the requesting user's reactions for the whole tree.
+        Nested reply lists come through here too and find their rows already loaded.
+        """
+        load_threads(comments, thread_queryset())
+        self.reactions_for(walk_threads(comments))
 
     def get_replies(self, obj):
+        if not hasattr(obj, 'thread_replies'):
+            load_threads([obj], thread_queryset())
         return CommentSerializer(
-            obj.replies.all().order_by('created_at')[:5], 
+            obj.thread_replies[:REPLIES_PER_COMMENT],
             many=True,
             context=self.context
         ).data
-
-    def get_user_reaction(self, obj):
-        request = self.context.get("request", None)
-        if request and request.user.is_authenticated:
-            content_type = ContentType.objects.get_for_model(Blog)
-            reaction = Reaction.objects.filter(
-                content_type=content_type,
-                object_id=obj.id,
-                user=request.user
-            ).first()
-            return reaction.reaction_type if reaction else None
-        return None
         
 
-class BlogSerializer(serializers.ModelSerializer):
+class BlogSerializer(ReactionSummaryMixin, serializers.ModelSerializer):
     author = UserProfileSerializer(read_only=True)
     categories = TechCategorySerializer(many=True, read_only=True)
-    reactions = ReactionSerializer(many=True, read_only=True)
+    reactions_count = serializers.SerializerMethodField()
     user_reaction = serializers.SerializerMethodField()
     comments = serializers.SerializerMethodField()
     bookmark_status = serializers.SerializerMethodField()
     reaction_summary = serializers.SerializerMethodField()
 
+    reaction_model = Reaction
+    reaction_choices = Reaction.REACTION_TYPES
     
     class Meta:
         model = Blog
         fields = ('id', 'title', 'slug', 'content', 'author', 'categories',
                  'published_at', 'is_published', 'featured_image', 'views','reaction_summary',
-                 'reactions', 'user_reaction', 'comments', 'bookmark_status')
+                 'reactions_count', 'user_reaction', 'comments', 'bookmark_status')
         read_only_fields = ('slug', 'views', 'published_at')
+        list_serializer_class = PrefetchListSerializer
+
+    def prime_page(self, blogs):
+        """Load the requesting user's bookmarks and reactions, and reaction counts, for the whole page"""
+        request = self.context.get('request')
+        if request:
+            self.context['bookmark_index'] = BookmarkIndex(request.user, blogs)
+        self.reactions_for(blogs)
     
     def get_bookmark_status(self, obj):
         request = self.context.get('request')
-        return get_bookmark_status(request.user if request else None, obj)
-
-    def get_reaction_summary(self, obj):
-        """Return counts of each reaction type for this blog."""
-        content_type = ContentType.objects.get_for_model(Blog)
-        reaction_counts = (
-            Reaction.objects
-            .filter(content_type=content_type, object_id=obj.id)
-            .values('reaction_type')
-            .annotate(total=models.Count('id'))
-        )
-        # Convert the QuerySet into a dictionary
-        summary = {item['reaction_type']: item['total'] for item in reaction_counts}
-
-        # Make sure all reaction types are present even if 0
-        for key, _ in Reaction.REACTION_TYPES:
-            summary.setdefault(key, 0)
-
-        return summary
-
-    def get_user_reaction(self, obj):
-        request = self.context.get("request", None)
-        if request and request.user.is_authenticated:
-            content_type = ContentType.objects.get_for_model(Blog)
-            reaction = Reaction.objects.filter(
-                content_type=content_type,
-                object_id=obj.id,
-                user=request.user
-            ).first()
-            return reaction.reaction_type if reaction else None
-        return None
+        return get_bookmark_status(request.user if request else None, obj, self.context.get('bookmark_index'))
 
     
     def get_comments(self, obj):
         content_type = ContentType.objects.get_for_model(Blog)
-        comments = Comment.objects.filter(
+        comments = thread_queryset().filter(
             content_type=content_type,
             object_id=obj.id,
             parent__isnull=True
@@ -116,6 +111,15 @@ class BlogCreateSerializer(serializers.ModelSerializer):
         fields = ['title', 'content', 'categories', 'is_published', 'featured_image', 'draft']
 
 
+class BlogSummarySerializer(serializers.ModelSerializer):
+    """Slim blog representation for bookmark listings"""
+    author = serializers.CharField(source='author.username', read_only=True)
+
+    class Meta:
+        model = Blog
+        fields = ('id', 'title', 'slug', 'author', 'featured_image', 'published_at', 'views')
+
+
 class CategoryWithBlogStatsSerializer(serializers.ModelSerializer):
     blogs_count = serializers.IntegerField(read_only=True)
     
@@ -4,10 +4,12 @@ from rest_framework.views import APIView
 from django.contrib.contenttypes.models import ContentType
 from apps.blogs.filters import BlogFilter
 from apps.accounts.models import Bookmark, TechCategory
+from apps.accounts.category_tree import get_category_tree
+from apps.accounts.write_buffer import record_view
 from .models import Blog, Reaction, Comment
-from .serializers import BlogCreateSerializer, BlogSerializer, CategoryWithBlogStatsSerializer, ReactionSerializer, CommentSerializer
+from .serializers import BlogCreateSerializer, BlogSerializer, CategoryWithBlogStatsSerializer, ReactionSerializer, CommentSerializer, thread_queryset
 from django_filters.rest_framework import DjangoFilterBackend
-from django.db.models import F, Count
+from django.db.models import Count
 
 class BlogListCreateAPI(generics.ListCreateAPIView):
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
@@ -34,6 +36,12 @@ class BlogListCreateAPI(generics.ListCreateAPIView):
                 queryset = queryset.filter(categories__id__in=category_ids)
             except ValueError:
                 pass
+        # ?under_category=<id> matches the category and all of its subcategories
+        under_category = self.request.query_params.get('under_category')
+        if under_category and under_category.isdigit():
+            queryset = queryset.filter(
+                categories__id__in=get_category_tree().descendant_ids(int(under_category))
+            ).distinct()
         if bookmarked and self.request.user.is_authenticated:
             if bookmarked.lower() == 'true':
                 # Get content type for Blog model
@@ -60,9 +68,8 @@ class BlogDetailAPI(generics.RetrieveUpdateDestroyAPIView):
     def retrieve(self, request, *args, **kwargs):
         instance = self.get_object()
         
-        # Increment view count using F() to prevent race condition
-        Blog.objects.filter(pk=instance.pk).update(views=F('views') + 1)
-        instance.refresh_from_db()
+        # Buffered and flushed in batches, so a read does no write
+        record_view(instance, request)
         
         serializer = self.get_serializer(instance)
         return Response(serializer.data)
@@ -162,7 +169,7 @@ class CommentListCreateAPI(generics.ListCreateAPIView):
 
     def get_queryset(self):
         blog = generics.get_object_or_404(Blog, slug=self.kwargs['slug'])
-        return Comment.objects.filter(
+        return thread_queryset().filter(
             content_type=ContentType.objects.get_for_model(blog),
             object_id=blog.id,
             parent__isnull=True
@@ -182,7 +189,7 @@ class CommentRplyListAPI(generics.ListCreateAPIView):
 
     def get_queryset(self):
         parent_comment = generics.get_object_or_404(Comment, pk=self.kwargs['comment_id'])
-        return Comment.objects.filter(
+        return thread_queryset().filter(
             content_type=parent_comment.content_type,
             object_id=parent_comment.object_id,
             parent=parent_comment
@@ -175,6 +175,17 @@ class EventSerializer(serializers.ModelSerializer):
         return data
 
 
+class EventSummarySerializer(serializers.ModelSerializer):
+    """Slim event representation for bookmark listings"""
+
+    class Meta:
+        model = Event
+        fields = (
+            'id', 'title', 'slug', 'location', 'is_online', 'start_time',
+            'end_time', 'featured_image', 'status', 'event_type', 'price'
+        )
+
+
 class PaymentInitiationSerializer(serializers.Serializer):
     """Serializer for payment initiation request"""
     phone_number = serializers.CharField(
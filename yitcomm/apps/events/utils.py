@@ -163,23 +163,14 @@ def generate_ticket_number(event_id, registration_id):
 
 
 def send_email_notification(user_email, subject, message, html_message=None):
-    """Send email notification to user"""
-    from django.core.mail import send_mail
-    from django.conf import settings
-
-    try:
-        send_mail(
-            subject=subject,
-            message=message,
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            recipient_list=[user_email],
-            html_message=html_message,
-            fail_silently=False,
-        )
-        return True
-    except Exception as e:
-        import logging
-        logger = logging.getLogger(__name__)
-        logger.error(f"Failed to send email to {user_email}: {str(e)}")
-        return False
-
+    """Queue an email notification to user"""
+    from django.utils.html import linebreaks
+    from apps.newsletters.mailer import queue_email
+
+    queue_email(
+        recipient=user_email,
+        subject=subject,
+        html_content=html_message or linebreaks(message, autoescape=True),
+        text_content=message,
+    )
+    return True
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Tag, Forum, Forum_tags, Discussion, Comment, Reaction
+from .models import Tag, Forum, Forum_tags, Discussion, Comment, Reaction, ForumActivity
 
 # Register your models here.
 @admin.register(Tag)
@@ -30,4 +30,11 @@ class CommentAdmin(admin.ModelAdmin):
 @admin.register(Reaction)
 class ReactionAdmin(admin.ModelAdmin):
     list_display = ('user', 'content_type', 'object_id', 'reaction', 'created_at')
-    list_filter = ('reaction',)
\ No newline at end of file
+    list_filter = ('reaction',)
+
+
+@admin.register(ForumActivity)
+class ForumActivityAdmin(admin.ModelAdmin):
+    list_display = ('forum', 'activity_type', 'actor', 'title', 'created_at')
+    list_filter = ('activity_type',)
+    raw_id_fields = ('forum', 'actor', 'discussion')
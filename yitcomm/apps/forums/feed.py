@@ -0,0 +1,52 @@
+from django.conf import settings
+from django.utils import timezone
+
+from .models import ForumActivity, ForumFeedMarker
+
+# Forums with more followers than this record one ForumActivity row per event
+# instead of one Notification per follower
+FANOUT_THRESHOLD = getattr(settings, 'FORUM_FANOUT_THRESHOLD', 1000)
+
+
+def fans_out_on_write(forum):
+    return forum.followers_count <= FANOUT_THRESHOLD
+
+
+def record_activity(forum, activity_type, actor, discussion, title, message):
+    return ForumActivity.objects.create(
+        forum=forum,
+        activity_type=activity_type,
+        actor=actor,
+        discussion=discussion,
+        title=title,
+        message=message,
+    )
+
+
+def feed_for(user):
+    """Activity of every forum the user follows, newest first, merged at read time."""
+    return (
+        ForumActivity.objects.filter(forum__in=user.followed_forums.values('pk'))
+        .exclude(actor=user)
+        .select_related('forum', 'actor')
+    )
+
+
+def read_marker(user):
+    """The user's feed watermark; a user who has never opened the feed starts from when they joined."""
+    marker = ForumFeedMarker.objects.filter(user=user).values_list('read_at', flat=True).first()
+    return marker or user.date_joined
+
+
+def unread_count(user):
+    return feed_for(user).filter(created_at__gt=read_marker(user)).count()
+
+
+def mark_feed_read(user, read_at=None):
+    """Move the watermark forward to read_at (default now); it never moves back."""
+    read_at = read_at or timezone.now()
+    marker, created = ForumFeedMarker.objects.get_or_create(user=user, defaults={'read_at': read_at})
+    if not created and marker.read_at < read_at:
+        ForumFeedMarker.objects.filter(user=user, read_at__lt=read_at).update(read_at=read_at)
+        marker.read_at = read_at
+    return marker.read_at
@@ -0,0 +1,39 @@
+from django.db import transaction
+from django.db.models import F
+from django.db.models.functions import Greatest
+
+from .models import Forum
+
+# The followers M2M table; its unique (forum, user) index answers every lookup here
+Follow = Forum.followers.through
+
+
+def is_following(user, forum_id):
+    if not (user and user.is_authenticated):
+        return False
+    return Follow.objects.filter(forum_id=forum_id, user_id=user.pk).exists()
+
+
+def followed_forum_ids(user, forum_ids):
+    """Which of `forum_ids` the user follows, in one query."""
+    if not (user and user.is_authenticated) or not forum_ids:
+        return set()
+    return set(Follow.objects.filter(user_id=user.pk, forum_id__in=forum_ids).values_list('forum_id', flat=True))
+
+
+def follow(user, forum_id):
+    """Follow a forum; returns False when the user already did. Safe to repeat or race."""
+    with transaction.atomic():
+        _, created = Follow.objects.get_or_create(forum_id=forum_id, user_id=user.pk)
+        if created:
+            Forum.objects.filter(pk=forum_id).update(followers_count=F('followers_count') + 1)
+    return created
+
+
+def unfollow(user, forum_id):
+    """Stop following a forum; returns False when the user was not following it."""
+    with transaction.atomic():
+        deleted, _ = Follow.objects.filter(forum_id=forum_id, user_id=user.pk).delete()
+        if deleted:
+            Forum.objects.filter(pk=forum_id).update(followers_count=Greatest(F('followers_count') - 1, 0))
+    return bool(deleted)
@@ -0,0 +1,137 @@
+import math
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.db.models import Case, F, FloatField, OuterRef, Subquery, Value, When
+from django.db.models.functions import Abs, Exp, Greatest, Ln
+from django.utils import timezone
+
+DEFAULT_HOT_SCORE = {
+    # Activity loses half its weight every HALF_LIFE_HOURS
+    'HALF_LIFE_HOURS': 24,
+    # Weight of one event of each kind
+    'WEIGHTS': {
+        'view': 1,
+        'reaction': 3,
+        'comment': 5,
+        'discussion': 8,
+        'forum': 8,
+    },
+}
+
+HOT_SCORE = {**DEFAULT_HOT_SCORE, **getattr(settings, 'HOT_SCORE', {})}
+WEIGHTS = {**DEFAULT_HOT_SCORE['WEIGHTS'], **HOT_SCORE['WEIGHTS']}
+TAU = HOT_SCORE['HALF_LIFE_HOURS'] * 3600 / math.log(2)
+EPOCH = datetime(2024, 1, 1, tzinfo=dt_timezone.utc)
+
+# hot_score is ln(sum(weight * e^((t - EPOCH) / TAU))) over a row's events, which
+# ranks rows exactly like the decayed sum at any moment (every row decays by the
+# same factor), yet never changes as time passes. An event is just a log-add of
+# its own term, so updates are a single UPDATE and the score can be indexed.
+# Views have no stored timestamps, so their share is also kept on its own in
+# view_heat, which recompute() carries over instead of re-deriving.
+
+
+def event_score(kind, at=None, count=1):
+    at = at or timezone.now()
+    return math.log(WEIGHTS[kind] * count) + (at - EPOCH).total_seconds() / TAU
+
+
+def log_add(a, b):
+    """ln(e^a + e^b) without overflow, in Python."""
+    high, low = max(a, b), min(a, b)
+    return high + math.log1p(math.exp(low - high))
+
+
+def _log_add_expression(term, field='hot_score'):
+    current = F(field)
+    added = Greatest(current, term) + Ln(Value(1.0) + Exp(-Abs(current - term)))
+    # view_heat starts out NULL (no views yet)
+    return Case(When(**{f'{field}__isnull': True}, then=term), default=added, output_field=FloatField())
+
+
+def heat(kind, at=None, count=1):
+    """Expression for hot_score after one (or `count`) more events, for queryset.update()."""
+    return _log_add_expression(Value(event_score(kind, at, count), output_field=FloatField()))
+
+
+def heat_many(model, counts, kind, at=None, batch_size=500):
+    """
+    Add `counts` ({pk: events}) of one kind to many rows, one CASE UPDATE per batch.
+    Views are added to view_heat as well, so recompute() can keep them.
+    """
+    items = sorted((pk, count) for pk, count in counts.items() if count > 0)
+    for start in range(0, len(items), batch_size):
+        batch = items[start:start + batch_size]
+        term = Case(
+            *[When(pk=pk, then=Value(event_score(kind, at, count))) for pk, count in batch],
+            default=Value(0.0),
+            output_field=FloatField(),
+        )
+        updates = {'hot_score': _log_add_expression(term)}
+        if kind == 'view':
+            updates['view_heat'] = _log_add_expression(term, 'view_heat')
+        model.objects.filter(pk__in=[pk for pk, _ in batch]).update(**updates)
+
+
+def recompute(forum_model, discussion_model, comment_model, reaction_model, batch_size=1000):
+    """
+    Rebuild every forum and discussion score from the stored activity, e.g. after
+    changing HOT_SCORE weights or to drop deleted comments and reactions. Views
+    have no timestamps; their accumulated view_heat is carried over as is.
+    """
+    forums, discussions = {}, {}
+
+    def add(scores, pk, kind, at, count=1):
+        if count:
+            score = event_score(kind, at, count)
+            scores[pk] = score if pk not in scores else log_add(scores[pk], score)
+
+    def add_views(scores, pk, view_heat):
+        if view_heat is not None:
+            scores[pk] = log_add(scores[pk], view_heat)
+
+    for pk, created_at, view_heat in forum_model.objects.values_list('id', 'created_at', 'view_heat').iterator():
+        add(forums, pk, 'forum', created_at)
+        add_views(forums, pk, view_heat)
+
+    for pk, forum_id, created_at, view_heat in discussion_model.objects.values_list(
+        'id', 'forum_id', 'created_at', 'view_heat'
+    ).iterator():
+        add(discussions, pk, 'discussion', created_at)
+        add_views(discussions, pk, view_heat)
+        add(forums, forum_id, 'discussion', created_at)
+
+    reactions = reaction_model.objects.order_by()
+    reacted_discussion = discussion_model.objects.filter(pk=OuterRef('object_id'))
+    reacted_comment = comment_model.objects.filter(pk=OuterRef('object_id'))
+    activity = [
+        ('comment', comment_model.objects.order_by().values_list('discussion_id', 'discussion__forum_id', 'created_at')),
+        ('reaction', reactions.filter(
+            content_type_id=ContentType.objects.get_for_model(discussion_model).id
+        ).values_list(
+            Subquery(reacted_discussion.values('pk')[:1]),
+            Subquery(reacted_discussion.values('forum_id')[:1]),
+            'created_at',
+        )),
+        ('reaction', reactions.filter(
+            content_type_id=ContentType.objects.get_for_model(comment_model).id
+        ).values_list(
+            Subquery(reacted_comment.values('discussion_id')[:1]),
+            Subquery(reacted_comment.values('discussion__forum_id')[:1]),
+            'created_at',
+        )),
+    ]
+    for kind, rows in activity:
+        for discussion_id, forum_id, created_at in rows.iterator():
+            # Reactions whose target has been deleted come back with no discussion
+            if discussion_id is not None:
+                add(discussions, discussion_id, kind, created_at)
+                add(forums, forum_id, kind, created_at)
+
+    for model, scores in ((forum_model, forums), (discussion_model, discussions)):
+        model.objects.bulk_update(
+            [model(id=pk, hot_score=score) for pk, score in scores.items()], ['hot_score'], batch_size=batch_size
+        )
+    return len(forums), len(discussions)
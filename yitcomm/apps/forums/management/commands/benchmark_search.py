@@ -0,0 +1,126 @@
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from apps.accounts.comment_paths import path_segment
+from apps.accounts.models import TechCategory, User
+from apps.forums.models import Comment, Discussion, Forum
+from apps.forums.search import ranked, search, search_enabled, search_query, update_search_vectors
+
+VOCABULARY = (
+    "the a to of and in is for that with on it this be are as we can not you use have from by "
+    "database index query postgres python django server cache thread request response api model "
+    "migration deploy error bug test performance memory latency throughput docker kubernetes "
+    "frontend backend react javascript typescript security token session login schema table "
+    "column join transaction lock replica backup queue worker celery redis search ranking vector "
+    "release version upgrade config logging metrics benchmark profile scale shard partition"
+).split()
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a benchmark discussion up to --comments comments and compare ranked full-text "
+        "search over the GIN-indexed search vectors against ICONTAINS filtering. Postgres only."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--comments', type=int, default=1_000_000)
+        parser.add_argument('--query', default='database index')
+        parser.add_argument('--runs', type=int, default=5)
+        parser.add_argument('--batch-size', type=int, default=10_000)
+        parser.add_argument('--explain', action='store_true', help="Print EXPLAIN ANALYZE of the ranked query.")
+        parser.add_argument('--cleanup', action='store_true', help="Delete the benchmark data and exit.")
+
+    def handle(self, *args, **options):
+        if not search_enabled():
+            raise CommandError(f"Full-text search needs PostgreSQL; the default database is {connection.vendor}.")
+
+        if options['cleanup']:
+            deleted, _ = Forum.objects.filter(title='Search benchmark').delete()
+            User.objects.filter(username='search-benchmark').delete()
+            self.stdout.write(f"Deleted {deleted} benchmark rows")
+            return
+
+        discussion = self.benchmark_discussion()
+        self.seed(discussion, options['comments'], options['batch_size'])
+
+        terms = options['query']
+        query = search_query(terms)
+        matches = ranked(Comment.objects.all(), query).count()
+        self.stdout.write(f"{Comment.objects.count()} comments, {matches} match {terms!r}")
+
+        def icontains():
+            queryset = Comment.objects.all()
+            for word in terms.split():
+                queryset = queryset.filter(content__icontains=word)
+            return list(queryset.order_by('-created_at').values_list('pk', flat=True)[:20])
+
+        def full_text():
+            return list(ranked(Comment.objects.all(), query).values_list('pk', 'rank')[:20])
+
+        def endpoint():
+            return search(terms, limit=20)
+
+        for label, run in (('ICONTAINS, newest 20', icontains),
+                           ('ranked full-text, top 20', full_text),
+                           ('search endpoint (all types, snippets)', endpoint)):
+            run()  # warm the buffer cache so every variant is timed hot
+            timings = []
+            for _ in range(options['runs']):
+                started = time.perf_counter()
+                run()
+                timings.append((time.perf_counter() - started) * 1000)
+            self.stdout.write(
+                f"{label}: median {statistics.median(timings):.1f} ms, best {min(timings):.1f} ms "
+                f"over {options['runs']} runs"
+            )
+
+        if options['explain']:
+            self.stdout.write(ranked(Comment.objects.all(), query).values('pk')[:20].explain(analyze=True))
+
+    def benchmark_discussion(self):
+        user, _ = User.objects.get_or_create(
+            username='search-benchmark', defaults={'email': 'search-benchmark@example.com'}
+        )
+        category, _ = TechCategory.objects.get_or_create(name='Search benchmark')
+        forum, _ = Forum.objects.get_or_create(
+            title='Search benchmark',
+            defaults={'description': 'Generated by benchmark_search', 'category': category, 'created_by': user},
+        )
+        discussion, _ = Discussion.objects.get_or_create(
+            forum=forum, title='Search benchmark', defaults={'content': 'Generated comments', 'author': user}
+        )
+        return discussion
+
+    def seed(self, discussion, total, batch_size):
+        existing = Comment.objects.filter(discussion=discussion).count()
+        if existing >= total:
+            return
+        rng = random.Random(existing)
+        # Zipf-like word frequencies, so common words match many rows and rare ones few
+        weights = [1 / rank for rank in range(1, len(VOCABULARY) + 1)]
+        self.stdout.write(f"Seeding {total - existing} comments...")
+
+        for start in range(existing, total, batch_size):
+            size = min(batch_size, total - start)
+            with transaction.atomic():
+                # bulk_create skips signals: no notifications, and paths and vectors are set below
+                comments = Comment.objects.bulk_create([
+                    Comment(
+                        discussion=discussion,
+                        author_id=discussion.author_id,
+                        content=' '.join(rng.choices(VOCABULARY, weights, k=rng.randint(15, 80))),
+                    )
+                    for _ in range(size)
+                ])
+                for comment in comments:
+                    comment.path = path_segment(comment.pk)
+                Comment.objects.bulk_update(comments, ['path'], batch_size=1000)
+                update_search_vectors(Comment.objects.filter(pk__in=[comment.pk for comment in comments]))
+            self.stdout.write(f"  {start + size}/{total}")
+
+        with connection.cursor() as cursor:
+            cursor.execute(f'ANALYZE {Comment._meta.db_table}')
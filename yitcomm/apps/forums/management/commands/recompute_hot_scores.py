@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from apps.forums.hotness import recompute
+from apps.forums.models import Comment, Discussion, Forum, Reaction
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute forum and discussion hot scores from all stored activity. Signals keep "
+        "them current, so this is a repair tool, not a scheduled job: run it once after "
+        "changing HOT_SCORE weights, or to forget deleted comments and reactions."
+    )
+
+    def handle(self, *args, **options):
+        forums, discussions = recompute(Forum, Discussion, Comment, Reaction)
+        self.stdout.write(self.style.SUCCESS(f"Recomputed hot scores for {forums} forums and {discussions} discussions"))
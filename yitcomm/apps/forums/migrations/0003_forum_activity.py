@@ -0,0 +1,50 @@
+# Generated by Django 5.0.6 on 2026-10-19 00:36
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Greatest
+
+
+def backfill_forum_activity(apps, schema_editor):
+    Forum = apps.get_model('forums', 'Forum')
+    Discussion = apps.get_model('forums', 'Discussion')
+    Comment = apps.get_model('forums', 'Comment')
+
+    discussions = Discussion.objects.filter(forum=OuterRef('pk'))
+    latest_discussion = discussions.order_by('-created_at', '-id')
+    latest_comment = Comment.objects.filter(discussion__forum=OuterRef('pk')).order_by('-created_at')
+    discussion_count = discussions.order_by().values('forum').annotate(total=Count('id')).values('total')
+    latest_discussion_at = Subquery(latest_discussion.values('created_at')[:1])
+    latest_comment_at = Subquery(latest_comment.values('created_at')[:1])
+    Forum.objects.update(
+        discussion_count=Coalesce(Subquery(discussion_count), 0),
+        last_discussion=Subquery(latest_discussion.values('id')[:1]),
+        last_activity_at=Coalesce(Greatest(latest_discussion_at, latest_comment_at), latest_discussion_at),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('forums', '0002_alter_forum_title'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='forum',
+            name='discussion_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='forum',
+            name='last_activity_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='forum',
+            name='last_discussion',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='forums.discussion'),
+        ),
+        migrations.RunPython(backfill_forum_activity, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 5.0.6 on 2026-10-19 00:43
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0013_notification_digests'),
+        ('forums', '0004_comment_paths'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ForumFeedMarker',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='forum_feed_marker', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('read_at', models.DateTimeField()),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ForumActivity',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('activity_type', models.CharField(choices=[('new_discussion', 'New discussion'), ('new_comment', 'New comment'), ('new_reaction', 'New reaction')], max_length=20)),
+                ('title', models.CharField(max_length=200)),
+                ('message', models.TextField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('actor', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('discussion', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='forums.discussion')),
+                ('forum', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='activities', to='forums.forum')),
+            ],
+            options={
+                'verbose_name_plural': 'forum activities',
+                'ordering': ['-created_at', '-id'],
+                'indexes': [models.Index(fields=['forum', '-created_at'], name='forum_activity_feed_idx')],
+            },
+        ),
+    ]
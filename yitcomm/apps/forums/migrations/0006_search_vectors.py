@@ -0,0 +1,72 @@
+# Generated by Django 5.0.6 on 2026-10-19 00:49
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.conf import settings
+from django.contrib.postgres.search import SearchVector
+from django.db import migrations
+from django.db.models import OuterRef, Subquery
+
+# Frozen copy of the apps.forums.search vectors at the time of this migration
+SEARCH_CONFIG = getattr(settings, 'SEARCH_CONFIG', 'english')
+
+
+def backfill_search_vectors(apps, schema_editor):
+    # tsvector and GIN are Postgres features; other backends keep the column empty
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    TechCategory = apps.get_model('accounts', 'TechCategory')
+    category_name = Subquery(TechCategory.objects.filter(pk=OuterRef('category_id')).values('name')[:1])
+    apps.get_model('forums', 'Forum').objects.update(search_vector=(
+        SearchVector('title', weight='A', config=SEARCH_CONFIG)
+        + SearchVector('description', weight='B', config=SEARCH_CONFIG)
+        + SearchVector(category_name, weight='C', config=SEARCH_CONFIG)
+    ))
+    apps.get_model('forums', 'Discussion').objects.update(search_vector=(
+        SearchVector('title', weight='A', config=SEARCH_CONFIG)
+        + SearchVector('content', weight='B', config=SEARCH_CONFIG)
+    ))
+    apps.get_model('forums', 'Comment').objects.update(
+        search_vector=SearchVector('content', weight='B', config=SEARCH_CONFIG)
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0014_reaction_counts'),
+        ('forums', '0005_forum_activity_feed'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='discussion',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='forum',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        # Fill the vectors before the indexes exist: one GIN build beats row-by-row maintenance
+        migrations.RunPython(backfill_search_vectors, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='comment',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='comment_search_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='discussion',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='discussion_search_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='forum',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='forum_search_idx'),
+        ),
+    ]
@@ -0,0 +1,112 @@
+# Generated by Django 5.0.6 on 2026-10-19 00:53
+
+import math
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+# Frozen copy of the apps.forums.hotness scoring at the time of this migration
+HOT_SCORE = getattr(settings, 'HOT_SCORE', {})
+WEIGHTS = {'view': 1, 'reaction': 3, 'comment': 5, 'discussion': 8, 'forum': 8, **HOT_SCORE.get('WEIGHTS', {})}
+TAU = HOT_SCORE.get('HALF_LIFE_HOURS', 24) * 3600 / math.log(2)
+EPOCH = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+def event_score(kind, at, count=1):
+    return math.log(WEIGHTS[kind] * count) + (at - EPOCH).total_seconds() / TAU
+
+
+def log_add(a, b):
+    high, low = max(a, b), min(a, b)
+    return high + math.log1p(math.exp(low - high))
+
+
+def backfill_hot_scores(apps, schema_editor):
+    Forum = apps.get_model('forums', 'Forum')
+    Discussion = apps.get_model('forums', 'Discussion')
+    Comment = apps.get_model('forums', 'Comment')
+    Reaction = apps.get_model('forums', 'Reaction')
+    ContentType = apps.get_model('contenttypes', 'ContentType')
+    forums, discussions = {}, {}
+
+    def add(scores, pk, kind, at, count=1):
+        if count:
+            score = event_score(kind, at, count)
+            scores[pk] = score if pk not in scores else log_add(scores[pk], score)
+
+    # Views have no timestamps, so they count as of the row's creation
+    for pk, created_at, views in Forum.objects.values_list('id', 'created_at', 'views').iterator():
+        add(forums, pk, 'forum', created_at)
+        add(forums, pk, 'view', created_at, views)
+
+    for pk, forum_id, created_at, views in Discussion.objects.values_list(
+        'id', 'forum_id', 'created_at', 'views'
+    ).iterator():
+        add(discussions, pk, 'discussion', created_at)
+        add(discussions, pk, 'view', created_at, views)
+        add(forums, forum_id, 'discussion', created_at)
+
+    def content_type_id(model_name):
+        content_type = ContentType.objects.filter(app_label='forums', model=model_name).first()
+        return content_type.id if content_type else None
+
+    reactions = Reaction.objects.order_by()
+    reacted_discussion = Discussion.objects.filter(pk=OuterRef('object_id'))
+    reacted_comment = Comment.objects.filter(pk=OuterRef('object_id'))
+    activity = [
+        ('comment', Comment.objects.order_by().values_list('discussion_id', 'discussion__forum_id', 'created_at')),
+        ('reaction', reactions.filter(content_type_id=content_type_id('discussion')).values_list(
+            Subquery(reacted_discussion.values('pk')[:1]),
+            Subquery(reacted_discussion.values('forum_id')[:1]),
+            'created_at',
+        )),
+        ('reaction', reactions.filter(content_type_id=content_type_id('comment')).values_list(
+            Subquery(reacted_comment.values('discussion_id')[:1]),
+            Subquery(reacted_comment.values('discussion__forum_id')[:1]),
+            'created_at',
+        )),
+    ]
+    for kind, rows in activity:
+        for discussion_id, forum_id, created_at in rows.iterator():
+            if discussion_id is not None:
+                add(discussions, discussion_id, kind, created_at)
+                add(forums, forum_id, kind, created_at)
+
+    for model, scores in ((Forum, forums), (Discussion, discussions)):
+        model.objects.bulk_update(
+            [model(id=pk, hot_score=score) for pk, score in scores.items()], ['hot_score'], batch_size=1000
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0014_reaction_counts'),
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('forums', '0006_search_vectors'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='discussion',
+            name='hot_score',
+            field=models.FloatField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='forum',
+            name='hot_score',
+            field=models.FloatField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_hot_scores, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='discussion',
+            index=models.Index(fields=['forum', '-is_pinned', '-hot_score'], name='discussion_hot_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='forum',
+            index=models.Index(fields=['-hot_score'], name='forum_hot_idx'),
+        ),
+    ]
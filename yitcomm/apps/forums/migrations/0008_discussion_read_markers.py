@@ -0,0 +1,41 @@
+# Generated by Django 5.0.6 on 2026-10-19 00:56
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('forums', '0007_hot_scores'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DiscussionReadMarker',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('read_at', models.DateTimeField()),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['discussion', 'created_at'], name='comment_discussion_created_idx'),
+        ),
+        migrations.AddField(
+            model_name='discussionreadmarker',
+            name='discussion',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='read_markers', to='forums.discussion'),
+        ),
+        migrations.AddField(
+            model_name='discussionreadmarker',
+            name='user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='discussion_read_markers', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddConstraint(
+            model_name='discussionreadmarker',
+            constraint=models.UniqueConstraint(fields=('user', 'discussion'), name='unique_discussion_read_marker'),
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 5.0.6 on 2026-10-19 01:07
+
+import math
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.db import migrations, models
+
+# Frozen copy of the apps.forums.hotness scoring at the time of this migration
+HOT_SCORE = getattr(settings, 'HOT_SCORE', {})
+VIEW_WEIGHT = HOT_SCORE.get('WEIGHTS', {}).get('view', 1)
+TAU = HOT_SCORE.get('HALF_LIFE_HOURS', 24) * 3600 / math.log(2)
+EPOCH = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+def seed_view_heat(apps, schema_editor):
+    # Existing views have no timestamps; 0007 counted them as of each row's creation
+    for model_name in ('Forum', 'Discussion'):
+        model = apps.get_model('forums', model_name)
+        rows = [
+            model(id=pk, view_heat=math.log(VIEW_WEIGHT * views) + (created_at - EPOCH).total_seconds() / TAU)
+            for pk, created_at, views in model.objects.filter(views__gt=0).values_list('id', 'created_at', 'views').iterator()
+        ]
+        model.objects.bulk_update(rows, ['view_heat'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('forums', '0008_discussion_read_markers'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='discussion',
+            name='view_heat',
+            field=models.FloatField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='forum',
+            name='view_heat',
+            field=models.FloatField(editable=False, null=True),
+        ),
+        migrations.RunPython(seed_view_heat, migrations.RunPython.noop),
+    ]
@@ -1,23 +1,21 @@
 from django.db import models
 from django.contrib.contenttypes.fields import GenericForeignKey
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.contrib.contenttypes.models import ContentType
+from apps.accounts.comment_paths import ThreadedComment, path_index
 from apps.accounts.models import TechCategory, User
 from django.contrib.contenttypes.fields import GenericRelation
-from django.db.models import Prefetch
-
-class DiscussionManager(models.Manager):
-    def with_reactions(self):
-        content_type = ContentType.objects.get_for_model(Discussion)
-        return self.get_queryset().prefetch_related(
-            Prefetch(
-                'reactions',
-                queryset=Reaction.objects.filter(
-                    content_type=content_type
-                ).select_related('user'),
-                to_attr='prefetched_reactions'
-            )
-        )
-    
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Greatest
+
+class ForumQuerySet(models.QuerySet):
+    def with_listing_relations(self):
+        """Everything ForumSerializer embeds, so a page of forums costs a fixed number of queries."""
+        return self.select_related(
+            'category', 'created_by', 'last_discussion__author', 'last_discussion__forum'
+        ).prefetch_related('created_by__groups__permissions')
+
 
 class Tag(models.Model):
     name = models.CharField(max_length=100, unique=True)
@@ -46,9 +44,26 @@ class Forum(models.Model):
     drafted = models.BooleanField(default=False)
     published = models.BooleanField(default=False)
     locked = models.BooleanField(default=False)
+    # Maintained by forums.signals so listings never aggregate over discussions
+    discussion_count = models.PositiveIntegerField(default=0)
+    last_discussion = models.ForeignKey(
+        'Discussion', null=True, blank=True, on_delete=models.SET_NULL, related_name='+'
+    )
+    last_activity_at = models.DateTimeField(null=True, blank=True)
+    # Time-decayed activity, maintained by forums.signals (see forums.hotness)
+    hot_score = models.FloatField(default=0, editable=False)
+    view_heat = models.FloatField(null=True, editable=False)
+    # Weighted title/description/category lexemes, maintained by forums.signals (see forums.search)
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    objects = ForumQuerySet.as_manager()
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            GinIndex(fields=['search_vector'], name='forum_search_idx'),
+            models.Index(fields=['-hot_score'], name='forum_hot_idx'),
+        ]
       
 
     def __str__(self):
@@ -59,9 +74,23 @@ class Forum(models.Model):
         self.followers_count = self.followers.count()
         self.save(update_fields=['followers_count'])
     
-    def increment_views(self):
-        self.views += 1
-        self.save(update_fields=['views'])
+    @staticmethod
+    def refresh_activity(forum_ids):
+        """Recompute the denormalized discussion fields of these forums in one UPDATE."""
+        discussions = Discussion.objects.filter(forum=OuterRef('pk'))
+        latest_discussion = discussions.order_by('-created_at', '-id')
+        latest_comment = Comment.objects.filter(discussion__forum=OuterRef('pk')).order_by('-created_at')
+        discussion_count = discussions.order_by().values('forum').annotate(total=Count('id')).values('total')
+        latest_discussion_at = Subquery(latest_discussion.values('created_at')[:1])
+        latest_comment_at = Subquery(latest_comment.values('created_at')[:1])
+        return Forum.objects.filter(pk__in=forum_ids).update(
+            discussion_count=Coalesce(Subquery(discussion_count), 0),
+            last_discussion=Subquery(latest_discussion.values('id')[:1]),
+            # GREATEST is NULL on some backends when either side is, hence the fallbacks
+            last_activity_at=Coalesce(
+                Greatest(latest_discussion_at, latest_comment_at), latest_discussion_at
+            ),
+        )
 
 
 class Forum_tags(models.Model):
@@ -108,11 +137,17 @@ class Discussion(models.Model):
     is_locked = models.BooleanField(default=False)
     omitted = models.BooleanField(default=False)
     views = models.PositiveIntegerField(default=0)
+    hot_score = models.FloatField(default=0, editable=False)
+    view_heat = models.FloatField(null=True, editable=False)
+    search_vector = SearchVectorField(null=True, editable=False)
     
     class Meta:
         ordering = ['-is_pinned', '-created_at']
         indexes = [
             models.Index(fields=['-created_at']),
+            GinIndex(fields=['search_vector'], name='discussion_search_idx'),
+            # ?ordering=hot within a forum, pinned discussions first
+            models.Index(fields=['forum', '-is_pinned', '-hot_score'], name='discussion_hot_idx'),
         ]
 
     def __str__(self):
@@ -126,10 +161,18 @@ class Discussion(models.Model):
         related_query_name='discussion'
     )
     
-    objects = DiscussionManager()
-    
 
-class Comment(models.Model):
+class CommentQuerySet(models.QuerySet):
+    def with_reply_counts(self):
+        """Annotate reply_count with a correlated subquery rather than a GROUP BY over the page."""
+        replies = (
+            Comment.objects.filter(parent=OuterRef('pk'))
+            .order_by().values('parent').annotate(total=Count('id')).values('total')
+        )
+        return self.annotate(reply_count=Coalesce(Subquery(replies), 0))
+
+
+class Comment(ThreadedComment):
     """Nested comments for discussions"""
     discussion = models.ForeignKey(Discussion, on_delete=models.CASCADE, related_name='comments')
     author = models.ForeignKey(User, on_delete=models.CASCADE, related_name='forum_comments')
@@ -137,13 +180,70 @@ class Comment(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     parent = models.ForeignKey('self', null=True, blank=True, on_delete=models.CASCADE)
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    reactions = GenericRelation(
+        Reaction,
+        content_type_field='content_type',
+        object_id_field='object_id',
+        related_query_name='comment'
+    )
+
+    objects = CommentQuerySet.as_manager()
 
     class Meta:
         ordering = ['created_at']
+        indexes = [
+            path_index('forums_comment_path_idx'),
+            GinIndex(fields=['search_vector'], name='comment_search_idx'),
+            # Unread counts: comments of a discussion newer than a read marker
+            models.Index(fields=['discussion', 'created_at'], name='comment_discussion_created_idx'),
+        ]
 
 
+class ForumActivity(models.Model):
+    """
+    One row per event in a forum too large to notify follower by follower.
+    Followers read these through their merged feed (see forums.feed).
+    """
+    ACTIVITY_TYPES = [
+        ('new_discussion', 'New discussion'),
+        ('new_comment', 'New comment'),
+        ('new_reaction', 'New reaction'),
+    ]
 
+    forum = models.ForeignKey(Forum, on_delete=models.CASCADE, related_name='activities')
+    activity_type = models.CharField(max_length=20, choices=ACTIVITY_TYPES)
+    actor = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    discussion = models.ForeignKey(Discussion, on_delete=models.CASCADE, null=True, blank=True, related_name='+')
+    title = models.CharField(max_length=200)
+    message = models.TextField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-created_at', '-id']
+        verbose_name_plural = 'forum activities'
+        indexes = [
+            models.Index(fields=['forum', '-created_at'], name='forum_activity_feed_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.activity_type} in {self.forum_id}: {self.title}"
 
-        
 
+class ForumFeedMarker(models.Model):
+    """A user's read watermark: feed activity newer than read_at is unread."""
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name='forum_feed_marker')
+    read_at = models.DateTimeField()
 
+
+class DiscussionReadMarker(models.Model):
+    """How far a user has read a discussion: comments newer than read_at are unread."""
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='discussion_read_markers')
+    discussion = models.ForeignKey(Discussion, on_delete=models.CASCADE, related_name='read_markers')
+    read_at = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'discussion'], name='unique_discussion_read_marker'),
+        ]
@@ -0,0 +1,25 @@
+from rest_framework.pagination import CursorPagination
+
+
+class CommentCursorPagination(CursorPagination):
+    """Keyset pagination in thread order, so deep pages of a long thread cost the same as the first."""
+    ordering = ('created_at', 'id')
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+
+class FeedCursorPagination(CursorPagination):
+    """Newest first over the (forum, -created_at) activity index."""
+    ordering = ('-created_at', '-id')
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+
+class FollowerCursorPagination(CursorPagination):
+    """Keyset pagination over a forum's followers; big forums never COUNT or OFFSET their follower list."""
+    ordering = ('-id',)
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
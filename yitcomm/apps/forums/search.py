@@ -0,0 +1,151 @@
+from django.conf import settings
+from django.contrib.postgres.search import SearchHeadline, SearchQuery, SearchRank, SearchVector
+from django.db import connection
+from django.db.models import F, OuterRef, Subquery
+from rest_framework.filters import BaseFilterBackend
+
+from apps.accounts.models import TechCategory
+from .models import Comment, Discussion, Forum
+
+# Text search configuration (stemming, stop words) used for both indexing and queries
+SEARCH_CONFIG = getattr(settings, 'SEARCH_CONFIG', 'english')
+
+HEADLINE_OPTIONS = {
+    'start_sel': '<mark>',
+    'stop_sel': '</mark>',
+    'max_fragments': 2,
+    'max_words': 30,
+    'min_words': 10,
+}
+
+
+def forum_vector(category_model=TechCategory):
+    category_name = Subquery(category_model.objects.filter(pk=OuterRef('category_id')).values('name')[:1])
+    return (
+        SearchVector('title', weight='A', config=SEARCH_CONFIG)
+        + SearchVector('description', weight='B', config=SEARCH_CONFIG)
+        + SearchVector(category_name, weight='C', config=SEARCH_CONFIG)
+    )
+
+
+def discussion_vector():
+    return (
+        SearchVector('title', weight='A', config=SEARCH_CONFIG)
+        + SearchVector('content', weight='B', config=SEARCH_CONFIG)
+    )
+
+
+def comment_vector():
+    return SearchVector('content', weight='B', config=SEARCH_CONFIG)
+
+
+# Model -> (fields the vector is built from, vector expression)
+INDEXED = {
+    Forum: (('title', 'description', 'category'), forum_vector),
+    Discussion: (('title', 'content'), discussion_vector),
+    Comment: (('content',), comment_vector),
+}
+
+
+def search_enabled():
+    return connection.vendor == 'postgresql'
+
+
+def update_search_vectors(queryset):
+    """Rebuild search_vector for every row of `queryset` in one UPDATE."""
+    if not search_enabled():
+        return 0
+    _, vector = INDEXED[queryset.model]
+    return queryset.update(search_vector=vector())
+
+
+def search_query(terms):
+    # websearch syntax: quoted phrases, OR, and -excluded words, never a syntax error
+    return SearchQuery(terms, search_type='websearch', config=SEARCH_CONFIG)
+
+
+def ranked(queryset, query):
+    return (
+        queryset.filter(search_vector=query)
+        .annotate(rank=SearchRank(F('search_vector'), query))
+        .order_by('-rank', '-pk')
+    )
+
+
+class SearchTarget:
+    """One searchable model: what is visible, and how a hit is presented."""
+
+    def __init__(self, queryset, body, describe):
+        self.queryset = queryset
+        self.body = body
+        self.describe = describe
+
+    def hits(self, query, limit):
+        # Rank everything that matches but build snippets only for the page shown:
+        # ts_headline re-parses the document, which is far dearer than the ranking
+        top = list(ranked(self.queryset(), query).values_list('pk', 'rank')[:limit])
+        if not top:
+            return []
+        rows = self.queryset().filter(pk__in=[pk for pk, _ in top]).defer('search_vector').annotate(
+            snippet=SearchHeadline(self.body, query, config=SEARCH_CONFIG, **HEADLINE_OPTIONS)
+        )
+        by_pk = {row.pk: row for row in rows}
+        return [
+            {**self.describe(by_pk[pk]), 'snippet': by_pk[pk].snippet, 'rank': round(rank, 4)}
+            for pk, rank in top if pk in by_pk
+        ]
+
+
+TARGETS = {
+    'forums': SearchTarget(
+        lambda: Forum.objects.filter(is_public=True, deleted=False),
+        'description',
+        lambda forum: {'id': forum.pk, 'title': forum.title},
+    ),
+    'discussions': SearchTarget(
+        lambda: Discussion.objects.filter(omitted=False, forum__is_public=True, forum__deleted=False),
+        'content',
+        lambda discussion: {'id': discussion.pk, 'title': discussion.title, 'forum_id': discussion.forum_id},
+    ),
+    'comments': SearchTarget(
+        lambda: Comment.objects.filter(
+            discussion__omitted=False, discussion__forum__is_public=True, discussion__forum__deleted=False
+        ).select_related('discussion').defer('discussion__content', 'discussion__search_vector'),
+        'content',
+        lambda comment: {
+            'id': comment.pk,
+            'discussion_id': comment.discussion_id,
+            'discussion_title': comment.discussion.title,
+            'forum_id': comment.discussion.forum_id,
+        },
+    ),
+}
+
+
+def search(terms, types=None, limit=10):
+    """Best `limit` hits per type for a websearch-style query, each with a highlighted snippet."""
+    query = search_query(terms)
+    return {kind: TARGETS[kind].hits(query, limit) for kind in (types or TARGETS)}
+
+
+class FullTextSearchFilter(BaseFilterBackend):
+    """
+    Drop-in for SearchFilter on forum listings: `?search=` matches the indexed
+    search_vector instead of ICONTAINS over joined columns, and orders by rank.
+    """
+    search_param = 'search'
+
+    def filter_queryset(self, request, queryset, view):
+        terms = request.query_params.get(self.search_param, '').strip()
+        if not terms:
+            return queryset
+        return ranked(queryset, search_query(terms))
+
+    def get_schema_operation_parameters(self, view):
+        return [{
+            'name': self.search_param,
+            'required': False,
+            'in': 'query',
+            'description': 'Full-text search over title, description and category.',
+            'schema': {'type': 'string'},
+        }]
@@ -1,9 +1,13 @@
 from rest_framework import serializers
 
-from apps.accounts.serializers import TechCategorySerializer, UserProfileSerializer
+from apps.accounts.serializers import PrefetchListSerializer, TechCategorySerializer, UserProfileSerializer
 from apps.accounts.models import TechCategory
-from apps.accounts.bookmark_util import get_bookmark_status
-from .models import Forum, Discussion, Comment, Reaction
+from apps.accounts.bookmark_util import BookmarkIndex, get_bookmark_status
+from apps.accounts.comment_paths import walk_threads
+from apps.accounts.reaction_counts import ReactionSummaryMixin
+from .follows import followed_forum_ids
+from .read_markers import unread_counts
+from .models import Forum, ForumActivity, Discussion, Comment, Reaction
 from django.contrib.contenttypes.models import ContentType
 
 class ReactionSerializer(serializers.ModelSerializer):
@@ -14,19 +18,39 @@ class ReactionSerializer(serializers.ModelSerializer):
         fields = ('user', 'reaction', 'created_at')
         read_only_fields = ('user', 'created_at')
 
-class CommentSerializer(serializers.ModelSerializer):
+class CommentSerializer(ReactionSummaryMixin, serializers.ModelSerializer):
     author = UserProfileSerializer(read_only=True)
-    reactions = ReactionSerializer(many=True, read_only=True)
-    reply_count = serializers.SerializerMethodField()
+    reaction_summary = serializers.SerializerMethodField()
+    reactions_count = serializers.SerializerMethodField()
+    user_reaction = serializers.SerializerMethodField()
+    # Annotated by Comment.objects.with_reply_counts(); a comment just posted has none
+    reply_count = serializers.IntegerField(read_only=True, default=0)
+
+    reaction_model = Reaction
     
     class Meta:
         model = Comment
         fields = ('id', 'author', 'content', 'created_at', 
-                 'updated_at', 'parent', 'reactions', 'reply_count')
-        read_only_fields = ('created_at', 'updated_at')
+                 'updated_at', 'parent', 'reaction_summary', 'reactions_count',
+                 'user_reaction', 'reply_count')
+        read_only_fields = ('created_at', 'updated_at', 'parent')
+        list_serializer_class = PrefetchListSerializer
+
+    def prime_page(self, comments):
+        """Reaction counts and the user's reactions for the page and any loaded replies"""
+        self.reactions_for(walk_threads(comments))
+
 
-    def get_reply_count(self, obj):
-        return obj.comment_set.count()
+class CommentThreadSerializer(CommentSerializer):
+    """A comment with its loaded subtree nested under `replies`."""
+    replies = serializers.SerializerMethodField()
+
+    class Meta(CommentSerializer.Meta):
+        fields = CommentSerializer.Meta.fields + ('depth', 'replies')
+
+    def get_replies(self, obj):
+        # Set by comment_paths.load_threads; leaves at the depth limit report their reply_count only
+        return CommentThreadSerializer(getattr(obj, 'thread_replies', []), many=True, context=self.context).data
 
 
 class DiscussionCreateSerializer(serializers.ModelSerializer):
@@ -35,68 +59,103 @@ class DiscussionCreateSerializer(serializers.ModelSerializer):
     class Meta:
         model = Discussion
         fields = ('title', 'content', 'forum', 'author')
+        read_only_fields = ('author',)
     
     def create(self, validated_data):
         discussion = Discussion.objects.create(**validated_data)
         return discussion
     
 
-class DiscussionSerializer(serializers.ModelSerializer):
+class DiscussionSerializer(ReactionSummaryMixin, serializers.ModelSerializer):
     author = UserProfileSerializer(read_only=True)
     forum = serializers.PrimaryKeyRelatedField(read_only=True)
-    reactions = serializers.SerializerMethodField()
-    comments = CommentSerializer(many=True, read_only=True)
+    reaction_summary = serializers.SerializerMethodField()
     reactions_count = serializers.SerializerMethodField()
     user_reaction = serializers.SerializerMethodField()
+    # Null until the user has opened the discussion
+    last_read_at = serializers.SerializerMethodField()
+    unread_count = serializers.SerializerMethodField()
+
+    reaction_model = Reaction
     
     class Meta:
         model = Discussion
         fields = ('id', 'title', 'content', 'author', 'forum',
                  'created_at', 'updated_at', 'is_pinned', 'is_locked',
-                 'views', 'reactions', 'comments', 'user_reaction', 'reactions_count')
+                 'views', 'reaction_summary', 'user_reaction', 'reactions_count',
+                 'last_read_at', 'unread_count')
         read_only_fields = ('created_at', 'updated_at', 'views')
-    
-    def get_user_reaction(self, obj):
-        user = self.context['request'].user
-        if user.is_authenticated:
-            reaction = obj.reactions.filter(user=user).first()
-            return reaction.reaction if reaction else None
-        return None
-    
-    def get_reactions(self, obj):
-        if hasattr(obj, 'prefetched_reactions'):
-            return ReactionSerializer(obj.prefetched_reactions, many=True).data
-        return ReactionSerializer(obj.reactions.all(), many=True).data
-    
-    def get_reactions_count(self, obj):
-        if hasattr(obj, 'prefetched_reactions'):
-            return len(obj.prefetched_reactions)
-        return obj.reactions.count()
+        list_serializer_class = PrefetchListSerializer
+
+    def prime_page(self, discussions):
+        """Reactions (two queries) and the user's unread counts (one) for the whole page"""
+        self.reactions_for(discussions)
+        self.context['read_markers'] = self._read_markers(discussions)
+
+    def _read_markers(self, discussions):
+        request = self.context.get('request')
+        return unread_counts(request.user if request else None, [discussion.pk for discussion in discussions])
+
+    def _read_marker(self, obj):
+        markers = self.context.get('read_markers')
+        if markers is None:
+            markers = self._read_markers([obj])
+        return markers.get(obj.pk, (None, None))
+
+    def get_last_read_at(self, obj):
+        read_at = self._read_marker(obj)[0]
+        return serializers.DateTimeField().to_representation(read_at) if read_at else None
+
+    def get_unread_count(self, obj):
+        return self._read_marker(obj)[1]
     
 
+class DiscussionSummarySerializer(serializers.ModelSerializer):
+    """Slim discussion representation for bookmark and forum listings"""
+    author = serializers.CharField(source='author.username', read_only=True)
+    forum_title = serializers.CharField(source='forum.title', read_only=True)
+
+    class Meta:
+        model = Discussion
+        fields = ('id', 'title', 'author', 'forum', 'forum_title', 'created_at', 'views')
+
+
 class ForumSerializer(serializers.ModelSerializer):
     category = TechCategorySerializer(read_only=True)
-    discussion_count = serializers.IntegerField(read_only=True)
-    latest_discussion = serializers.SerializerMethodField()
+    # Denormalized on Forum; list views select_related the discussion, author and forum
+    latest_discussion = DiscussionSummarySerializer(source='last_discussion', read_only=True)
     created_by = UserProfileSerializer(read_only=True)
     views = serializers.IntegerField(read_only=True)
     bookmark_status = serializers.SerializerMethodField()
+    is_following = serializers.SerializerMethodField()
 
     
     class Meta:
         model = Forum
         fields = ('id', 'title', 'description', 'category',
-                 'created_by', 'created_at', 'discussion_count',
-                 'latest_discussion', 'is_public', 'locked', 'views', 'followers_count', 'bookmark_status')
-        read_only_fields = ('created_at', 'discussion_count')
+                 'created_by', 'created_at', 'discussion_count', 'last_activity_at',
+                 'latest_discussion', 'is_public', 'locked', 'views', 'followers_count', 'bookmark_status',
+                 'is_following')
+        read_only_fields = ('created_at', 'discussion_count', 'last_activity_at', 'followers_count')
+        list_serializer_class = PrefetchListSerializer
+
+    def prime_page(self, forums):
+        """Load the requesting user's bookmarks and follows for the whole page, one query each"""
+        request = self.context.get('request')
+        if request:
+            self.context['bookmark_index'] = BookmarkIndex(request.user, forums)
+            self.context['followed_forum_ids'] = followed_forum_ids(request.user, [forum.pk for forum in forums])
     
     def get_bookmark_status(self, obj):
         request = self.context.get('request')
-        return get_bookmark_status(request.user if request else None, obj)
+        return get_bookmark_status(request.user if request else None, obj, self.context.get('bookmark_index'))
 
-    def get_latest_discussion(self, obj):
-        discussion = obj.discussions.order_by('-created_at').first()
-        return DiscussionSerializer(discussion, context=self.context).data if discussion else None
+    def get_is_following(self, obj):
+        followed = self.context.get('followed_forum_ids')
+        if followed is None:
+            request = self.context.get('request')
+            followed = followed_forum_ids(request.user if request else None, [obj.pk])
+        return obj.pk in followed
 
 class ForumCreateSerializer(ForumSerializer):
     category = serializers.PrimaryKeyRelatedField(queryset=TechCategory.objects.all())
@@ -112,4 +171,28 @@ class CategoryWithForumStatsSerializer(serializers.ModelSerializer):
     
     class Meta:
         model = TechCategory
-        fields = ['id', 'name', 'forum_count', 'active_forum_count', 'public_forum_count']
\ No newline at end of file
+        fields = ['id', 'name', 'forum_count', 'active_forum_count', 'public_forum_count']
+
+
+class ForumSummarySerializer(serializers.ModelSerializer):
+    """Slim forum representation for bookmark listings"""
+    category = serializers.CharField(source='category.name', read_only=True)
+
+    class Meta:
+        model = Forum
+        fields = ('id', 'title', 'description', 'category', 'created_at', 'followers_count', 'views')
+
+
+class ForumActivitySerializer(serializers.ModelSerializer):
+    forum_title = serializers.CharField(source='forum.title', read_only=True)
+    actor = serializers.CharField(source='actor.username', read_only=True, default=None)
+    is_unread = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ForumActivity
+        fields = ('id', 'forum', 'forum_title', 'activity_type', 'actor', 'discussion',
+                  'title', 'message', 'created_at', 'is_unread')
+
+    def get_is_unread(self, obj):
+        read_at = self.context.get('read_at')
+        return read_at is None or obj.created_at > read_at
@@ -1,99 +1,159 @@
-from django.db.models.signals import post_save
+from django.db.models import F, QuerySet
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 from django.contrib.contenttypes.models import ContentType
-from django.core.mail import send_mail
-from django.template.loader import render_to_string
-from django.conf import settings
 
-from apps.accounts.models import Notification, User
+from apps.accounts.models import Notification, TechCategory
+from apps.accounts.notifications import notify_users
+from apps.accounts.write_buffer import counters_flushed
+from .feed import fans_out_on_write, record_activity
+from .hotness import heat, heat_many
+from .read_markers import mark_read
 from .models import Discussion, Comment, Reaction, Forum
-from ..newsletters.signals import send_email_via_smtp
+from .search import INDEXED, update_search_vectors
 
 
 @receiver(post_save, sender=Discussion)
 def notify_followers_new_discussion(sender, instance, created, **kwargs):
     """
-    Notify all followers of a forum when a new discussion is created
-    and send email to forum author
+    Notify all followers of a forum, and the forum creator, when a new
+    discussion is created. The creator hears about it through their
+    notification digest rather than an email per discussion. Followers of
+    large forums see it in their activity feed instead.
     """
     if created:
         forum = instance.forum
-        followers = forum.followers.exclude(id=instance.author.id)
+        title = f"New discussion in {forum.title}"
+        message = f"{instance.author.username} started a new discussion: {instance.title}"
+
+        recipient_ids = set()
+        if fans_out_on_write(forum):
+            recipient_ids.update(forum.followers.exclude(id=instance.author_id).values_list('id', flat=True))
+        else:
+            record_activity(forum, 'new_discussion', instance.author, instance, title, message)
+        if forum.created_by_id != instance.author_id:
+            recipient_ids.add(forum.created_by_id)
 
         # Create notifications for followers
+        content_type = ContentType.objects.get_for_model(instance)
         notifications = [
             Notification(
-                user=follower,
+                user_id=user_id,
                 notification_type='new_discussion',
-                title=f"New discussion in {forum.title}",
-                message=f"{instance.author.username} started a new discussion: {instance.title}",
-                content_type=ContentType.objects.get_for_model(instance),
+                title=title,
+                message=message,
+                content_type=content_type,
                 object_id=instance.id
             )
-            for follower in followers
+            for user_id in recipient_ids
         ]
         Notification.objects.bulk_create(notifications)
 
-        # Send email to forum author (if different from discussion author)
-        if forum.created_by != instance.author:
-            send_discussion_notification_email(forum.created_by, instance, forum)
-
-
-def send_discussion_notification_email(forum_author, discussion, forum):
-    """Send email notification to forum author about new discussion"""
-    subject = f"New Discussion in Your Forum: {forum.title}"
-
-    # HTML email template
-    html_content = f"""
-    <html>
-      <head></head>
-      <body style="font-family: Arial, sans-serif; line-height: 1.6;">
-        <div style="max-width: 600px; margin: 0 auto; padding: 20px; border: 1px solid #ddd; border-radius: 5px;">
-          <h2 style="color: #4a6baf;">New Discussion in Your Forum</h2>
-          <h3>{forum.title}</h3>
-          <p><strong>New discussion started by:</strong> {discussion.author.username}</p>
-          <p><strong>Discussion title:</strong> {discussion.title}</p>
-          <p><strong>Content:</strong> {discussion.content[:200]}...</p>
-          <div style="text-align: center; margin: 30px 0;">
-            <a href="{getattr(settings, 'SITE_URL', 'http://localhost:8000')}/forums/{forum.id}" 
-               style="background: #4a6baf; color: white; padding: 12px 24px; 
-                      text-decoration: none; border-radius: 4px; display: inline-block;">
-              View Forum
-            </a>
-          </div>
-          <p style="margin-top: 30px; font-size: 0.9em; color: #666;">
-            You received this email because you created this forum.
-          </p>
-        </div>
-      </body>
-    </html>
-    """
 
-    # Plain text version
-    text_content = f"""
-    New Discussion in Your Forum: {forum.title}
+def _deleted_directly(origin, model):
+    """True unless the row is going away in a cascade from some other model's delete."""
+    if isinstance(origin, QuerySet):
+        return origin.model is model
+    return isinstance(origin, model)
 
-    New discussion started by: {discussion.author.username}
-    Discussion title: {discussion.title}
-    Content: {discussion.content[:200]}...
 
-    View the forum here: {getattr(settings, 'SITE_URL', 'http://localhost:8000')}/forums/{forum.id}
+@receiver(post_save, sender=Forum)
+def track_new_forum(sender, instance, created, **kwargs):
+    if created:
+        Forum.objects.filter(pk=instance.pk).update(hot_score=heat('forum', instance.created_at))
 
-    You received this email because you created this forum.
-    """
 
-    print(f"====================SENDING DISCUSSION NOTIFICATION TO: {forum_author.email}")
-    send_email_via_smtp(
-        recipient=forum_author.email,
-        subject=subject,
-        html_content=html_content,
-        text_content=text_content
+@receiver(post_save, sender=Discussion)
+def track_new_discussion(sender, instance, created, **kwargs):
+    """Keep the forum's discussion count, latest-discussion pointer and hot score current."""
+    if created:
+        Discussion.objects.filter(pk=instance.pk).update(hot_score=heat('discussion', instance.created_at))
+        Forum.objects.filter(pk=instance.forum_id).update(
+            discussion_count=F('discussion_count') + 1,
+            last_discussion=instance,
+            last_activity_at=instance.created_at,
+            hot_score=heat('discussion', instance.created_at),
+        )
+
+
+@receiver(post_save, sender=Comment)
+def track_new_comment(sender, instance, created, **kwargs):
+    if created:
+        # Commenting means the author has caught up with the discussion
+        mark_read(instance.author, instance.discussion_id, instance.created_at)
+        Discussion.objects.filter(pk=instance.discussion_id).update(hot_score=heat('comment', instance.created_at))
+        Forum.objects.filter(discussions=instance.discussion_id).update(
+            last_activity_at=instance.created_at,
+            hot_score=heat('comment', instance.created_at),
+        )
+
+
+@receiver(post_save, sender=Reaction)
+def track_new_reaction(sender, instance, created, **kwargs):
+    """A reaction to a discussion, or to one of its comments, heats the discussion and its forum."""
+    if not created:
+        return
+    target = instance.content_type.model_class()
+    if target is Discussion:
+        discussions = Discussion.objects.filter(pk=instance.object_id)
+    elif target is Comment:
+        discussions = Discussion.objects.filter(comments=instance.object_id)
+    else:
+        return
+    discussions.update(hot_score=heat('reaction', instance.created_at))
+    Forum.objects.filter(discussions__in=discussions.values('pk')).update(
+        hot_score=heat('reaction', instance.created_at)
     )
 
+
+@receiver(counters_flushed)
+def track_views(sender, field, deltas, **kwargs):
+    # Buffered views arrive in batches from accounts.write_buffer
+    if field == 'views' and sender in (Forum, Discussion):
+        heat_many(sender, deltas, 'view')
+
+
+@receiver(post_delete, sender=Discussion)
+def track_deleted_discussion(sender, instance, origin=None, **kwargs):
+    # Deleting a forum takes its discussions with it; nothing left to update
+    if _deleted_directly(origin, Discussion):
+        Forum.refresh_activity([instance.forum_id])
+
+
+@receiver(post_delete, sender=Comment)
+def track_deleted_comment(sender, instance, origin=None, **kwargs):
+    # Skip comments removed along with their discussion, which refreshes the forum itself
+    if _deleted_directly(origin, Comment):
+        Forum.refresh_activity(Forum.objects.filter(discussions=instance.discussion_id).values('pk'))
+
+
+@receiver(post_save, sender=Forum)
+@receiver(post_save, sender=Discussion)
+@receiver(post_save, sender=Comment)
+def refresh_search_vector(sender, instance, update_fields=None, raw=False, **kwargs):
+    """Re-index the row, unless the save only touched fields the search vector ignores."""
+    if raw:
+        return
+    indexed_fields = INDEXED[sender][0]
+    if update_fields is not None and not any(
+        field in update_fields or f'{field}_id' in update_fields for field in indexed_fields
+    ):
+        return
+    update_search_vectors(sender.objects.filter(pk=instance.pk))
+
+
+@receiver(post_save, sender=TechCategory)
+def refresh_category_forums_search(sender, instance, created, update_fields=None, raw=False, **kwargs):
+    # Forum vectors include the category name
+    if not created and not raw and (update_fields is None or 'name' in update_fields):
+        update_search_vectors(Forum.objects.filter(category=instance))
+
+
 @receiver(post_save, sender=Reaction)
 def notify_reaction_to_followers(sender, instance, created, **kwargs):
     """
-    Notify forum followers when someone reacts to a discussion
+    Notify forum followers when someone reacts to a discussion.
+    Reactions on the same discussion are coalesced into one notification per user.
     """
     if created:
         content_object = instance.content_object
@@ -103,80 +163,82 @@ def notify_reaction_to_followers(sender, instance, created, **kwargs):
             discussion = content_object
             forum = discussion.forum
 
-            # Get followers excluding the user who reacted
-            followers = forum.followers.exclude(id=instance.user.id)
+            if fans_out_on_write(forum):
+                # Get followers excluding the user who reacted and the discussion author
+                follower_ids = forum.followers.exclude(
+                    id__in=[instance.user_id, discussion.author_id]
+                ).values_list('id', flat=True)
 
-            notifications = [
-                Notification(
-                    user=follower,
+                notify_users(
+                    follower_ids,
                     notification_type='new_reaction',
-                    title=f"New reaction on discussion in {forum.title}",
-                    message=f"{instance.user.username} reacted with {instance.reaction} to {discussion.title}",
-                    content_type=ContentType.objects.get_for_model(instance),
-                    object_id=instance.id
+                    target=discussion,
+                    actor=instance.user,
+                    title=f"New reactions on discussion in {forum.title}",
+                    action=f"reacted to {discussion.title}",
+                )
+            else:
+                record_activity(
+                    forum, 'new_reaction', instance.user, discussion,
+                    title=f"New reactions on discussion in {forum.title}",
+                    message=f"{instance.user.username} reacted to {discussion.title}",
                 )
-                for follower in followers
-            ]
-
-            if notifications:
-                Notification.objects.bulk_create(notifications)
 
             # Also notify the discussion author if it's not the reactor
-            if discussion.author != instance.user:
-                Notification.objects.create(
-                    user=discussion.author,
+            if discussion.author_id != instance.user_id:
+                notify_users(
+                    [discussion.author_id],
                     notification_type='new_reaction',
-                    title=f"New reaction on your discussion",
-                    message=f"{instance.user.username} reacted with {instance.reaction} to your discussion",
-                    content_type=ContentType.objects.get_for_model(instance),
-                    object_id=instance.id
+                    target=discussion,
+                    actor=instance.user,
+                    title="New reactions on your discussion",
+                    action="reacted to your discussion",
                 )
 
 
-
+@receiver(post_save, sender=Comment)
 def notify_discussion_participants_and_followers(sender, instance, created, **kwargs):
     """
-    Notify discussion participants AND forum followers when a new comment is added
+    Notify discussion participants AND forum followers when a new comment is added.
+    Comments on the same discussion are coalesced into one notification per user;
+    followers of large forums get one feed entry instead.
     """
     if created:
         discussion = instance.discussion
         forum = discussion.forum
 
-        # Get forum followers excluding the comment author
-        forum_followers = forum.followers.exclude(id=instance.author.id)
-
         # Notify discussion author if it's not the comment author
-        if discussion.author != instance.author:
-            Notification.objects.create(
-                user=discussion.author,
+        if discussion.author_id != instance.author_id:
+            notify_users(
+                [discussion.author_id],
                 notification_type='new_comment',
-                title=f"New comment on your discussion",
-                message=f"{instance.author.username} commented on your discussion: {discussion.title}",
-                content_type=ContentType.objects.get_for_model(instance),
-                object_id=instance.id
+                target=discussion,
+                actor=instance.author,
+                title="New comments on your discussion",
+                action=f"commented on your discussion: {discussion.title}",
             )
 
-        # Notify other commenters (excluding discussion author and comment author)
-        other_commenters = User.objects.filter(
-            forum_comments__discussion=discussion
-        ).exclude(
-            id__in=[discussion.author.id, instance.author.id]
-        ).distinct()
-
-        # Combine forum followers and other commenters, removing duplicates
-        all_recipients = set(forum_followers) | set(other_commenters)
-
-        notifications = [
-            Notification(
-                user=recipient,
-                notification_type='new_comment',
-                title=f"New comment on {discussion.title}",
+        excluded = [discussion.author_id, instance.author_id]
+
+        # Other commenters, excluding discussion author and comment author
+        recipient_ids = set(
+            Comment.objects.filter(discussion=discussion).exclude(author_id__in=excluded)
+            .order_by().values_list('author_id', flat=True).distinct()
+        )
+        if fans_out_on_write(forum):
+            recipient_ids.update(forum.followers.exclude(id__in=excluded).values_list('id', flat=True))
+        else:
+            record_activity(
+                forum, 'new_comment', instance.author, discussion,
+                title=f"New comments on {discussion.title}",
                 message=f"{instance.author.username} commented on {discussion.title} in {forum.title}",
-                content_type=ContentType.objects.get_for_model(instance),
-                object_id=instance.id
             )
-            for recipient in all_recipients
-        ]
 
-        if notifications:
-            Notification.objects.bulk_create(notifications)
\ No newline at end of file
+        notify_users(
+            recipient_ids,
+            notification_type='new_comment',
+            target=discussion,
+            actor=instance.author,
+            title=f"New comments on {discussion.title}",
+            action=f"commented on {discussion.title} in {forum.title}",
+        )
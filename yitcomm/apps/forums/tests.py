@@ -1,3 +1,164 @@
-from django.test import TestCase
+import math
+from datetime import timedelta
 
-# Create your tests here.
+from django.contrib.contenttypes.models import ContentType
+from django.test import SimpleTestCase, TestCase
+from django.utils import timezone
+
+from apps.accounts.comment_paths import MAX_DEPTH, STEP, path_segment, rebuild_paths
+from apps.accounts.models import ReactionCount, TechCategory, User
+from . import hotness
+from .models import Comment, Discussion, Forum, Reaction
+
+
+def make_discussion(user, title='Thread'):
+    category, _ = TechCategory.objects.get_or_create(name='Testing')
+    forum = Forum.objects.create(title='Forum', description='About testing', category=category, created_by=user)
+    return Discussion.objects.create(forum=forum, title=title, content='Body', author=user)
+
+
+class HotnessTests(SimpleTestCase):
+    def test_newer_events_score_higher(self):
+        now = timezone.now()
+        self.assertGreater(hotness.event_score('view', now), hotness.event_score('view', now - timedelta(hours=1)))
+
+    def test_weights_order_events_at_the_same_time(self):
+        now = timezone.now()
+        scores = [hotness.event_score(kind, now) for kind in ('view', 'reaction', 'comment', 'discussion')]
+        self.assertEqual(scores, sorted(scores))
+        self.assertAlmostEqual(
+            hotness.event_score('view', now, count=5) - hotness.event_score('view', now), math.log(5)
+        )
+
+    def test_one_half_life_halves_the_weight(self):
+        now = timezone.now()
+        half_life = timedelta(hours=hotness.HOT_SCORE['HALF_LIFE_HOURS'])
+        self.assertAlmostEqual(
+            hotness.event_score('comment', now) - hotness.event_score('comment', now - half_life), math.log(2)
+        )
+
+    def test_log_add(self):
+        self.assertAlmostEqual(hotness.log_add(math.log(2), math.log(3)), math.log(5))
+        self.assertEqual(hotness.log_add(1.5, 0.5), hotness.log_add(0.5, 1.5))
+        # Terms far beyond exp()'s range do not overflow
+        self.assertAlmostEqual(hotness.log_add(5000.0, 5000.0), 5000.0 + math.log(2))
+
+    def test_later_activity_outranks_more_older_activity(self):
+        now = timezone.now()
+        old = hotness.event_score('comment', now - timedelta(days=7))
+        for _ in range(9):
+            old = hotness.log_add(old, hotness.event_score('comment', now - timedelta(days=7)))
+        self.assertGreater(hotness.event_score('comment', now), old)
+
+
+class HotScoreTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(username='author', email='author@example.com')
+        self.discussion = make_discussion(self.user)
+
+    def test_activity_raises_the_score(self):
+        before = self.discussion.hot_score
+        Comment.objects.create(discussion=self.discussion, author=self.user, content='Reply')
+        self.discussion.refresh_from_db()
+        self.assertGreater(self.discussion.hot_score, before)
+
+    def test_recompute_keeps_view_heat(self):
+        hotness.heat_many(Discussion, {self.discussion.pk: 10}, 'view')
+        self.discussion.refresh_from_db()
+        expected = self.discussion.hot_score
+        self.assertIsNotNone(self.discussion.view_heat)
+
+        hotness.recompute(Forum, Discussion, Comment, Reaction)
+        self.discussion.refresh_from_db()
+        self.assertAlmostEqual(self.discussion.hot_score, expected)
+
+
+class CommentPathTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(username='author', email='author@example.com')
+        self.discussion = make_discussion(self.user)
+
+    def comment(self, parent=None):
+        return Comment.objects.create(discussion=self.discussion, author=self.user, content='Text', parent=parent)
+
+    def test_paths_extend_the_parent(self):
+        root = self.comment()
+        reply = self.comment(root)
+        nested = self.comment(reply)
+        self.assertEqual(root.path, path_segment(root.pk))
+        self.assertEqual(len(root.path), STEP)
+        self.assertEqual(nested.path, root.path + path_segment(reply.pk) + path_segment(nested.pk))
+        self.assertEqual([root.depth, reply.depth, nested.depth], [0, 1, 2])
+
+    def test_subtree_is_in_thread_order(self):
+        root = self.comment()
+        first = self.comment(root)
+        second = self.comment(root)
+        first_child = self.comment(first)
+        self.comment()
+        self.assertEqual(list(root.subtree()), [first, first_child, second])
+        self.assertEqual(list(root.subtree(max_depth=1)), [first, second])
+
+    def test_depth_is_clamped(self):
+        parent = None
+        for _ in range(MAX_DEPTH):
+            parent = self.comment(parent)
+        self.assertEqual(parent.depth, MAX_DEPTH - 1)
+
+        overflow = self.comment(parent)
+        self.assertEqual(overflow.parent_id, parent.parent_id)
+        self.assertEqual(overflow.depth, MAX_DEPTH - 1)
+        self.assertLessEqual(len(overflow.path), Comment._meta.get_field('path').max_length)
+
+    def test_rebuild_paths(self):
+        root = self.comment()
+        reply = self.comment(root)
+        nested = self.comment(reply)
+        Comment.objects.update(path='', depth=0)
+
+        self.assertEqual(rebuild_paths(Comment), 3)
+        rebuilt = {comment.pk: (comment.path, comment.depth) for comment in Comment.objects.all()}
+        self.assertEqual(rebuilt, {
+            root.pk: (root.path, 0),
+            reply.pk: (reply.path, 1),
+            nested.pk: (nested.path, 2),
+        })
+
+
+class ReactionCountTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(username='author', email='author@example.com')
+        self.discussion = make_discussion(self.user)
+        self.content_type = ContentType.objects.get_for_model(Discussion)
+
+    def counts(self):
+        return dict(
+            ReactionCount.objects.filter(content_type=self.content_type, object_id=self.discussion.pk)
+            .values_list('reaction', 'count')
+        )
+
+    def react(self, user, reaction):
+        return Reaction.objects.create(
+            user=user, content_type=self.content_type, object_id=self.discussion.pk, reaction=reaction
+        )
+
+    def test_create_change_and_delete(self):
+        other = User.objects.create(username='other', email='other@example.com')
+        reaction = self.react(self.user, '👍')
+        self.react(other, '👍')
+        self.assertEqual(self.counts(), {'👍': 2})
+
+        reaction.reaction = '🔥'
+        reaction.save()
+        self.assertEqual(self.counts(), {'👍': 1, '🔥': 1})
+
+        reaction.delete()
+        self.assertEqual(self.counts(), {'👍': 1, '🔥': 0})
+
+    def test_change_of_a_reloaded_row(self):
+        self.react(self.user, '👍')
+        reaction = Reaction.objects.get()
+        reaction.reaction = '🚀'
+        reaction.save()
+        Reaction.objects.get().delete()
+        self.assertEqual(self.counts(), {'👍': 0, '🚀': 0})
@@ -8,7 +8,13 @@ from .views import (
     ForumDetailView,
     DiscussionListCreateView,
     DiscussionDetailView,
-    ReactionView, MyForumListCreateView
+    DiscussionCommentListCreateView,
+    CommentReplyListCreateView,
+    CommentThreadView,
+    ReactionView, MyForumListCreateView,
+    ForumFeedView,
+    ForumFeedMarkerView,
+    SearchView,
 )
 
 urlpatterns = [
@@ -17,9 +23,15 @@ urlpatterns = [
     path('forums/<int:pk>/', ForumDetailView.as_view(), name='forum-detail'),
     path('forums/<int:forum_id>/discussions/', DiscussionListCreateView.as_view(), name='discussion-list'),
     path('discussions/<int:pk>/', DiscussionDetailView.as_view(), name='discussion-detail'),
+    path('discussions/<int:discussion_id>/comments/', DiscussionCommentListCreateView.as_view(), name='discussion-comments'),
+    path('comments/<int:comment_id>/replies/', CommentReplyListCreateView.as_view(), name='comment-replies'),
+    path('comments/<int:pk>/thread/', CommentThreadView.as_view(), name='comment-thread'),
     path('reactions/<str:content_type>/<int:object_id>/', ReactionView.as_view(), name='reaction'),
     path('forums/<int:forum_id>/follow/', FollowForumView.as_view(), name='forum-follow'),
     path('forums/<int:forum_id>/followers/', ForumFollowersView.as_view(), name='forum-followers'),
+    path('feed/', ForumFeedView.as_view(), name='forum-feed'),
+    path('feed/marker/', ForumFeedMarkerView.as_view(), name='forum-feed-marker'),
+    path('search/', SearchView.as_view(), name='forum-search'),
     path('forum-categories/', ForumCategoriesListView.as_view(), name='forum-categories-list'),
     path('forums/<int:forum_id>/check-follow/', CheckForumFollowStatus.as_view(), name='check-forum-follow'),
 ]
\ No newline at end of file
@@ -1,32 +1,41 @@
+from django.http import Http404
 from django.shortcuts import get_object_or_404
-from rest_framework import generics, permissions, status, filters
+from rest_framework import generics, permissions, status
+from rest_framework.exceptions import PermissionDenied
 from rest_framework.response import Response
 
-from apps.accounts.models import Bookmark, Notification
-from apps.accounts.serializers import UserSerializer
+from apps.accounts.models import Bookmark, User
+from apps.accounts.serializers import UserListSerializer
 from .models import Forum, Discussion, Comment, Reaction
-from .serializers import CategoryWithForumStatsSerializer, DiscussionCreateSerializer, ForumCreateSerializer, ForumSerializer, DiscussionSerializer, CommentSerializer, ReactionSerializer
+from .serializers import CategoryWithForumStatsSerializer, CommentThreadSerializer, DiscussionCreateSerializer, ForumActivitySerializer, ForumCreateSerializer, ForumSerializer, DiscussionSerializer, CommentSerializer, ReactionSerializer
+from .feed import feed_for, mark_feed_read, read_marker, unread_count
+from .follows import follow, is_following, unfollow
+from .read_markers import mark_read
+from .pagination import CommentCursorPagination, FeedCursorPagination, FollowerCursorPagination
+from .search import TARGETS, FullTextSearchFilter, search
 from .permissions import IsOwnerOrModerator
 from django.contrib.contenttypes.models import ContentType
 from django_filters.rest_framework import DjangoFilterBackend
 from django.db.models import Count, Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
 from apps.accounts.models import TechCategory
+from apps.accounts.category_tree import get_category_tree
+from apps.accounts.comment_paths import load_threads
+from apps.accounts.write_buffer import record_view
 
 
 class ForumListCreateView(generics.ListCreateAPIView):
     serializer_class = ForumSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter]
+    filter_backends = [DjangoFilterBackend, FullTextSearchFilter]
     filterset_fields = ['category', 'is_active', 'is_public', 'followers']  # Added 'followers'
-    search_fields = ['title', 'description', 'category__name']
     
     def get_serializer_class(self):
         return ForumCreateSerializer if self.request.method == 'POST' else ForumSerializer
     
     def get_queryset(self):
-        queryset = Forum.objects.filter(is_public=True).annotate(
-            discussion_count=Count('discussions', distinct=True)
-        ).select_related('category', 'created_by')
+        queryset = Forum.objects.filter(is_public=True).with_listing_relations()
 
         # Filter for followed forums if requested
         followed_by = self.request.query_params.get('followed_by')
@@ -39,6 +48,13 @@ class ForumListCreateView(generics.ListCreateAPIView):
                     queryset = queryset.filter(followers__id=user_id)
                 except (ValueError, TypeError):
                     pass
+
+        # ?under_category=<id> matches the category and all of its subcategories
+        under_category = self.request.query_params.get('under_category')
+        if under_category and under_category.isdigit():
+            queryset = queryset.filter(
+                category_id__in=get_category_tree().descendant_ids(int(under_category))
+            )
         
         # Filter for bookmarked forums if requested
         bookmarked = self.request.query_params.get('bookmarked')
@@ -56,12 +72,15 @@ class ForumListCreateView(generics.ListCreateAPIView):
 
     
 
-        # Increment views if a single forum is being retrieved
-        if self.request.query_params.get('id'):
-            forum_id = self.request.query_params.get('id')
-            forum = queryset.filter(id=forum_id).first()
-            if forum:
-                forum.increment_views()
+        # ?ordering=hot: trending first, read straight off the hot_score index
+        if self.request.query_params.get('ordering') == 'hot':
+            queryset = queryset.order_by('-hot_score', '-id')
+
+        # Count a view if a single forum is being retrieved (buffered, see accounts.write_buffer)
+        forum_id = self.request.query_params.get('id')
+        if forum_id and forum_id.isdigit():
+            if queryset.filter(id=forum_id).exists():
+                record_view(Forum(pk=int(forum_id)), self.request)
 
         return queryset
 
@@ -69,17 +88,14 @@ class ForumListCreateView(generics.ListCreateAPIView):
 class MyForumListCreateView(generics.ListCreateAPIView):
     serializer_class = ForumSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter]
+    filter_backends = [DjangoFilterBackend, FullTextSearchFilter]
     filterset_fields = ['category', 'is_active', 'is_public', 'followers']
-    search_fields = ['title', 'description', 'category__name']
 
     def get_serializer_class(self):
         return ForumCreateSerializer if self.request.method == 'POST' else ForumSerializer
 
     def get_queryset(self):
-        queryset = Forum.objects.filter(is_public=True, created_by=self.request.user).annotate(
-            discussion_count=Count('discussions', distinct=True)
-        ).select_related('category', 'created_by')
+        queryset = Forum.objects.filter(is_public=True, created_by=self.request.user).with_listing_relations()
 
         # Filter for followed forums if requested
         followed_by = self.request.query_params.get('followed_by')
@@ -93,12 +109,11 @@ class MyForumListCreateView(generics.ListCreateAPIView):
                 except (ValueError, TypeError):
                     pass
 
-        # Increment views if a single forum is being retrieved
-        if self.request.query_params.get('id'):
-            forum_id = self.request.query_params.get('id')
-            forum = queryset.filter(id=forum_id).first()
-            if forum:
-                forum.increment_views()
+        # Count a view if a single forum is being retrieved (buffered, see accounts.write_buffer)
+        forum_id = self.request.query_params.get('id')
+        if forum_id and forum_id.isdigit():
+            if queryset.filter(id=forum_id).exists():
+                record_view(Forum(pk=int(forum_id)), self.request)
 
         return queryset
 
@@ -109,40 +124,37 @@ class ForumDetailView(generics.RetrieveUpdateDestroyAPIView):
     permission_classes = [IsOwnerOrModerator]
 
     def get_queryset(self):
-        return Forum.objects.annotate(
-            discussion_count=Count('discussions')
-        )
+        return Forum.objects.with_listing_relations()
 
 
 class FollowForumView(generics.CreateAPIView, generics.DestroyAPIView):
     permission_classes = [permissions.IsAuthenticated]
     
     def post(self, request, *args, **kwargs):
-        forum = get_object_or_404(Forum, pk=kwargs['forum_id'])
-        if request.user not in forum.followers.all():
-            forum.followers.add(request.user)
-            forum.followers_count = forum.followers.count()
-            forum.save()
+        forum_id = kwargs['forum_id']
+        if not Forum.objects.filter(pk=forum_id).exists():
+            raise Http404
+        if follow(request.user, forum_id):
             return Response({'status': 'following'}, status=status.HTTP_201_CREATED)
         return Response({'status': 'already following'}, status=status.HTTP_200_OK)
     
     def delete(self, request, *args, **kwargs):
-        forum = get_object_or_404(Forum, pk=kwargs['forum_id'])
-        if request.user in forum.followers.all():
-            forum.followers.remove(request.user)
-            forum.followers_count = forum.followers.count()
-            forum.save()
+        if unfollow(request.user, kwargs['forum_id']):
             return Response({'status': 'unfollowed'}, status=status.HTTP_200_OK)
         return Response({'status': 'not following'}, status=status.HTTP_200_OK)
 
 
 class ForumFollowersView(generics.ListAPIView):
-    serializer_class = UserSerializer  # You'll need to import your UserSerializer
+    """A forum's followers, most recent accounts first, without counting or offsetting the whole list."""
+    serializer_class = UserListSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
+    pagination_class = FollowerCursorPagination
     
     def get_queryset(self):
-        forum = get_object_or_404(Forum, pk=self.kwargs['forum_id'])
-        return forum.followers.all()
+        forum_id = self.kwargs['forum_id']
+        if not Forum.objects.filter(pk=forum_id).exists():
+            raise Http404
+        return User.objects.filter(followed_forums=forum_id).prefetch_related('groups')
 
 
 class DiscussionListCreateView(generics.ListCreateAPIView):
@@ -153,30 +165,19 @@ class DiscussionListCreateView(generics.ListCreateAPIView):
         return DiscussionCreateSerializer  if self.request.method == 'POST' else DiscussionSerializer
     
     def perform_create(self, serializer):
-        discussion = serializer.save(author=self.request.user)
-        forum = discussion.forum
-        
-        # Notify all followers of the forum
-        if forum.followers.exists():
-            content_type = ContentType.objects.get_for_model(discussion)
-            notifications = [
-                Notification(
-                    user=follower,
-                    notification_type='new_discussion',
-                    title=f"New discussion in {forum.title}",
-                    message=f"{self.request.user.username} started a new discussion: {discussion.title}",
-                    content_type=content_type,
-                    object_id=discussion.id
-                )
-                for follower in forum.followers.exclude(id=self.request.user.id)
-            ]
-            Notification.objects.bulk_create(notifications)
+        # Followers are notified by forums.signals.notify_followers_new_discussion
+        serializer.save(author=self.request.user)
 
     def get_queryset(self):
-        return Discussion.objects.with_reactions().filter(
+        queryset = Discussion.objects.filter(
             forum_id=self.kwargs['forum_id'],
             forum__is_public=True
-        ).select_related('author', 'forum')
+        ).select_related('author', 'forum').prefetch_related('author__groups__permissions')
+
+        # ?ordering=hot: pinned first, then trending (see forums.hotness)
+        if self.request.query_params.get('ordering') == 'hot':
+            queryset = queryset.order_by('-is_pinned', '-hot_score', '-id')
+        return queryset
     
 
 class DiscussionDetailView(generics.RetrieveUpdateDestroyAPIView):
@@ -188,11 +189,89 @@ class DiscussionDetailView(generics.RetrieveUpdateDestroyAPIView):
 
     def retrieve(self, request, *args, **kwargs):
         instance = self.get_object()
-        instance.views += 1
-        instance.save()
-        return super().retrieve(request, *args, **kwargs)
+        record_view(instance, request)
+        serializer = self.get_serializer(instance)
+        return Response(serializer.data)
     
 
+class CommentListMixin:
+    """Cursor-paginated comments with reply counts, for threads loaded a page at a time."""
+    serializer_class = CommentSerializer
+    permission_classes = [permissions.IsAuthenticatedOrReadOnly]
+    pagination_class = CommentCursorPagination
+
+    def comments(self):
+        return Comment.objects.with_reply_counts().select_related('author').prefetch_related(
+            'author__groups__permissions'
+        )
+
+    def check_open(self, discussion):
+        if discussion.is_locked:
+            raise PermissionDenied("This discussion is locked.")
+
+
+class DiscussionCommentListCreateView(CommentListMixin, generics.ListCreateAPIView):
+    """Top-level comments of a discussion; replies are fetched per comment on demand."""
+
+    def get_queryset(self):
+        return self.comments().filter(
+            discussion_id=self.kwargs['discussion_id'],
+            discussion__forum__is_public=True,
+            parent__isnull=True
+        )
+
+    def list(self, request, *args, **kwargs):
+        discussion_id = self.kwargs['discussion_id']
+        if not Discussion.objects.filter(pk=discussion_id, forum__is_public=True).exists():
+            raise Http404
+        response = super().list(request, *args, **kwargs)
+        # Read up to the newest comment served, or up to now once the last page is reached
+        page = getattr(self.paginator, 'page', None)
+        if page is not None:
+            read_at = max(comment.created_at for comment in page) if self.paginator.has_next else timezone.now()
+            mark_read(request.user, discussion_id, read_at)
+        return response
+
+    def perform_create(self, serializer):
+        discussion = get_object_or_404(Discussion, pk=self.kwargs['discussion_id'], forum__is_public=True)
+        self.check_open(discussion)
+        serializer.save(author=self.request.user, discussion=discussion)
+
+
+class CommentReplyListCreateView(CommentListMixin, generics.ListCreateAPIView):
+    """Direct replies to a comment, for expanding a thread one level at a time."""
+
+    def get_queryset(self):
+        return self.comments().filter(
+            parent_id=self.kwargs['comment_id'],
+            discussion__forum__is_public=True
+        )
+
+    def perform_create(self, serializer):
+        parent = get_object_or_404(
+            Comment.objects.select_related('discussion'), pk=self.kwargs['comment_id']
+        )
+        self.check_open(parent.discussion)
+        serializer.save(author=self.request.user, discussion=parent.discussion, parent=parent)
+
+
+class CommentThreadView(CommentListMixin, generics.RetrieveAPIView):
+    """
+    A comment and its replies nested to ?depth= levels (all levels when omitted),
+    read with one path-prefix query however deep the thread goes.
+    """
+    serializer_class = CommentThreadSerializer
+
+    def get_queryset(self):
+        return self.comments().filter(discussion__forum__is_public=True)
+
+    def get_object(self):
+        comment = super().get_object()
+        depth = self.request.query_params.get('depth')
+        load_threads([comment], self.comments(), int(depth) if depth and depth.isdigit() else None)
+        return comment
+
+
 
 class ReactionView(generics.CreateAPIView, generics.DestroyAPIView):
     serializer_class = ReactionSerializer
@@ -219,6 +298,22 @@ class ReactionView(generics.CreateAPIView, generics.DestroyAPIView):
         except model_class.DoesNotExist:
             raise ValueError(f"{content_type} with id {object_id} does not exist")
 
+    def get(self, request, *args, **kwargs):
+        """List who reacted, a page at a time; listings only carry the counts"""
+        try:
+            content_object = self.get_content_object()
+        except ValueError as e:
+            return Response({"detail": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        reactions = Reaction.objects.filter(
+            content_type=ContentType.objects.get_for_model(content_object),
+            object_id=content_object.id
+        ).select_related('user').prefetch_related('user__groups__permissions').order_by('-created_at', '-id')
+        reaction_type = request.query_params.get('reaction')
+        if reaction_type:
+            reactions = reactions.filter(reaction=reaction_type)
+        page = self.paginate_queryset(reactions)
+        return self.get_paginated_response(self.get_serializer(page, many=True).data)
+
     def post(self, request, *args, **kwargs):
         """Handle creating or updating a reaction"""
         try:
@@ -363,16 +458,77 @@ class CheckForumFollowStatus(generics.RetrieveAPIView):
     
     def get(self, request, *args, **kwargs):
         forum_id = self.kwargs.get('forum_id')
-        try:
-            forum = Forum.objects.get(pk=forum_id)
-            is_following = request.user in forum.followers.all()
-            return Response({
-                'is_following': is_following,
-                'forum_id': forum_id,
-                'user_id': request.user.id
-            }, status=status.HTTP_200_OK)
-        except Forum.DoesNotExist:
+        if not Forum.objects.filter(pk=forum_id).exists():
             return Response(
                 {'detail': 'Forum not found'},
                 status=status.HTTP_404_NOT_FOUND
-            )   
\ No newline at end of file
+            )
+        return Response({
+            'is_following': is_following(request.user, forum_id),
+            'forum_id': forum_id,
+            'user_id': request.user.id
+        }, status=status.HTTP_200_OK)
+
+
+class ForumFeedView(generics.ListAPIView):
+    """
+    Activity from the large forums the user follows, merged at read time.
+    Entries newer than the user's read marker are flagged `is_unread`.
+    """
+    serializer_class = ForumActivitySerializer
+    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = FeedCursorPagination
+
+    def get_queryset(self):
+        return feed_for(self.request.user)
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['read_at'] = read_marker(self.request.user)
+        return context
+
+
+class ForumFeedMarkerView(generics.GenericAPIView):
+    """GET the unread count of the activity feed; POST to mark it read up to now (or `read_at`)."""
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request, *args, **kwargs):
+        return Response({
+            'read_at': read_marker(request.user),
+            'unread_count': unread_count(request.user),
+        })
+
+    def post(self, request, *args, **kwargs):
+        read_at = None
+        if request.data.get('read_at'):
+            read_at = parse_datetime(str(request.data['read_at']))
+            if read_at is None:
+                return Response({'detail': 'read_at must be an ISO 8601 datetime'}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({'read_at': mark_feed_read(request.user, read_at)})
+
+
+class SearchView(generics.GenericAPIView):
+    """
+    Ranked full-text search over public forums, discussions and comments.
+    `?q=` takes web-search syntax ("exact phrase", or, -exclude); `?type=`
+    restricts to a comma-separated subset of forums,discussions,comments.
+    """
+    permission_classes = [permissions.AllowAny]
+    MAX_LIMIT = 50
+
+    def get(self, request, *args, **kwargs):
+        terms = request.query_params.get('q', '').strip()
+        if not terms:
+            return Response({'detail': 'q is required'}, status=status.HTTP_400_BAD_REQUEST)
+
+        types = [kind for kind in request.query_params.get('type', '').split(',') if kind]
+        unknown = set(types) - set(TARGETS)
+        if unknown:
+            return Response(
+                {'detail': f"Unknown type: {', '.join(sorted(unknown))}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        limit = request.query_params.get('limit', '10')
+        limit = min(int(limit), self.MAX_LIMIT) if limit.isdigit() and int(limit) > 0 else 10
+        return Response({'query': terms, 'results': search(terms, types, limit)})
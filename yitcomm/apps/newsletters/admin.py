@@ -1,7 +1,52 @@
 from django.contrib import admin
+from django.utils import timezone
 
-from .models import Newsletter,NewsletterSubscription
+from .campaigns import campaign_stats
+from .models import Campaign, CampaignRecipient, Newsletter, NewsletterSubscription, OutboxEmail
 
 # Register your models here.
 admin.site.register(Newsletter)
-admin.site.register(NewsletterSubscription)
\ No newline at end of file
+admin.site.register(NewsletterSubscription)
+
+
+@admin.register(OutboxEmail)
+class OutboxEmailAdmin(admin.ModelAdmin):
+    list_display = ('id', 'recipient', 'subject', 'status', 'attempts', 'next_attempt_at', 'sent_at')
+    list_filter = ('status',)
+    search_fields = ('recipient', 'subject')
+    readonly_fields = ('message_id', 'created_at', 'sent_at')
+
+
+@admin.register(Campaign)
+class CampaignAdmin(admin.ModelAdmin):
+    list_display = ('id', 'subject', 'status', 'total_recipients', 'sent_count', 'failed_count',
+                    'throughput', 'created_at', 'finished_at')
+    list_filter = ('status',)
+    raw_id_fields = ('blog', 'newsletter')
+    readonly_fields = ('total_recipients', 'sent_count', 'failed_count', 'created_at', 'started_at',
+                       'finished_at', 'live_stats')
+
+    @admin.display(description='Messages/s')
+    def throughput(self, obj):
+        if not obj.started_at:
+            return '-'
+        elapsed = ((obj.finished_at or timezone.now()) - obj.started_at).total_seconds()
+        return f"{obj.sent_count / elapsed:.1f}" if elapsed else '-'
+
+    @admin.display(description='Live stats')
+    def live_stats(self, obj):
+        if not obj.pk:
+            return '-'
+        stats = campaign_stats(obj)
+        return (
+            f"{stats['sent']} sent, {stats['failed']} failed, {stats['pending']} pending; "
+            f"{stats['current_messages_per_second']} msg/s now, {stats['messages_per_second']} msg/s overall"
+        )
+
+
+@admin.register(CampaignRecipient)
+class CampaignRecipientAdmin(admin.ModelAdmin):
+    list_display = ('id', 'campaign', 'email', 'status', 'attempts', 'sent_at')
+    list_filter = ('status',)
+    search_fields = ('email',)
+    raw_id_fields = ('campaign', 'subscription')
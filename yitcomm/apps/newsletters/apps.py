@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class NewslettersConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.newsletters'
+
+    def ready(self):
+        import apps.newsletters.signals
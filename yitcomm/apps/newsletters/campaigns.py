@@ -0,0 +1,234 @@
+import logging
+from collections import Counter
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail.utils import DNS_NAME
+from django.db import transaction
+from django.db.models import Count, Exists, F, OuterRef, Q
+from django.utils import timezone
+
+from .mailer import outbox_email
+from .models import Campaign, CampaignRecipient, MESSAGE_ID_DOMAIN, NewsletterSubscription
+from .rendering import personalize, recipient_fields, render_email
+
+logger = logging.getLogger(__name__)
+
+# Recipients claimed and sent per round trip
+BATCH_SIZE = getattr(settings, 'CAMPAIGN_BATCH_SIZE', 200)
+# A claimed recipient whose worker has not reported back for this long is claimed again
+LEASE_SECONDS = getattr(settings, 'CAMPAIGN_LEASE_SECONDS', 5 * 60)
+SNAPSHOT_CHUNK_SIZE = 1000
+# Window for the "current" messages per second figure
+RATE_WINDOW_SECONDS = 60
+
+
+def recipient_message_id(recipient):
+    """
+    Message-ID derived from the recipient row, so an email re-sent after a
+    worker crash carries the same id and receiving servers drop the duplicate.
+    """
+    return f"<campaign-{recipient.campaign_id}.{recipient.pk}@{MESSAGE_ID_DOMAIN or DNS_NAME}>"
+
+
+def campaign_email(campaign, recipient):
+    fields = recipient_fields(recipient.email)
+    email = outbox_email(
+        recipient=recipient.email,
+        subject=personalize(campaign.subject, fields),
+        html_content=personalize(campaign.html_content, fields, html=True),
+        text_content=personalize(campaign.text_content, fields),
+    )
+    email.message_id = recipient_message_id(recipient)
+    return email
+
+
+def newsletter_campaign(newsletter):
+    """Queue a campaign for an admin-written newsletter, targeted at its categories."""
+    html_content, text_content = render_email('newsletter', {'newsletter': newsletter})
+    campaign = Campaign.objects.create(
+        subject=newsletter.title,
+        html_content=html_content,
+        text_content=text_content,
+        newsletter=newsletter,
+    )
+    campaign.categories.set(newsletter.categories.all())
+    return campaign
+
+
+def campaign_subscribers(campaign):
+    """Active subscribers following one of the campaign's categories, or no category at all."""
+    subscribers = NewsletterSubscription.objects.filter(is_active=True)
+    category_ids = list(campaign.categories.values_list('id', flat=True))
+    if category_ids:
+        subscription_categories = NewsletterSubscription.categories.through.objects.filter(
+            newslettersubscription_id=OuterRef('pk')
+        )
+        subscribers = subscribers.filter(
+            Q(Exists(subscription_categories.filter(techcategory_id__in=category_ids)))
+            | ~Exists(subscription_categories)
+        )
+    return subscribers
+
+
+def snapshot_recipients(campaign):
+    """Copy the campaign's target subscribers into CampaignRecipient, a chunk at a time."""
+    subscribers = campaign_subscribers(campaign).order_by('id').values_list('id', 'email')
+    last_id = 0
+    while True:
+        chunk = list(subscribers.filter(id__gt=last_id)[:SNAPSHOT_CHUNK_SIZE])
+        if not chunk:
+            break
+        CampaignRecipient.objects.bulk_create(
+            [CampaignRecipient(campaign=campaign, subscription_id=pk, email=email) for pk, email in chunk],
+            ignore_conflicts=True,
+        )
+        last_id = chunk[-1][0]
+    return campaign.recipients.count()
+
+
+def start_campaign():
+    """Snapshot the recipients of the oldest queued campaign and mark it running."""
+    with transaction.atomic():
+        campaign = (
+            Campaign.objects.filter(status=Campaign.STATUS_QUEUED)
+            .order_by('created_at')
+            .select_for_update(skip_locked=True)
+            .first()
+        )
+        if campaign is None:
+            return None
+        # Blog categories are assigned after the post is saved, so resolve targeting now
+        if campaign.blog_id:
+            campaign.categories.add(*campaign.blog.categories.all())
+        campaign.total_recipients = snapshot_recipients(campaign)
+        campaign.status = Campaign.STATUS_RUNNING
+        campaign.started_at = timezone.now()
+        campaign.save(update_fields=['status', 'started_at', 'total_recipients'])
+    return campaign
+
+
+def claim_recipients(batch_size=BATCH_SIZE, campaign=None):
+    """
+    Lease a batch of due recipients of running campaigns (or of one campaign).
+    Rows leased by a worker that died are due again once the lease runs out.
+    """
+    now = timezone.now()
+    due = CampaignRecipient.objects.filter(
+        Q(status=CampaignRecipient.STATUS_PENDING, next_attempt_at__lte=now)
+        | Q(status=CampaignRecipient.STATUS_SENDING, locked_until__lt=now),
+        campaign__status=Campaign.STATUS_RUNNING,
+    )
+    if campaign is not None:
+        due = due.filter(campaign=campaign)
+    with transaction.atomic():
+        ids = list(
+            due.order_by('id')
+            .select_for_update(skip_locked=True, of=('self',))
+            .values_list('id', flat=True)[:batch_size]
+        )
+        if not ids:
+            return []
+        CampaignRecipient.objects.filter(id__in=ids).update(
+            status=CampaignRecipient.STATUS_SENDING,
+            locked_until=now + timedelta(seconds=LEASE_SECONDS),
+            attempts=F('attempts') + 1,
+        )
+    return list(CampaignRecipient.objects.filter(id__in=ids))
+
+
+def deliver_recipients(recipients, sender):
+    """Send a claimed batch in parallel and record per-recipient results; returns (sent, failed)."""
+    campaigns = Campaign.objects.in_bulk({recipient.campaign_id for recipient in recipients})
+    errors = sender.send_many([campaign_email(campaigns[r.campaign_id], r) for r in recipients])
+
+    now = timezone.now()
+    sent = Counter()
+    failed = Counter()
+    for recipient, error in zip(recipients, errors):
+        recipient.locked_until = None
+        if error is None:
+            recipient.status = CampaignRecipient.STATUS_SENT
+            recipient.sent_at = now
+            recipient.last_error = ''
+            sent[recipient.campaign_id] += 1
+        elif sender.gives_up(error, recipient.attempts):
+            recipient.status = CampaignRecipient.STATUS_FAILED
+            recipient.last_error = str(error)[:1000]
+            failed[recipient.campaign_id] += 1
+        else:
+            recipient.status = CampaignRecipient.STATUS_PENDING
+            recipient.next_attempt_at = now + sender.retry_delay(recipient.attempts)
+            recipient.last_error = str(error)[:1000]
+
+    with transaction.atomic():
+        CampaignRecipient.objects.bulk_update(
+            recipients, ['status', 'sent_at', 'next_attempt_at', 'locked_until', 'last_error']
+        )
+        for campaign_id in sent.keys() | failed.keys():
+            Campaign.objects.filter(pk=campaign_id).update(
+                sent_count=F('sent_count') + sent[campaign_id],
+                failed_count=F('failed_count') + failed[campaign_id],
+            )
+    return sum(sent.values()), sum(failed.values())
+
+
+def finish_campaigns(campaign=None):
+    """Mark running campaigns (or one campaign) with nothing left to send as completed."""
+    outstanding = CampaignRecipient.objects.filter(
+        campaign=OuterRef('pk'),
+        status__in=[CampaignRecipient.STATUS_PENDING, CampaignRecipient.STATUS_SENDING],
+    )
+    running = Campaign.objects.filter(status=Campaign.STATUS_RUNNING)
+    if campaign is not None:
+        running = running.filter(pk=campaign.pk)
+    return running.exclude(Exists(outstanding)).update(status=Campaign.STATUS_COMPLETED, finished_at=timezone.now())
+
+
+def run_campaigns(sender, batch_size=BATCH_SIZE, max_batches=None):
+    """Start queued campaigns and send due recipients until none are left; returns (sent, failed)."""
+    while start_campaign() is not None:
+        pass
+
+    sent = failed = batches = 0
+    while max_batches is None or batches < max_batches:
+        recipients = claim_recipients(batch_size)
+        if not recipients:
+            break
+        batch_sent, batch_failed = deliver_recipients(recipients, sender)
+        sent += batch_sent
+        failed += batch_failed
+        batches += 1
+    finish_campaigns()
+    return sent, failed
+
+
+def campaign_stats(campaign):
+    """Progress and throughput of a campaign, computed from its recipient rows."""
+    now = timezone.now()
+    by_status = dict(
+        campaign.recipients.values_list('status').annotate(total=Count('id')).order_by()
+    )
+    recent = campaign.recipients.filter(
+        status=CampaignRecipient.STATUS_SENT,
+        sent_at__gte=now - timedelta(seconds=RATE_WINDOW_SECONDS),
+    ).count()
+
+    sent = by_status.get(CampaignRecipient.STATUS_SENT, 0)
+    remaining = by_status.get(CampaignRecipient.STATUS_PENDING, 0) + by_status.get(CampaignRecipient.STATUS_SENDING, 0)
+    end = campaign.finished_at or now
+    elapsed = (end - campaign.started_at).total_seconds() if campaign.started_at else 0
+    current_rate = recent / RATE_WINDOW_SECONDS
+    return {
+        'id': campaign.pk,
+        'subject': campaign.subject,
+        'status': campaign.status,
+        'total': campaign.total_recipients,
+        'sent': sent,
+        'failed': by_status.get(CampaignRecipient.STATUS_FAILED, 0),
+        'pending': remaining,
+        'elapsed_seconds': round(elapsed, 1),
+        'messages_per_second': round(sent / elapsed, 2) if elapsed else 0,
+        'current_messages_per_second': round(current_rate, 2),
+        'eta_seconds': round(remaining / current_rate) if remaining and current_rate else None,
+    }
@@ -0,0 +1,299 @@
+import logging
+import queue
+import smtplib
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import timedelta
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+from email.utils import formatdate
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from apps.accounts.throttling import TokenBucket
+from .models import OutboxEmail
+
+logger = logging.getLogger(__name__)
+
+# Email configuration - should come from Django settings
+EMAIL_HOST = getattr(settings, 'EMAIL_HOST', None) or 'smtp.gmail.com'
+EMAIL_PORT = int(getattr(settings, 'EMAIL_PORT', None) or 587)
+EMAIL_HOST_USER = getattr(settings, 'EMAIL_HOST_USER', None) or ''
+EMAIL_HOST_PASSWORD = getattr(settings, 'EMAIL_HOST_PASSWORD', None) or ''
+EMAIL_USE_TLS = getattr(settings, 'EMAIL_USE_TLS', True)
+DEFAULT_FROM_EMAIL = getattr(settings, 'DEFAULT_FROM_EMAIL', None) or EMAIL_HOST_USER
+
+DEFAULT_TEXT_CONTENT = "Please enable HTML to view this message"
+
+DEFAULT_OUTBOX = {
+    # Persistent authenticated SMTP connections per worker process
+    'POOL_SIZE': 4,
+    # Sending limit of the SMTP provider, in messages per second (None disables it),
+    # and how many messages may go out back to back before it applies
+    'RATE_PER_SECOND': 5,
+    'BURST': 10,
+    # Idle connections older than this are checked with NOOP before reuse
+    'IDLE_CHECK_SECONDS': 30,
+    'TIMEOUT_SECONDS': 30,
+    # Retry delay is BACKOFF_BASE_SECONDS * 2 ** (attempts - 1), capped at BACKOFF_MAX_SECONDS
+    'MAX_ATTEMPTS': 5,
+    'BACKOFF_BASE_SECONDS': 60,
+    'BACKOFF_MAX_SECONDS': 6 * 60 * 60,
+    # How long a claimed batch stays owned by one worker before others may retry it
+    'LEASE_SECONDS': 5 * 60,
+}
+
+
+def outbox_email(recipient, subject, html_content, text_content=None, from_email=None):
+    """Build an unsaved OutboxEmail, for callers that queue many at once with queue_emails()."""
+    return OutboxEmail(
+        recipient=recipient,
+        subject=subject,
+        html_content=html_content,
+        text_content=text_content or DEFAULT_TEXT_CONTENT,
+        from_email=from_email or '',
+    )
+
+
+def queue_email(recipient, subject, html_content, text_content=None, from_email=None):
+    """
+    Write an email to the outbox instead of talking to SMTP in the request.
+
+    The row is part of the caller's transaction, so a rolled back request
+    sends nothing; the send_outbox worker delivers it.
+    """
+    email = outbox_email(recipient, subject, html_content, text_content, from_email)
+    email.save()
+    return email
+
+
+def queue_emails(emails, batch_size=1000):
+    return OutboxEmail.objects.bulk_create(emails, batch_size=batch_size)
+
+
+def build_message(email):
+    message = MIMEMultipart('alternative')
+    message['Subject'] = email.subject
+    message['From'] = email.from_email or DEFAULT_FROM_EMAIL
+    message['To'] = email.recipient
+    message['Date'] = formatdate(localtime=True)
+    message['Message-ID'] = email.message_id
+    message.attach(MIMEText(email.text_content or DEFAULT_TEXT_CONTENT, 'plain'))
+    message.attach(MIMEText(email.html_content, 'html'))
+    return message
+
+
+class SMTPConnectionPool:
+    """
+    Up to `size` logged-in SMTP connections shared by sender threads, so the
+    TCP, STARTTLS and AUTH round trips are paid once per connection instead
+    of once per message.
+    """
+
+    def __init__(self, size, host=EMAIL_HOST, port=EMAIL_PORT, username=EMAIL_HOST_USER,
+                 password=EMAIL_HOST_PASSWORD, use_tls=EMAIL_USE_TLS, timeout=30, idle_check=30):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.use_tls = use_tls
+        self.timeout = timeout
+        self.idle_check = idle_check
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+
+    def _open(self):
+        connection = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        connection.ehlo()
+        if self.use_tls:
+            connection.starttls()
+            connection.ehlo()
+        if self.username:
+            connection.login(self.username, self.password)
+        return connection
+
+    def _take(self):
+        while True:
+            try:
+                connection, released_at = self._idle.get_nowait()
+            except queue.Empty:
+                return self._open()
+            if time.monotonic() - released_at < self.idle_check:
+                return connection
+            try:
+                if connection.noop()[0] == 250:
+                    return connection
+            except OSError:
+                pass
+            self._discard(connection)
+
+    @staticmethod
+    def _discard(connection):
+        try:
+            connection.quit()
+        except (smtplib.SMTPException, OSError):
+            connection.close()
+
+    @contextmanager
+    def connection(self):
+        with self._slots:
+            connection = self._take()
+            try:
+                yield connection
+            except Exception as e:
+                # SMTP replies (refused recipient, ...) leave the session usable; socket errors don't
+                broken = isinstance(e, smtplib.SMTPServerDisconnected) or (
+                    isinstance(e, OSError) and not isinstance(e, smtplib.SMTPException)
+                )
+                if broken:
+                    self._discard(connection)
+                else:
+                    self._idle.put((connection, time.monotonic()))
+                raise
+            self._idle.put((connection, time.monotonic()))
+
+    def close(self):
+        while True:
+            try:
+                connection, _ = self._idle.get_nowait()
+            except queue.Empty:
+                return
+            self._discard(connection)
+
+
+class RateLimiter:
+    """Blocking token bucket shared by the sender threads of one process."""
+
+    def __init__(self, rate, burst):
+        self.bucket = TokenBucket(burst, rate) if rate else None
+        self._state = None
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        if self.bucket is None:
+            return
+        while True:
+            with self._lock:
+                allowed, wait, self._state = self.bucket.consume(self._state, time.monotonic())
+            if allowed:
+                return
+            time.sleep(wait)
+
+
+def is_permanent_failure(error):
+    """5xx replies (unknown mailbox, rejected sender, ...) will not succeed on retry."""
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return all(code >= 500 for code, _ in error.recipients.values())
+    return isinstance(error, smtplib.SMTPResponseException) and error.smtp_code >= 500
+
+
+class OutboxSender:
+    """Claims due outbox rows in batches and delivers them over a connection pool."""
+
+    def __init__(self, config=None, pool=None):
+        self.config = {**DEFAULT_OUTBOX, **(getattr(settings, 'OUTBOX', None) or {}), **(config or {})}
+        self.pool = pool or SMTPConnectionPool(
+            self.config['POOL_SIZE'],
+            timeout=self.config['TIMEOUT_SECONDS'],
+            idle_check=self.config['IDLE_CHECK_SECONDS'],
+        )
+        self.limiter = RateLimiter(self.config['RATE_PER_SECOND'], self.config['BURST'])
+        self._executor = ThreadPoolExecutor(max_workers=self.config['POOL_SIZE'])
+
+    def claim(self, batch_size):
+        """Lease up to `batch_size` due emails; rows leased by a crashed worker become due again."""
+        now = timezone.now()
+        with transaction.atomic():
+            ids = list(
+                OutboxEmail.objects.filter(
+                    Q(status=OutboxEmail.STATUS_PENDING, next_attempt_at__lte=now)
+                    | Q(status=OutboxEmail.STATUS_SENDING, locked_until__lt=now)
+                )
+                .order_by('next_attempt_at', 'id')
+                .select_for_update(skip_locked=True)
+                .values_list('id', flat=True)[:batch_size]
+            )
+            if not ids:
+                return []
+            OutboxEmail.objects.filter(id__in=ids).update(
+                status=OutboxEmail.STATUS_SENDING,
+                locked_until=now + timedelta(seconds=self.config['LEASE_SECONDS']),
+                attempts=F('attempts') + 1,
+            )
+        return list(OutboxEmail.objects.filter(id__in=ids).order_by('id'))
+
+    def send(self, email):
+        self.limiter.acquire()
+        message = build_message(email)
+        with self.pool.connection() as connection:
+            connection.sendmail(message['From'], [email.recipient], message.as_string())
+
+    def _attempt(self, email):
+        try:
+            self.send(email)
+        except Exception as e:
+            logger.warning(f"Failed to send email to {email.recipient}: {e}")
+            return e
+        return None
+
+    def gives_up(self, error, attempts):
+        return is_permanent_failure(error) or attempts >= self.config['MAX_ATTEMPTS']
+
+    def retry_delay(self, attempts):
+        seconds = self.config['BACKOFF_BASE_SECONDS'] * 2 ** (attempts - 1)
+        return timedelta(seconds=min(seconds, self.config['BACKOFF_MAX_SECONDS']))
+
+    def send_many(self, emails):
+        """Send emails in parallel over the pool; returns the error (or None) for each one."""
+        return list(self._executor.map(self._attempt, emails))
+
+    def deliver(self, emails):
+        """Send claimed emails and record the outcome; returns (sent, failed)."""
+        errors = self.send_many(emails)
+
+        now = timezone.now()
+        sent_ids = [email.id for email, error in zip(emails, errors) if error is None]
+        if sent_ids:
+            OutboxEmail.objects.filter(id__in=sent_ids).update(
+                status=OutboxEmail.STATUS_SENT, sent_at=now, locked_until=None, last_error=''
+            )
+
+        failed = []
+        for email, error in zip(emails, errors):
+            if error is None:
+                continue
+            email.last_error = str(error)[:1000]
+            email.locked_until = None
+            if self.gives_up(error, email.attempts):
+                email.status = OutboxEmail.STATUS_FAILED
+            else:
+                email.status = OutboxEmail.STATUS_PENDING
+                email.next_attempt_at = now + self.retry_delay(email.attempts)
+            failed.append(email)
+        if failed:
+            OutboxEmail.objects.bulk_update(
+                failed, ['status', 'next_attempt_at', 'locked_until', 'last_error']
+            )
+        return len(sent_ids), len(failed)
+
+    def drain(self, batch_size=100, max_batches=None):
+        """Deliver due emails until none are left (or `max_batches` is reached)."""
+        sent = failed = batches = 0
+        while max_batches is None or batches < max_batches:
+            emails = self.claim(batch_size)
+            if not emails:
+                break
+            batch_sent, batch_failed = self.deliver(emails)
+            sent += batch_sent
+            failed += batch_failed
+            batches += 1
+        return sent, failed
+
+    def close(self):
+        self._executor.shutdown()
+        self.pool.close()
@@ -0,0 +1,103 @@
+import asyncio
+import logging
+import time
+from collections import Counter
+from email.parser import BytesHeaderParser
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from apps.newsletters.campaigns import claim_recipients, deliver_recipients, finish_campaigns
+from apps.newsletters.mailer import OutboxSender, SMTPConnectionPool
+from apps.newsletters.models import Campaign, CampaignRecipient
+
+
+class CountingHandler:
+    """aiosmtpd handler that accepts everything and counts Message-IDs."""
+
+    def __init__(self, latency):
+        self.latency = latency
+        self.message_ids = Counter()
+
+    async def handle_DATA(self, server, session, envelope):
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        headers = BytesHeaderParser().parsebytes(envelope.original_content or envelope.content)
+        self.message_ids[headers['Message-ID']] += 1
+        return '250 Message accepted for delivery'
+
+
+class Command(BaseCommand):
+    help = (
+        "Send a synthetic campaign to a local aiosmtpd server and report throughput. "
+        "Everything runs in a transaction that is rolled back, so send_campaigns workers "
+        "never see the benchmark rows. Requires the optional aiosmtpd package (pip install aiosmtpd)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--recipients', type=int, default=2000)
+        parser.add_argument('--batch-size', type=int, default=200)
+        parser.add_argument('--pool-size', type=int, default=4)
+        parser.add_argument('--latency', type=float, default=0.0,
+                            help='Seconds the fake server waits before accepting each message.')
+        parser.add_argument('--port', type=int, default=8025)
+
+    def handle(self, *args, **options):
+        try:
+            from aiosmtpd.controller import Controller
+        except ImportError:
+            raise CommandError("benchmark_campaign needs aiosmtpd: pip install aiosmtpd")
+
+        # aiosmtpd logs every SMTP command at INFO
+        logging.getLogger('mail.log').setLevel(logging.WARNING)
+
+        handler = CountingHandler(options['latency'])
+        controller = Controller(handler, hostname='127.0.0.1', port=options['port'])
+        controller.start()
+
+        pool = SMTPConnectionPool(options['pool_size'], host='127.0.0.1', port=options['port'],
+                                  username='', use_tls=False)
+        sender = OutboxSender({'POOL_SIZE': options['pool_size'], 'RATE_PER_SECOND': None}, pool=pool)
+        try:
+            with transaction.atomic():
+                elapsed, sent, failed = self.send_campaign(sender, options)
+                # The campaign is RUNNING with real-looking recipients: never let a worker see it
+                transaction.set_rollback(True)
+        finally:
+            sender.close()
+            controller.stop()
+
+        duplicates = sum(count - 1 for count in handler.message_ids.values() if count > 1)
+        self.stdout.write(
+            f"{sent} sent, {failed} failed in {elapsed:.2f}s: {sent / elapsed:.1f} messages/s "
+            f"(pool {options['pool_size']}, batch {options['batch_size']}, latency {options['latency']}s)"
+        )
+        self.stdout.write(f"Server received {sum(handler.message_ids.values())} messages, {duplicates} duplicate Message-IDs")
+
+    def send_campaign(self, sender, options):
+        campaign = Campaign.objects.create(
+            subject='Benchmark for [[email]]',
+            html_content='<p>Hello [[email]]</p><p><a href="[[unsubscribe_url]]">Unsubscribe</a></p>',
+            text_content='Hello [[email]]\nUnsubscribe: [[unsubscribe_url]]',
+            status=Campaign.STATUS_RUNNING,
+            started_at=timezone.now(),
+            total_recipients=options['recipients'],
+        )
+        CampaignRecipient.objects.bulk_create(
+            [CampaignRecipient(campaign=campaign, email=f"bench{i}@example.com")
+             for i in range(options['recipients'])],
+            batch_size=1000,
+        )
+
+        started = time.perf_counter()
+        sent = failed = 0
+        while True:
+            recipients = claim_recipients(options['batch_size'], campaign=campaign)
+            if not recipients:
+                break
+            batch_sent, batch_failed = deliver_recipients(recipients, sender)
+            sent += batch_sent
+            failed += batch_failed
+        finish_campaigns(campaign=campaign)
+        return time.perf_counter() - started, sent, failed
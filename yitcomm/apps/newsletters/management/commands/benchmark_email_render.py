@@ -0,0 +1,49 @@
+import time
+from types import SimpleNamespace
+
+from django.core.management.base import BaseCommand
+
+from apps.newsletters.rendering import personalize, recipient_fields, render_email
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare rendering the blog newsletter once per recipient against rendering it "
+        "once per campaign and substituting only the per-recipient fields."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--recipients', type=int, default=10_000)
+
+    def handle(self, *args, **options):
+        count = options['recipients']
+        blog = SimpleNamespace(
+            title='Benchmark post',
+            slug='benchmark-post',
+            content='<p>' + 'Lorem ipsum dolor sit amet, consectetur adipiscing elit. ' * 80 + '</p>',
+        )
+        context = {'blog': blog, 'blog_url': 'https://example.com/blogs/benchmark-post', 'image_url': None}
+        emails = [f"reader{i}@example.com" for i in range(count)]
+
+        def per_recipient():
+            for email in emails:
+                html, text = render_email('blog_newsletter', {**context, 'email': email})
+
+        def per_campaign():
+            html, text = render_email('blog_newsletter', context)
+            for email in emails:
+                fields = recipient_fields(email)
+                personalize(html, fields, html=True)
+                personalize(text, fields)
+
+        # Warm up so template loading and compilation are not part of either timing
+        render_email('blog_newsletter', context)
+        for label, run in (('template render per recipient', per_recipient),
+                           ('render once + substitution', per_campaign)):
+            started = time.perf_counter()
+            run()
+            elapsed = time.perf_counter() - started
+            self.stdout.write(
+                f"{label}: {elapsed * 1000:.0f} ms for {count} recipients "
+                f"({elapsed * 1000 * 10_000 / count:.0f} ms per 10k)"
+            )
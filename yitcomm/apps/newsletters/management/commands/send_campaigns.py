@@ -0,0 +1,35 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.newsletters.campaigns import BATCH_SIZE, run_campaigns
+from apps.newsletters.mailer import OutboxSender
+
+
+class Command(BaseCommand):
+    help = (
+        "Snapshot the recipients of queued newsletter campaigns and send them in batches "
+        "over pooled SMTP connections. Several workers can run side by side."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+        parser.add_argument('--loop', action='store_true',
+                            help='Keep polling for new campaigns instead of exiting when nothing is due.')
+        parser.add_argument('--poll-interval', type=float, default=10)
+
+    def handle(self, *args, **options):
+        sender = OutboxSender()
+        try:
+            while True:
+                started = time.monotonic()
+                sent, failed = run_campaigns(sender, options['batch_size'])
+                if sent or failed:
+                    elapsed = time.monotonic() - started
+                    self.stdout.write(f"Sent {sent} campaign emails ({sent / elapsed:.1f}/s), {failed} failed")
+                if not options['loop']:
+                    break
+                if not (sent or failed):
+                    time.sleep(options['poll_interval'])
+        finally:
+            sender.close()
@@ -0,0 +1,46 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.accounts.digests import queue_due_digests
+from apps.newsletters.mailer import OutboxSender
+
+# Seconds between digest checks when --digests is given
+DIGEST_CHECK_INTERVAL = 60
+
+
+class Command(BaseCommand):
+    help = "Deliver queued outbox emails over pooled SMTP connections, retrying failures with backoff."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=100)
+        parser.add_argument('--max-batches', type=int, default=None,
+                            help='Stop after this many batches (per poll when --loop is set).')
+        parser.add_argument('--loop', action='store_true',
+                            help='Keep polling for new emails instead of exiting once the outbox is drained.')
+        parser.add_argument('--poll-interval', type=float, default=5,
+                            help='Seconds to wait between polls of an empty outbox with --loop.')
+        parser.add_argument('--digests', action='store_true',
+                            help='Also queue due notification digests (checked once a minute).')
+
+    def handle(self, *args, **options):
+        sender = OutboxSender()
+        digests_checked_at = None
+        try:
+            while True:
+                if options['digests'] and (
+                    digests_checked_at is None or time.monotonic() - digests_checked_at >= DIGEST_CHECK_INTERVAL
+                ):
+                    digests, _ = queue_due_digests()
+                    digests_checked_at = time.monotonic()
+                    if digests:
+                        self.stdout.write(f"Queued {digests} notification digests")
+                sent, failed = sender.drain(options['batch_size'], options['max_batches'])
+                if sent or failed or not options['loop']:
+                    self.stdout.write(f"Sent {sent} emails, {failed} failed")
+                if not options['loop']:
+                    break
+                if not (sent or failed):
+                    time.sleep(options['poll_interval'])
+        finally:
+            sender.close()
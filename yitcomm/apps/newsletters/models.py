@@ -1,7 +1,24 @@
+from email.utils import make_msgid, parseaddr
+
+from django.conf import settings
+from django.core.mail.utils import DNS_NAME
 from django.db import models
+from django.utils import timezone
 
 from apps.accounts.models import TechCategory, User
 
+
+def _message_id_domain():
+    # Without a domain make_msgid() resolves the host name (socket.getfqdn) on every call
+    configured = getattr(settings, 'EMAIL_MESSAGE_ID_DOMAIN', None)
+    if configured:
+        return configured
+    sender = getattr(settings, 'DEFAULT_FROM_EMAIL', None) or getattr(settings, 'EMAIL_HOST_USER', None) or ''
+    return parseaddr(sender)[1].rpartition('@')[2] or None
+
+
+MESSAGE_ID_DOMAIN = _message_id_domain()
+
 class NewsletterSubscription(models.Model):
     """Newsletter subscription management."""
     email = models.EmailField(unique=True)
@@ -26,3 +43,129 @@ class Newsletter(models.Model):
     
     def __str__(self):
         return self.title
+
+
+def make_message_id():
+    """Message-ID fixed when the email is queued, so every retry of it carries the same header."""
+    # DNS_NAME looks the host name up once per process
+    return make_msgid(domain=MESSAGE_ID_DOMAIN or str(DNS_NAME))
+
+
+class OutboxEmail(models.Model):
+    """Outgoing email, written in the caller's transaction and delivered by the send_outbox worker."""
+    STATUS_PENDING = 'pending'
+    STATUS_SENDING = 'sending'
+    STATUS_SENT = 'sent'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = (
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_SENDING, 'Sending'),
+        (STATUS_SENT, 'Sent'),
+        (STATUS_FAILED, 'Failed'),
+    )
+
+    recipient = models.EmailField()
+    subject = models.CharField(max_length=255)
+    html_content = models.TextField()
+    text_content = models.TextField(blank=True)
+    from_email = models.CharField(max_length=254, blank=True)
+    message_id = models.CharField(max_length=255, unique=True, default=make_message_id)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    # A worker owns a 'sending' row until then; afterwards it is reclaimed as abandoned
+    locked_until = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.subject} -> {self.recipient} ({self.status})"
+
+
+class Campaign(models.Model):
+    """
+    One bulk send (a new blog post announcement or a newsletter) to the matching subscribers.
+
+    The body is rendered once when the campaign is created; per-recipient
+    fields are left as [[placeholders]] and filled in at send time. When
+    sending starts the target subscribers are snapshotted into CampaignRecipient.
+    """
+    STATUS_QUEUED = 'queued'
+    STATUS_RUNNING = 'running'
+    STATUS_COMPLETED = 'completed'
+    STATUS_CANCELLED = 'cancelled'
+    STATUS_CHOICES = (
+        (STATUS_QUEUED, 'Queued'),
+        (STATUS_RUNNING, 'Running'),
+        (STATUS_COMPLETED, 'Completed'),
+        (STATUS_CANCELLED, 'Cancelled'),
+    )
+
+    subject = models.CharField(max_length=255)
+    html_content = models.TextField()
+    text_content = models.TextField(blank=True)
+    blog = models.ForeignKey('blogs.Blog', on_delete=models.SET_NULL, null=True, blank=True, related_name='campaigns')
+    newsletter = models.ForeignKey(Newsletter, on_delete=models.SET_NULL, null=True, blank=True, related_name='campaigns')
+    # Subscribers following any of these categories (or none at all) are targeted; empty means everyone
+    categories = models.ManyToManyField(TechCategory, blank=True, related_name='campaigns')
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_QUEUED)
+    total_recipients = models.PositiveIntegerField(default=0)
+    sent_count = models.PositiveIntegerField(default=0)
+    failed_count = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'created_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.subject} ({self.status})"
+
+
+class CampaignRecipient(models.Model):
+    """One subscriber of a campaign snapshot and the delivery state of their email."""
+    STATUS_PENDING = 'pending'
+    STATUS_SENDING = 'sending'
+    STATUS_SENT = 'sent'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = (
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_SENDING, 'Sending'),
+        (STATUS_SENT, 'Sent'),
+        (STATUS_FAILED, 'Failed'),
+    )
+
+    campaign = models.ForeignKey(Campaign, on_delete=models.CASCADE, related_name='recipients')
+    subscription = models.ForeignKey(NewsletterSubscription, on_delete=models.SET_NULL, null=True, blank=True,
+                                     related_name='campaign_deliveries')
+    email = models.EmailField()
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    locked_until = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['id']
+        constraints = [
+            models.UniqueConstraint(fields=['campaign', 'email'], name='unique_campaign_recipient'),
+        ]
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at']),
+            models.Index(fields=['campaign', 'status']),
+        ]
+
+    def __str__(self):
+        return f"{self.email} ({self.status})"
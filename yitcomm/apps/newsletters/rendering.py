@@ -0,0 +1,78 @@
+import re
+from functools import lru_cache
+from urllib.parse import quote
+
+from django.conf import settings
+from django.template import TemplateDoesNotExist
+from django.template.loader import get_template
+from django.utils.html import escape
+
+SITE_URL = getattr(settings, 'SITE_URL', 'http://localhost:8000').rstrip('/')
+
+# Per-recipient fields are left in rendered campaign bodies as [[name]]
+PLACEHOLDER = re.compile(r'\[\[(\w+)\]\]')
+
+
+@lru_cache(maxsize=None)
+def compiled_template(name):
+    """
+    Load and compile a template once per process, even with DEBUG on (where
+    Django's own cached loader is disabled). Missing templates are cached as None.
+    """
+    try:
+        return get_template(name)
+    except TemplateDoesNotExist:
+        return None
+
+
+def render_email(name, context):
+    """
+    Render templates/emails/<name>.html and, if it exists, <name>.txt;
+    returns (html_content, text_content).
+    """
+    context = {'site_url': SITE_URL, **context}
+    text_template = compiled_template(f'emails/{name}.txt')
+    html_content = compiled_template(f'emails/{name}.html').render(context)
+    text_content = text_template.render(context).strip() if text_template else None
+    return html_content, text_content
+
+
+class PersonalizedBody:
+    """
+    A rendered body split at its [[placeholders]] once, so filling it in for a
+    recipient is a single join instead of a template render or regex pass.
+    """
+
+    def __init__(self, body, html=False):
+        # split() alternates literal text and placeholder names: [text, name, text, name, text]
+        self.parts = PLACEHOLDER.split(body)
+        self.html = html
+
+    def render(self, fields):
+        if len(self.parts) == 1:
+            return self.parts[0]
+        if self.html:
+            fields = {name: escape(value) for name, value in fields.items()}
+        parts = self.parts[:]
+        for i in range(1, len(parts), 2):
+            parts[i] = fields.get(parts[i], f'[[{parts[i]}]]')
+        return ''.join(parts)
+
+
+@lru_cache(maxsize=256)
+def personalized_body(body, html=False):
+    """Split bodies keyed by their text, so each campaign body is parsed once per process."""
+    return PersonalizedBody(body, html)
+
+
+def personalize(body, fields, html=False):
+    """Fill [[name]] placeholders in a pre-rendered body; unknown names are left untouched."""
+    return personalized_body(body, html).render(fields)
+
+
+def recipient_fields(email):
+    """Values for the per-recipient [[placeholders]] of a campaign body."""
+    return {
+        'email': email,
+        'unsubscribe_url': f"{SITE_URL}/newsletters/unsubscribe?email={quote(email)}",
+    }
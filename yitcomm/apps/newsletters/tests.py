@@ -1,3 +1,139 @@
+import smtplib
+import threading
+from datetime import timedelta
+
 from django.test import TestCase
+from django.utils import timezone
+
+from .campaigns import campaign_email, claim_recipients, run_campaigns, start_campaign
+from .mailer import OutboxSender, queue_email
+from .models import Campaign, CampaignRecipient, NewsletterSubscription, OutboxEmail
+
+
+class RecordingSender(OutboxSender):
+    """OutboxSender that records messages instead of talking to SMTP, failing where told to."""
+
+    def __init__(self, errors=None, **config):
+        super().__init__({'RATE_PER_SECOND': None, 'POOL_SIZE': 2, **config})
+        self.errors = errors or {}
+        self.sent = []
+        self._sent_lock = threading.Lock()
+
+    def send(self, email):
+        error = self.errors.get(email.recipient)
+        if error is not None:
+            raise error
+        with self._sent_lock:
+            self.sent.append((email.recipient, email.message_id))
+
+
+class OutboxTests(TestCase):
+    def setUp(self):
+        self.sender = RecordingSender(MAX_ATTEMPTS=2)
+        self.addCleanup(self.sender.close)
+
+    def queue(self, count):
+        return [queue_email(f'user{i}@example.com', 'Subject', '<p>Body</p>') for i in range(count)]
+
+    def test_claim_leases_due_rows_once(self):
+        self.queue(3)
+        first = self.sender.claim(2)
+        self.assertEqual(len(first), 2)
+        self.assertTrue(all(email.status == OutboxEmail.STATUS_SENDING and email.attempts == 1 for email in first))
+        self.assertEqual(len(self.sender.claim(2)), 1)
+        self.assertEqual(self.sender.claim(2), [])
+
+    def test_expired_lease_is_claimed_again(self):
+        self.queue(1)
+        self.sender.claim(10)
+        OutboxEmail.objects.update(locked_until=timezone.now() - timedelta(seconds=1))
+
+        reclaimed = self.sender.claim(10)
+        self.assertEqual([email.attempts for email in reclaimed], [2])
+
+    def test_not_due_rows_are_skipped(self):
+        self.queue(1)
+        OutboxEmail.objects.update(next_attempt_at=timezone.now() + timedelta(minutes=5))
+        self.assertEqual(self.sender.claim(10), [])
+
+    def test_transient_failure_is_retried_later(self):
+        email, = self.queue(1)
+        self.sender.errors[email.recipient] = smtplib.SMTPServerDisconnected('gone')
+        self.assertEqual(self.sender.drain(), (0, 1))
+
+        email.refresh_from_db()
+        self.assertEqual(email.status, OutboxEmail.STATUS_PENDING)
+        self.assertGreater(email.next_attempt_at, timezone.now())
+        self.assertIsNone(email.locked_until)
+        self.assertEqual(self.sender.claim(10), [])
+
+        # Second and last attempt
+        OutboxEmail.objects.update(next_attempt_at=timezone.now())
+        self.sender.drain()
+        email.refresh_from_db()
+        self.assertEqual((email.status, email.attempts), (OutboxEmail.STATUS_FAILED, 2))
+
+    def test_permanent_failure_is_not_retried(self):
+        email, = self.queue(1)
+        self.sender.errors[email.recipient] = smtplib.SMTPRecipientsRefused(
+            {email.recipient: (550, b'No such mailbox')}
+        )
+        self.sender.drain()
+        email.refresh_from_db()
+        self.assertEqual((email.status, email.attempts), (OutboxEmail.STATUS_FAILED, 1))
+
+    def test_retry_keeps_the_message_id(self):
+        email, = self.queue(1)
+        self.sender.errors[email.recipient] = smtplib.SMTPServerDisconnected('gone')
+        self.sender.drain()
+        del self.sender.errors[email.recipient]
+        OutboxEmail.objects.update(next_attempt_at=timezone.now())
+
+        self.assertEqual(self.sender.drain(), (1, 0))
+        self.assertEqual(self.sender.sent, [(email.recipient, email.message_id)])
+
+
+class CampaignTests(TestCase):
+    def setUp(self):
+        self.sender = RecordingSender()
+        self.addCleanup(self.sender.close)
+        NewsletterSubscription.objects.bulk_create(
+            [NewsletterSubscription(email=f'reader{i}@example.com') for i in range(5)]
+        )
+        NewsletterSubscription.objects.create(email='gone@example.com', is_active=False)
+        self.campaign = Campaign.objects.create(subject='Hello [[email]]', html_content='<p>Hi</p>')
+
+    def test_sends_to_every_active_subscriber(self):
+        self.assertEqual(run_campaigns(self.sender, batch_size=2), (5, 0))
+        self.campaign.refresh_from_db()
+        self.assertEqual(self.campaign.status, Campaign.STATUS_COMPLETED)
+        self.assertEqual((self.campaign.total_recipients, self.campaign.sent_count), (5, 5))
+
+    def test_resumes_after_a_worker_dies(self):
+        start_campaign()
+        # A worker claims a batch, sends nothing and never reports back
+        abandoned = claim_recipients(batch_size=2)
+        self.assertEqual(run_campaigns(self.sender), (3, 0))
+
+        CampaignRecipient.objects.filter(pk__in=[r.pk for r in abandoned]).update(
+            locked_until=timezone.now() - timedelta(seconds=1)
+        )
+        self.assertEqual(run_campaigns(self.sender), (2, 0))
+
+        recipients = [recipient for recipient, _ in self.sender.sent]
+        self.assertEqual(len(recipients), 5)
+        self.assertEqual(len(set(recipients)), 5)
+        self.campaign.refresh_from_db()
+        self.assertEqual((self.campaign.status, self.campaign.sent_count), (Campaign.STATUS_COMPLETED, 5))
+
+    def test_resent_email_keeps_its_message_id(self):
+        start_campaign()
+        # A worker sends its batch but dies before recording the result
+        recipient, = claim_recipients(batch_size=1)
+        self.sender.send_many([campaign_email(self.campaign, recipient)])
+        CampaignRecipient.objects.filter(pk=recipient.pk).update(locked_until=timezone.now() - timedelta(seconds=1))
 
-# Create your tests here.
+        run_campaigns(self.sender)
+        message_ids = [message_id for email, message_id in self.sender.sent if email == recipient.email]
+        self.assertEqual(len(message_ids), 2)
+        self.assertEqual(message_ids[0], message_ids[1])
@@ -4,7 +4,8 @@ from .views import (
     SubscriptionPreferencesView,
     NewsletterListView,
     NewsletterManagementView,
-    NewsletterSendView
+    NewsletterSendView,
+    CampaignStatsView
 )
 
 urlpatterns = [
@@ -20,4 +21,6 @@ urlpatterns = [
          name='newsletter-management'),
     path('manage/<int:pk>/send/', NewsletterSendView.as_view(), 
          name='send-newsletter'),
+    path('campaigns/<int:pk>/stats/', CampaignStatsView.as_view(),
+         name='campaign-stats'),
 ]
\ No newline at end of file
@@ -1,4 +1,4 @@
-from datetime import timezone
+from django.utils import timezone
 from warnings import filters
 from rest_framework import generics, permissions, status
 from rest_framework.permissions import AllowAny
@@ -6,7 +6,9 @@ from rest_framework.response import Response
 from rest_framework.views import APIView
 from django.db import transaction
 from apps.accounts import models
-from .models import Newsletter, NewsletterSubscription
+from django.shortcuts import get_object_or_404
+from .campaigns import campaign_stats, newsletter_campaign
+from .models import Campaign, Newsletter, NewsletterSubscription
 from .serializers import NewsletterSerializer, NewsletterSubscriptionSerializer
 from apps.accounts.models import TechCategory, User
 from django_filters.rest_framework import DjangoFilterBackend
@@ -68,25 +70,32 @@ class NewsletterSendView(APIView):
     permission_classes = [permissions.IsAdminUser]
 
     def post(self, request, pk):
-        try:
-            newsletter = Newsletter.objects.get(pk=pk, sent_at__isnull=True)
-        except Newsletter.DoesNotExist:
-            return Response({'error': 'Newsletter not found or already sent'}, 
-                          status=status.HTTP_404_NOT_FOUND)
+        with transaction.atomic():
+            try:
+                newsletter = Newsletter.objects.select_for_update().get(pk=pk, sent_at__isnull=True)
+            except Newsletter.DoesNotExist:
+                return Response({'error': 'Newsletter not found or already sent'}, 
+                              status=status.HTTP_404_NOT_FOUND)
 
-        # Get matching subscribers
-        subscribers = NewsletterSubscription.objects.filter(
-            is_active=True,
-            categories__in=newsletter.categories.all()
-        ).distinct()
+            # The send_campaigns worker snapshots the matching subscribers and delivers it
+            campaign = newsletter_campaign(newsletter)
 
-        # Add sending logic here (use Celery in production)
-        # send_newsletter_task.delay(newsletter.id, [s.email for s in subscribers])
-        
-        newsletter.sent_at = timezone.now()
-        newsletter.save()
+            newsletter.sent_at = timezone.now()
+            newsletter.save()
         
         return Response({
-            'message': f'Newsletter queued for {subscribers.count()} subscribers',
+            'message': 'Newsletter queued for sending',
+            'campaign': campaign.id,
             'sent_at': newsletter.sent_at
-        }, status=status.HTTP_200_OK)
\ No newline at end of file
+        }, status=status.HTTP_202_ACCEPTED)
+
+
+class CampaignStatsView(APIView):
+    """
+    Live progress and throughput of a newsletter campaign
+    """
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request, pk):
+        campaign = get_object_or_404(Campaign, pk=pk)
+        return Response(campaign_stats(campaign))
@@ -55,4 +55,13 @@ class CategoryWithProjectStatsSerializer(serializers.ModelSerializer):
     
     class Meta:
         model = TechCategory
-        fields = ['id', 'name', 'project_count']
\ No newline at end of file
+        fields = ['id', 'name', 'project_count']
+
+
+class ProjectSummarySerializer(serializers.ModelSerializer):
+    """Slim project representation for bookmark listings"""
+    author = serializers.CharField(source='author.username', read_only=True)
+
+    class Meta:
+        model = Project
+        fields = ('id', 'title', 'author', 'featured_image', 'github_url', 'project_url', 'created_at')
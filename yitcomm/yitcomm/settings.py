@@ -88,6 +88,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'rest_framework_simplejwt',
     'rest_framework',
     'django_filters',
@@ -135,7 +136,7 @@ CORS_ALLOW_CREDENTIALS = True
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
-        'DIRS': [],
+        'DIRS': [BASE_DIR / 'templates'],
         'APP_DIRS': True,
         'OPTIONS': {
             'context_processors': [
@@ -229,6 +230,14 @@ EMAIL_USE_TLS = os.getenv('EMAIL_USE_TLS', 'True') == 'True'
 EMAIL_HOST_USER = os.getenv('EMAIL_HOST_USER')
 EMAIL_HOST_PASSWORD = os.getenv('EMAIL_HOST_PASSWORD')
 DEFAULT_FROM_EMAIL = os.getenv('DEFAULT_FROM_EMAIL')
+# Domain of generated Message-IDs; defaults to the domain of DEFAULT_FROM_EMAIL
+EMAIL_MESSAGE_ID_DOMAIN = os.getenv('EMAIL_MESSAGE_ID_DOMAIN')
+
+# Outbox worker (python manage.py send_outbox); see apps/newsletters/mailer.py for all options
+OUTBOX = {
+    'POOL_SIZE': int(os.getenv('OUTBOX_POOL_SIZE', 4)),
+    'RATE_PER_SECOND': float(os.getenv('OUTBOX_RATE_PER_SECOND', 5)),
+}
 
 # Social Auth
 SOCIAL_AUTH_FACEBOOK_KEY = os.getenv('SOCIAL_AUTH_FACEBOOK_KEY')
@@ -262,6 +271,51 @@ USE_TZ = True
 
 ZENOPAY_APIKEY = os.getenv('ZENOPAY_APIKEY')
 
+# Notifications retention (see `manage.py prune_notifications`)
+NOTIFICATION_RETENTION_DAYS = int(os.getenv('NOTIFICATION_RETENTION_DAYS', '90'))
+NOTIFICATION_ARCHIVE_ENABLED = os.getenv('NOTIFICATION_ARCHIVE_ENABLED', 'True') == 'True'
+NOTIFICATION_ARCHIVE_RETENTION_DAYS = int(os.getenv('NOTIFICATION_ARCHIVE_RETENTION_DAYS', '365'))
+
+# Admin dashboard totals: serve Postgres planner estimates instead of exact counters
+DASHBOARD_APPROXIMATE_COUNTS = os.getenv('DASHBOARD_APPROXIMATE_COUNTS', 'False') == 'True'
+
+# Reverse proxies in front of the app that append to X-Forwarded-For; client IPs
+# (login throttling, view dedup) are read from that header only when this is set
+TRUSTED_PROXY_COUNT = int(os.getenv('TRUSTED_PROXY_COUNT', 0))
+
+# Login brute-force protection (see apps/accounts/throttling.py for all options).
+# Use 'cache' with a shared cache backend when running several workers.
+LOGIN_THROTTLE = {
+    'STORE': os.getenv('LOGIN_THROTTLE_STORE', 'local'),
+}
+
+# Seconds between each worker's pull of newly revoked JWTs (logout) from the database
+TOKEN_REVOCATION_SYNC_INTERVAL = int(os.getenv('TOKEN_REVOCATION_SYNC_INTERVAL', 30))
+
+# Forums with more followers than this feed activity to followers at read time
+# (GET /api/v1/forums/feed/) instead of writing one notification per follower
+FORUM_FANOUT_THRESHOLD = int(os.getenv('FORUM_FANOUT_THRESHOLD', 1000))
+
+# Trending (?ordering=hot) score of forums and discussions (see apps/forums/hotness.py
+# for the event weights). Run `manage.py recompute_hot_scores` after changing it.
+HOT_SCORE = {
+    'HALF_LIFE_HOURS': float(os.getenv('HOT_SCORE_HALF_LIFE_HOURS', 24)),
+}
+
+# Buffered view counters (see apps/accounts/write_buffer.py for all options).
+# Use 'cache' with a shared cache backend and run `manage.py flush_write_buffers`
+# periodically when running several workers.
+VIEW_COUNTER = {
+    'STORE': os.getenv('VIEW_COUNTER_STORE', 'local'),
+}
+
+# Buffered per-user discussion read markers (unread counts), same options as
+# VIEW_COUNTER minus DEDUP_SECONDS. With 'cache', the same `manage.py flush_write_buffers`
+# run flushes them.
+READ_MARKERS = {
+    'STORE': os.getenv('READ_MARKERS_STORE', 'local'),
+}
+
 
 # Static files (CSS, JavaScript, Images)
 # https://docs.djangoproject.com/en/5.0/howto/static-files/